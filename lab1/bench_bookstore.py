@@ -0,0 +1,240 @@
+"""
+Замеры производительности BookStore.
+
+Запуск: python lab1/bench_bookstore.py memory --customers 100000
+
+memory - память на одного покупателя (tracemalloc) для трёх представлений:
+    dict    - прежние классы с __dict__ и списком ссылок на Book
+    slots   - Customer со __slots__ и покупками в array('I')
+    columnar - BookStore(columnar=True), параллельные массивы CustomerTable
+
+Пример (Python 3.11, 100 000 покупателей по 3 покупки, имена из 50 вариантов,
+с учётом индекса по email):
+    dict      ~ 450 байт/покупатель
+    slots     ~ 300 байт/покупатель
+    columnar  ~ 215 байт/покупатель
+
+search - построение CatalogSearchIndex и время запроса по сравнению
+    с полным перебором каталога:
+    python lab1/bench_bookstore.py search --books 200000
+
+concurrency - пропускная способность buy_many из пула потоков:
+    python lab1/bench_bookstore.py concurrency --operations 200000
+    Операции над разными покупателями не ждут друг друга (блокировки
+    распределены по email). Чистый Python-код ограничен GIL, поэтому
+    с ростом числа потоков пропускная способность не растёт, но и не
+    падает (пример: ~50-65 тыс. покупок/с на 1-8 потоках без журнала,
+    ~27-30 тыс. с журналом).
+
+snapshot - размер, запись и загрузка снимка в JSON и в двоичном формате:
+    python lab1/bench_bookstore.py snapshot --customers 1000000
+    Пример (1 000 000 покупателей по 3 покупки):
+        json     ~ 111 МБ, загрузка ~ 26 с
+        binary   ~  61 МБ, загрузка ~  7 с
+"""
+
+import argparse
+import tempfile
+import os
+from concurrent.futures import ThreadPoolExecutor
+import random
+import gc
+import time
+import tracemalloc
+
+from interactive_bookstore import Book, BookStore, BookStoreException, CatalogSearchIndex, Customer
+
+
+NAMES = [f"Покупатель{i}" for i in range(50)]
+
+
+def _name(i):
+    # Новый объект строки на каждого покупателя, как после разбора JSON
+    return NAMES[i % len(NAMES)].encode().decode()
+
+
+class DictCustomer:
+    """Прежнее представление покупателя, для сравнения"""
+    
+    def __init__(self, name, email):
+        self.name = name
+        self.email = email
+        self.purchased_books = []
+        self.balance = 0
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current, elapsed
+
+
+def bench_memory(count):
+    store = BookStore()
+    books = store.books
+    
+    def build_dict():
+        customers = {}
+        for i in range(count):
+            customer = DictCustomer(_name(i), f"user{i}@example.com")
+            customer.balance = i % 1000
+            customer.purchased_books.extend(books[j % len(books)] for j in range(i, i + 3))
+            customers[customer.email] = customer
+        return customers
+    
+    def build_slots():
+        customers = {}
+        for i in range(count):
+            customer = Customer(_name(i), f"user{i}@example.com", store._books_by_id)
+            customer.balance = i % 1000
+            customer.purchased_ids.extend(books[j % len(books)].book_id for j in range(i, i + 3))
+            customers[customer.email] = customer
+        return customers
+    
+    def build_columnar():
+        columnar = BookStore(columnar=True)
+        for i in range(count):
+            columnar._add_customer(columnar._customer_from_record({
+                "name": _name(i),
+                "email": f"user{i}@example.com",
+                "balance": i % 1000,
+                "purchased": [books[j % len(books)].book_id for j in range(i, i + 3)]
+            }))
+        return columnar
+    
+    print(f"Покупателей: {count}")
+    for label, build in (("dict", build_dict), ("slots", build_slots), ("columnar", build_columnar)):
+        memory, elapsed = _measure(build)
+        print(f"  {label:9} {memory / count:8.0f} байт/покупатель  {elapsed:6.2f} с")
+
+
+SYLLABLES = ["ва", "ми", "ро", "ка", "те", "ло", "на", "ск", "пр", "ди", "ст", "ма", "ре", "гу", "зо", "чи"]
+AUTHORS = ["Толстой", "Булгаков", "Достоевский", "Оруэлл", "Роулинг", "Чехов", "Пушкин", "Гоголь"]
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def bench_search(count, queries=200):
+    rng = random.Random(1)
+    words = [_word(rng) for _ in range(20000)]
+    books = [
+        Book(" ".join(rng.choice(words) for _ in range(3)), rng.choice(AUTHORS), 100 + i % 900, i)
+        for i in range(count)
+    ]
+    
+    index = CatalogSearchIndex()
+    start = time.perf_counter()
+    for book in books:
+        index.add(book)
+    print(f"Книг: {count}, построение индекса: {time.perf_counter() - start:.2f} с")
+    
+    queries_text = [rng.choice(words) + " " + rng.choice(AUTHORS)[:4] for _ in range(queries)]
+    
+    start = time.perf_counter()
+    for query in queries_text:
+        index.search(query)
+    indexed = (time.perf_counter() - start) / queries
+    
+    start = time.perf_counter()
+    for query in queries_text[:10]:
+        parts = CatalogSearchIndex.tokenize(query)
+        [b for b in books if all(p in (b.title + " " + b.author).casefold() for p in parts)]
+    scan = (time.perf_counter() - start) / 10
+    
+    print(f"  индекс   {indexed * 1000:8.2f} мс/запрос")
+    print(f"  перебор  {scan * 1000:8.2f} мс/запрос")
+
+
+def bench_concurrency(operations, journal):
+    for threads in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = BookStore()
+            if journal:
+                store.open_journal(os.path.join(tmp, "data.json"), sync_every=64, compact_every=50000)
+            emails = [f"user{i}@example.com" for i in range(1000)]
+            for email in emails:
+                store.top_up(store.register_customer("Покупатель", email), 10 ** 9)
+            
+            def worker(n):
+                try:
+                    store.buy_many(emails[n % len(emails)], [1 + n % 5])
+                except BookStoreException:
+                    pass
+            
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for _ in pool.map(worker, range(operations), chunksize=256):
+                    pass
+            elapsed = time.perf_counter() - start
+            store.close_journal()
+            print(f"  потоков {threads}: {operations / elapsed:10.0f} покупок/с")
+
+
+def bench_snapshot(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BookStore()
+        for i in range(count):
+            store._load_record({
+                "name": _name(i),
+                "email": f"user{i}@example.com",
+                "balance": i % 1000 + 0.5,
+                "purchased": [1 + j % 5 for j in range(i, i + 3)]
+            })
+        json_file = os.path.join(tmp, "data.json")
+        binary_file = os.path.join(tmp, "data.bin")
+        print(f"Покупателей: {count}")
+        for label, filename, save, load in (
+                ("json", json_file, BookStore._write_json, BookStore.load_from_json),
+                ("binary", binary_file, BookStore._write_binary, BookStore.load_from_binary)):
+            start = time.perf_counter()
+            save(store, filename)
+            saved = time.perf_counter() - start
+            loaded = BookStore()
+            gc.collect()
+            start = time.perf_counter()
+            load(loaded, filename)
+            elapsed = time.perf_counter() - start
+            assert loaded.customer_count() == count
+            print(f"  {label:7} {os.path.getsize(filename) / 2 ** 20:8.1f} МБ"
+                  f"  запись {saved:6.2f} с  загрузка {elapsed:6.2f} с")
+            del loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности BookStore")
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+    
+    memory = subparsers.add_parser("memory", help="память на одного покупателя")
+    memory.add_argument("--customers", type=int, default=100000)
+    
+    search = subparsers.add_parser("search", help="поиск по каталогу")
+    search.add_argument("--books", type=int, default=200000)
+    
+    concurrency = subparsers.add_parser("concurrency", help="параллельные покупки")
+    concurrency.add_argument("--operations", type=int, default=200000)
+    concurrency.add_argument("--journal", action="store_true", help="писать журнал операций")
+    
+    snapshot = subparsers.add_parser("snapshot", help="размер и загрузка снимка: JSON и двоичный")
+    snapshot.add_argument("--customers", type=int, default=1000000)
+    
+    args = parser.parse_args()
+    if args.bench == "memory":
+        bench_memory(args.customers)
+    elif args.bench == "search":
+        bench_search(args.books)
+    elif args.bench == "concurrency":
+        bench_concurrency(args.operations, args.journal)
+    elif args.bench == "snapshot":
+        bench_snapshot(args.customers)
+
+
+if __name__ == "__main__":
+    main()
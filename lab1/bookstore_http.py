@@ -0,0 +1,259 @@
+"""
+HTTP-сервис для BookStore на aiohttp.
+
+JSON-эндпоинты поверх BookStore, Customer и Book:
+    GET  /books?offset=0&limit=50          - каталог; &sort=price, title или
+                                             author, "-price" - по убыванию
+    GET  /books/{id}                       - одна книга
+    GET  /search?q=...&limit=20            - поиск по каталогу
+    POST /customers        {name, email}   - регистрация
+    POST /login            {email}         - вход (возвращает профиль)
+    GET  /customers/{email}                - профиль покупателя
+    POST /customers/{email}/balance    {amount}    - пополнение
+    POST /customers/{email}/purchases  {book_ids}  - покупка (buy_many)
+
+Сервер не хранит "текущего покупателя": каждый запрос указывает email.
+Соединения keep-alive, запросы, отправленные в одном соединении подряд
+(pipelining), aiohttp обрабатывает по очереди без переподключения.
+Операции, пишущие журнал на диск, выполняются в пуле потоков, чтобы не
+блокировать цикл событий; BookStore потокобезопасен.
+
+Запуск:        python lab1/bookstore_http.py serve --port 8080
+Нагрузка:      python lab1/bookstore_http.py load --url http://127.0.0.1:8080 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import ClientSession, TCPConnector, web
+
+from interactive_bookstore import BookStore, BookStoreException
+
+
+STORE = web.AppKey("store", BookStore)
+EXECUTOR = web.AppKey("executor", ThreadPoolExecutor)
+# Наибольший размер страницы каталога
+MAX_PAGE = 1000
+
+
+def _error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+async def _run_blocking(request, func, *args):
+    """Выполняет операцию с диском в пуле потоков"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[EXECUTOR], func, *args)
+
+
+def _bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}, ensure_ascii=False),
+                              content_type="application/json")
+
+
+async def _json_body(request):
+    """Тело запроса - объект JSON, иначе 400"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise _bad_request("Некорректный JSON")
+    if not isinstance(data, dict):
+        raise _bad_request("Тело запроса должно быть объектом JSON")
+    return data
+
+
+def _email(data):
+    email = data.get("email")
+    if not isinstance(email, str):
+        raise _bad_request("Не указан email")
+    return email
+
+
+async def list_books(request):
+    store = request.app[STORE]
+    try:
+        offset = int(request.query.get("offset", 0))
+        limit = min(int(request.query.get("limit", 50)), MAX_PAGE)
+        books = store.list_books(offset, limit, request.query.get("sort"))
+    except ValueError as e:
+        return _error(400, str(e))
+    return web.json_response({"total": len(store.books), "books": [book.to_dict() for book in books]})
+
+
+async def get_book(request):
+    try:
+        book = request.app[STORE].get_book(int(request.match_info["book_id"]))
+    except ValueError:
+        return _error(400, "Некорректный ID книги")
+    if book is None:
+        return _error(404, "Книга не найдена")
+    return web.json_response(book.to_dict())
+
+
+async def search(request):
+    query = request.query.get("q", "")
+    try:
+        limit = min(int(request.query.get("limit", 20)), MAX_PAGE)
+    except ValueError:
+        return _error(400, "Некорректный limit")
+    if limit < 0:
+        return _error(400, "limit не может быть отрицательным")
+    books = request.app[STORE].search(query, limit)
+    return web.json_response({"books": [book.to_dict() for book in books]})
+
+
+async def register(request):
+    data = await _json_body(request)
+    name, email = data.get("name"), _email(data)
+    if not isinstance(name, str):
+        return _error(400, "Не указано имя")
+    try:
+        customer = await _run_blocking(request, request.app[STORE].register_customer, name, email)
+    except (BookStoreException, ValueError) as e:
+        return _error(400, str(e))
+    return web.json_response(customer.to_dict(), status=201)
+
+
+async def login(request):
+    data = await _json_body(request)
+    customer = request.app[STORE].get_customer(_email(data))
+    if customer is None:
+        return _error(404, "Пользователь не найден")
+    return web.json_response(customer.to_dict())
+
+
+async def get_customer(request):
+    customer = request.app[STORE].get_customer(request.match_info["email"])
+    if customer is None:
+        return _error(404, "Пользователь не найден")
+    return web.json_response(customer.to_dict())
+
+
+async def top_up(request):
+    store = request.app[STORE]
+    customer = store.get_customer(request.match_info["email"])
+    if customer is None:
+        return _error(404, "Пользователь не найден")
+    data = await _json_body(request)
+    try:
+        await _run_blocking(request, store.top_up, customer, data.get("amount"))
+    except ValueError as e:
+        return _error(400, str(e))
+    return web.json_response(customer.to_dict())
+
+
+async def purchase(request):
+    store = request.app[STORE]
+    email = request.match_info["email"]
+    data = await _json_body(request)
+    book_ids = data.get("book_ids")
+    if not isinstance(book_ids, list) or not book_ids:
+        return _error(400, "Нужен непустой список book_ids")
+    if not all(isinstance(book_id, int) and not isinstance(book_id, bool) for book_id in book_ids):
+        return _error(400, "book_ids должны быть целыми числами")
+    try:
+        books = await _run_blocking(request, store.buy_many, email, book_ids)
+    except BookStoreException as e:
+        return _error(400, str(e))
+    customer = store.get_customer(email)
+    return web.json_response({"bought": [book.to_dict() for book in books], "customer": customer.to_dict()})
+
+
+def create_app(store, workers=4):
+    """Создаёт приложение aiohttp поверх готового BookStore"""
+    app = web.Application()
+    app[STORE] = store
+    app[EXECUTOR] = ThreadPoolExecutor(max_workers=workers)
+    app.router.add_get("/books", list_books)
+    app.router.add_get("/books/{book_id}", get_book)
+    app.router.add_get("/search", search)
+    app.router.add_post("/customers", register)
+    app.router.add_post("/login", login)
+    app.router.add_get("/customers/{email}", get_customer)
+    app.router.add_post("/customers/{email}/balance", top_up)
+    app.router.add_post("/customers/{email}/purchases", purchase)
+    
+    async def shutdown(app):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(app[EXECUTOR], app[STORE].close)
+        app[EXECUTOR].shutdown()
+    
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+async def load_test(url, requests, concurrency, customers=100):
+    """
+    Нагрузочный тест: смесь просмотра каталога, поиска, пополнений и покупок
+    
+    Все запросы идут через одну сессию с пулом keep-alive соединений.
+    """
+    emails = [f"load{i}@example.com" for i in range(customers)]
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(url, connector=connector) as session:
+        for email in emails:
+            async with session.post("/customers", json={"name": "Нагрузка", "email": email}) as response:
+                await response.read()
+            async with session.post(f"/customers/{email}/balance", json={"amount": 10 ** 9}) as response:
+                await response.read()
+        
+        counter = iter(range(requests))
+        statuses = {}
+        
+        async def worker():
+            rng = random.Random()
+            for _ in counter:
+                kind = rng.random()
+                email = rng.choice(emails)
+                if kind < 0.4:
+                    call = session.get("/books", params={"limit": 20})
+                elif kind < 0.6:
+                    call = session.get("/search", params={"q": "мастер"})
+                elif kind < 0.7:
+                    call = session.post(f"/customers/{email}/balance", json={"amount": 100})
+                else:
+                    call = session.post(f"/customers/{email}/purchases", json={"book_ids": [rng.randint(1, 5)]})
+                async with call as response:
+                    await response.read()
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    
+    print(f"Запросов: {requests}, соединений: {concurrency}")
+    print(f"  {requests / elapsed:.0f} запросов/с, статусы: {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP-сервис магазина книг")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    serve = subparsers.add_parser("serve", help="запустить сервер")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--data", default="lab1/bookstore_data.json", help="снимок с журналом: JSON или .bin")
+    serve.add_argument("--catalog", help="внешний каталог: JSON или скомпилированный .bin")
+    serve.add_argument("--workers", type=int, default=4, help="потоков для операций с диском")
+    
+    load = subparsers.add_parser("load", help="нагрузочный тест запущенного сервера")
+    load.add_argument("--url", default="http://127.0.0.1:8080")
+    load.add_argument("--requests", type=int, default=20000)
+    load.add_argument("--concurrency", type=int, default=64)
+    
+    args = parser.parse_args()
+    if args.command == "serve":
+        store = BookStore(catalog_file=args.catalog)
+        store.load_snapshot(args.data)
+        store.open_journal(args.data)
+        web.run_app(create_app(store, args.workers), host=args.host, port=args.port, keepalive_timeout=75)
+    else:
+        asyncio.run(load_test(args.url, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
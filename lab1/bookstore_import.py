@@ -0,0 +1,237 @@
+"""
+Массовый импорт покупателей в BookStore из CSV и JSONL.
+
+Файл читается потоково, блоками по chunk_size строк. Блоки проверяются
+в пуле процессов (имя, формат email, баланс, ID купленных книг по
+каталогу), а главный процесс принимает результаты в исходном порядке,
+отсекает повторные email по словарю уже встреченных и передаёт записи
+в BookStore.import_customers. Отклонённые строки возвращаются вместе
+с номерами строк исходного файла.
+
+CSV:   заголовок name,email,balance,purchased; purchased - ID книг через ";"
+JSONL: по объекту {"name", "email", "balance", "purchased"} в строке
+Сжатые файлы (.csv.gz, .jsonl.gz) читаются без распаковки на диск.
+
+Запуск: python lab1/bookstore_import.py customers.csv --report rejected.csv
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from interactive_bookstore import BookStore, BookStoreException, _from_kopecks, _to_kopecks
+
+
+EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+REQUIRED_COLUMNS = ("name", "email")
+
+# Множество ID книг каталога в процессе-обработчике (задаётся при запуске пула)
+_catalog_ids = frozenset()
+
+
+def _init_worker(catalog_ids):
+    global _catalog_ids
+    _catalog_ids = catalog_ids
+
+
+def _open(filename):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt', encoding='utf-8', newline='')
+    return open(filename, encoding='utf-8', newline='')
+
+
+def _file_format(filename):
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    return 'csv' if name.lower().endswith('.csv') else 'jsonl'
+
+
+def _iter_rows(f, fmt):
+    """
+    Перечисляет пары (номер строки, данные): для CSV - словарь полей,
+    разобранный модулем csv, для JSONL - необработанная строка
+    """
+    if fmt == 'csv':
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [column.strip().lower() for column in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise BookStoreException(f"В заголовке CSV нет столбцов: {', '.join(missing)}")
+        for row in reader:
+            if row:
+                yield reader.line_num, dict(zip(columns, row))
+    else:
+        for line_num, line in enumerate(f, 1):
+            if line.strip():
+                yield line_num, line
+
+
+def _parse_balance(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().replace(',', '.'))
+        except ValueError:
+            raise ValueError(f"Некорректный баланс: {value!r}")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"Некорректный баланс: {value!r}")
+    if value < 0:
+        raise ValueError("Баланс не может быть отрицательным")
+    return _from_kopecks(_to_kopecks(value))
+
+
+def _parse_purchased(value):
+    """Разбирает список покупок и сверяет ID с каталогом"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = [item for item in value.split(';') if item.strip()]
+    if not isinstance(value, list):
+        raise ValueError("Покупки должны быть списком ID книг")
+    purchased = []
+    for item in value:
+        try:
+            book_id = int(item)
+        except (TypeError, ValueError):
+            raise ValueError(f"Некорректный ID книги: {item!r}")
+        if book_id not in _catalog_ids:
+            raise ValueError(f"Книга с ID {book_id} не найдена")
+        purchased.append(book_id)
+    return purchased
+
+
+def validate_record(data):
+    """Проверяет одну запись и возвращает её в формате снимка BookStore"""
+    if not isinstance(data, dict):
+        raise ValueError("Запись должна быть объектом")
+    name = data.get('name')
+    email = data.get('email')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Не указано имя")
+    if not isinstance(email, str) or not EMAIL.fullmatch(email.strip()):
+        raise ValueError(f"Некорректный email: {email!r}")
+    return {
+        "name": name.strip(),
+        "email": email.strip(),
+        "balance": _parse_balance(data.get('balance')),
+        "purchased": _parse_purchased(data.get('purchased'))
+    }
+
+
+def _validate_chunk(fmt, chunk):
+    """Проверяет блок строк; возвращает (принятые записи, отклонённые строки)"""
+    accepted = []
+    rejected = []
+    for line, data in chunk:
+        if fmt == 'jsonl':
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                rejected.append((line, "Некорректный JSON"))
+                continue
+        try:
+            accepted.append((line, validate_record(data)))
+        except ValueError as e:
+            rejected.append((line, str(e)))
+    return accepted, rejected
+
+
+def _ordered_results(pool, fmt, chunks, window):
+    """Отдаёт результаты в порядке блоков, держа в работе не больше window блоков"""
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(_validate_chunk, fmt, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def import_file(store, filename, workers=None, chunk_size=5000):
+    """
+    Импортирует покупателей из CSV или JSONL в store
+    
+    workers - число процессов для проверки (None - по числу ядер,
+    0 - проверка в текущем процессе). Возвращает пару
+    (число добавленных покупателей, [(номер строки, причина), ...]).
+    """
+    catalog_ids = frozenset(book.book_id for book in store.books)
+    fmt = _file_format(filename)
+    rejected = []
+    first_seen = {}
+    
+    def accepted_records(results):
+        for accepted, errors in results:
+            rejected.extend(errors)
+            for line, record in accepted:
+                email = record['email']
+                if email in first_seen:
+                    rejected.append((line, f"Повтор email из строки {first_seen[email]}"))
+                elif store.get_customer(email) is not None:
+                    rejected.append((line, "Пользователь с таким email уже существует"))
+                else:
+                    first_seen[email] = line
+                    yield record
+    
+    with _open(filename) as f:
+        rows = _iter_rows(f, fmt)
+        chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+        if workers == 0:
+            _init_worker(catalog_ids)
+            imported = store.import_customers(accepted_records(_validate_chunk(fmt, chunk) for chunk in chunks))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(catalog_ids,)) as pool:
+                results = _ordered_results(pool, fmt, chunks, workers * 2)
+                imported = store.import_customers(accepted_records(results))
+    rejected.sort()
+    return imported, rejected
+
+
+def write_report(rejected, filename):
+    """Сохраняет отклонённые строки в CSV: line,reason"""
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(("line", "reason"))
+        writer.writerows(rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт покупателей из CSV/JSONL")
+    parser.add_argument("source", help="файл .csv или .jsonl (можно .gz)")
+    parser.add_argument("--data", default="lab1/bookstore_data.json", help="JSON-снимок магазина")
+    parser.add_argument("--catalog", help="внешний каталог: JSON или скомпилированный .bin")
+    parser.add_argument("--workers", type=int, help="процессов для проверки (0 - без пула)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="строк в одном блоке")
+    parser.add_argument("--report", help="CSV-отчёт об отклонённых строках")
+    args = parser.parse_args()
+    
+    store = BookStore(catalog_file=args.catalog)
+    store.load_from_json(args.data)
+    store.open_journal(args.data)
+    try:
+        imported, rejected = import_file(store, args.source, args.workers, args.chunk_size)
+    finally:
+        store.close_journal()
+    
+    print(f"Добавлено покупателей: {imported}, отклонено строк: {len(rejected)}")
+    if args.report:
+        write_report(rejected, args.report)
+        print(f"Отчёт: {args.report}")
+    else:
+        for line, reason in rejected[:20]:
+            print(f"  строка {line}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Хранилище BookStore на SQLite (модуль sqlite3 из стандартной библиотеки).
+
+Книги, покупатели и покупки лежат в индексированных таблицах books,
+customers и purchases. При запуске ничего не загружается целиком: покупатель
+читается из базы при входе, а покупка выполняется одной транзакцией
+(списание с баланса + строка в purchases). Режим WAL и BEGIN IMMEDIATE
+позволяют нескольким процессам работать с одной базой.
+
+JSON и XML остаются форматами импорта и экспорта:
+load_from_json / load_from_xml переносят данные в базу,
+save_to_json / save_to_xml выгружают их из неё.
+
+Запуск: python lab1/bookstore_sqlite.py
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from interactive_bookstore import (
+    Book, BookStore, BookStoreException, Customer, SalesStats, StoreSnapshot,
+    _check_amount, _iter_json_array, _iter_xml_records, run
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    price NUMERIC NOT NULL CHECK (price > 0)
+);
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    balance NUMERIC NOT NULL DEFAULT 0 CHECK (balance >= 0)
+);
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL REFERENCES customers(id),
+    book_id INTEGER NOT NULL REFERENCES books(id)
+);
+CREATE INDEX IF NOT EXISTS purchases_by_customer ON purchases(customer_id);
+"""
+
+
+class SQLiteBookStore(BookStore):
+    """BookStore, хранящий данные в базе SQLite"""
+    
+    def __init__(self, filename="lab1/bookstore.db"):
+        # isolation_level=None: транзакции открываются явно в _transaction
+        self.db = sqlite3.connect(filename, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        super().__init__()
+        self._rebuild_stats()
+    
+    @contextmanager
+    def _transaction(self):
+        """Транзакция с блокировкой на запись с самого начала"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+    
+    def _rebuild_stats(self):
+        """
+        Пересчитывает статистику продаж одним проходом по purchases
+        (покупки, сделанные другими процессами, видны после пересчёта)
+        """
+        # Версия читается до пересчёта: изменения во время него вызовут ещё один
+        self._data_version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        self.stats = SalesStats()
+        self.stats.add_counts(
+            dict(self.db.execute("SELECT book_id, COUNT(*) FROM purchases GROUP BY book_id")),
+            self._books_by_id
+        )
+    
+    def refresh_stats(self):
+        """
+        Пересчитывает статистику, если базу меняли другие подключения
+        
+        PRAGMA data_version меняется только после чужих транзакций, а свои
+        покупки уже учтены в stats, поэтому без чужих изменений проверка
+        стоит одного запроса.
+        """
+        if self.db.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._rebuild_stats()
+    
+    def top_sellers(self, k=10):
+        self.refresh_stats()
+        return super().top_sellers(k)
+    
+    def average_spend(self):
+        self.refresh_stats()
+        return super().average_spend()
+    
+    def show_sales_stats(self, k=5):
+        self.refresh_stats()
+        super().show_sales_stats(k)
+    
+    def _init_books(self):
+        """Каталог читается из базы; пустая база заполняется стандартными книгами"""
+        rows = self.db.execute("SELECT title, author, price, id FROM books ORDER BY id").fetchall()
+        if not rows:
+            super()._init_books()
+            return
+        BookStore.add_books(self, [Book(title, author, price, book_id) for title, author, price, book_id in rows])
+    
+    def add_books(self, books):
+        with self._transaction():
+            super().add_books(books)
+            self.db.executemany(
+                "INSERT INTO books (id, title, author, price) VALUES (?, ?, ?, ?)",
+                [(book.book_id, book.title, book.author, book.price) for book in books]
+            )
+    
+    def remove_book(self, book_id):
+        try:
+            with self._transaction():
+                self.db.execute("DELETE FROM books WHERE id = ?", (book_id,))
+                return super().remove_book(book_id)
+        except sqlite3.IntegrityError:
+            raise BookStoreException("Книгу нельзя удалить: её уже покупали")
+    
+    def get_customer(self, email):
+        """Читает покупателя и его покупки из базы или возвращает None"""
+        row = self.db.execute(
+            "SELECT id, name, balance FROM customers WHERE email = ?", (email,)
+        ).fetchone()
+        if row is None:
+            return None
+        customer_id, name, balance = row
+        customer = Customer(name, email, self._books_by_id)
+        customer.balance = balance
+        customer.purchased_ids.extend(book_id for (book_id,) in self.db.execute(
+            "SELECT book_id FROM purchases WHERE customer_id = ? ORDER BY id", (customer_id,)))
+        return customer
+    
+    def customer_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    
+    def register_customer(self, name, email):
+        customer = Customer(name, email, self._books_by_id)
+        try:
+            with self._transaction():
+                self.db.execute("INSERT INTO customers (name, email) VALUES (?, ?)", (name, email))
+        except sqlite3.IntegrityError:
+            raise BookStoreException("Пользователь с таким email уже существует")
+        self.current_customer = customer
+        return customer
+    
+    def purchase(self, customer, book):
+        """
+        Покупка одной транзакцией: баланс списывается, только если его
+        хватает, и в той же транзакции добавляется строка в purchases
+        """
+        with self._transaction():
+            updated = self.db.execute(
+                "UPDATE customers SET balance = balance - ? WHERE email = ? AND balance >= ?",
+                (book.price, customer.email, book.price)
+            ).rowcount
+            customer_id, balance = self.db.execute(
+                "SELECT id, balance FROM customers WHERE email = ?", (customer.email,)
+            ).fetchone()
+            if not updated:
+                raise BookStoreException(f"Недостаточно средств! Нужно: {book.price} руб., у вас: {balance} руб.")
+            self.db.execute(
+                "INSERT INTO purchases (customer_id, book_id) VALUES (?, ?)", (customer_id, book.book_id)
+            )
+        customer.balance = balance
+        customer.purchased_ids.append(book.book_id)
+        self.stats.add(book)
+    
+    def buy_many(self, email, book_ids):
+        """Покупка нескольких книг одной транзакцией: все или ни одной"""
+        books = []
+        for book_id in book_ids:
+            book = self.get_book(book_id)
+            if book is None:
+                raise BookStoreException(f"Книга с ID {book_id} не найдена")
+            books.append(book)
+        total = sum(book.price for book in books)
+        with self._transaction():
+            row = self.db.execute("SELECT id, balance FROM customers WHERE email = ?", (email,)).fetchone()
+            if row is None:
+                raise BookStoreException("Пользователь не найден")
+            customer_id, balance = row
+            if balance < total:
+                raise BookStoreException(f"Недостаточно средств! Нужно: {total} руб., у вас: {balance} руб.")
+            self.db.execute("UPDATE customers SET balance = balance - ? WHERE id = ?", (total, customer_id))
+            self.db.executemany(
+                "INSERT INTO purchases (customer_id, book_id) VALUES (?, ?)",
+                [(customer_id, book.book_id) for book in books]
+            )
+        for book in books:
+            self.stats.add(book)
+        return books
+    
+    def top_up(self, customer, amount):
+        _check_amount(amount)
+        with self._transaction():
+            self.db.execute(
+                "UPDATE customers SET balance = balance + ? WHERE email = ?", (amount, customer.email)
+            )
+            (balance,) = self.db.execute(
+                "SELECT balance FROM customers WHERE email = ?", (customer.email,)
+            ).fetchone()
+        customer.balance = balance
+    
+    def _iter_customer_records(self, include_lazy=True):
+        """Выгружает покупателей из базы одним проходом по двум упорядоченным запросам"""
+        purchases = self.db.execute("SELECT customer_id, book_id FROM purchases ORDER BY customer_id, id")
+        pending = next(purchases, None)
+        for customer_id, name, email, balance in self.db.execute(
+                "SELECT id, name, email, balance FROM customers ORDER BY id"):
+            purchased = []
+            while pending is not None and pending[0] <= customer_id:
+                if pending[0] == customer_id:
+                    purchased.append(pending[1])
+                pending = next(purchases, None)
+            yield {"name": name, "email": email, "balance": balance, "purchased": purchased}
+    
+    @contextmanager
+    def read_snapshot(self):
+        """
+        Согласованный срез - читающая транзакция: в режиме WAL она видит
+        базу на момент первого чтения и не мешает записи из других подключений
+        """
+        self.db.execute("BEGIN")
+        try:
+            yield StoreSnapshot(self.books, self.catalog_version, 0, 0, lambda snapshot: self._iter_customer_records())
+        finally:
+            self.db.execute("COMMIT")
+    
+    def _import_records(self, records):
+        """Переносит записи покупателей в базу одной транзакцией"""
+        count = 0
+        with self._transaction():
+            for record in records:
+                count += 1
+                self.db.execute(
+                    "INSERT INTO customers (name, email, balance) VALUES (?, ?, ?) "
+                    "ON CONFLICT(email) DO UPDATE SET name = excluded.name, balance = excluded.balance",
+                    (record['name'], record['email'], record['balance'])
+                )
+                (customer_id,) = self.db.execute(
+                    "SELECT id FROM customers WHERE email = ?", (record['email'],)
+                ).fetchone()
+                self.db.execute("DELETE FROM purchases WHERE customer_id = ?", (customer_id,))
+                self.db.executemany(
+                    "INSERT INTO purchases (customer_id, book_id) VALUES (?, ?)",
+                    [(customer_id, book_id) for book_id in record['purchased'] if book_id in self._books_by_id]
+                )
+        self._rebuild_stats()
+        return count
+    
+    def import_customers(self, records):
+        return self._import_records(records)
+    
+    def load_from_json(self, filename="lab1/bookstore_data.json", lazy=False):
+        """Импортирует покупателей из JSON-снимка в базу"""
+        if os.path.exists(filename):
+            self._import_records(json.loads(raw) for _, raw in _iter_json_array(filename, 'customers', {}))
+    
+    def load_from_xml(self, filename="lab1/bookstore_data.xml"):
+        """Импортирует покупателей из XML в базу"""
+        if os.path.exists(filename):
+            self._import_records(_iter_xml_records(filename))
+    
+    def open_journal(self, *args, **kwargs):
+        """Журнал не нужен: каждая операция фиксируется транзакцией"""
+    
+    def save_changes(self):
+        """Изменения уже зафиксированы в базе своими транзакциями: сохранять нечего"""
+        return 0
+    
+    def close(self):
+        self.db.close()
+
+
+if __name__ == "__main__":
+    store = SQLiteBookStore()
+    # При первом запуске переносим в базу существующий JSON-снимок
+    if store.customer_count() == 0:
+        store.load_from_json()
+    run(store)
@@ -1,6 +1,24 @@
+import argparse
+import bisect
+import gzip
+import heapq
 import json
+import math
+import mmap
+import re
+import struct
+import sys
+import threading
 import xml.etree.ElementTree as ET
 import os
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+
+# Книг на одной странице каталога
+PAGE_SIZE = 20
 
 
 class BookStoreException(Exception):
@@ -8,7 +26,18 @@ class BookStoreException(Exception):
     pass
 
 
+def _check_amount(amount):
+    """Сумма пополнения: конечное положительное число (bool, NaN и бесконечность - ошибка)"""
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount):
+        raise ValueError(f"Некорректная сумма: {amount!r}")
+    if amount <= 0:
+        raise ValueError("Сумма должна быть положительной")
+
+
 class Book:
+    # __slots__ вместо __dict__ у каждого экземпляра
+    __slots__ = ('title', 'author', 'price', 'book_id')
+    
     def __init__(self, title, author, price, book_id):
         if not title or not author:
             raise BookStoreException("Название и автор книги обязательны")
@@ -22,191 +51,1862 @@ class Book:
     
     def __str__(self):
         return f"[{self.book_id}] '{self.title}' - {self.author} ({self.price} руб.)"
+    
+    def to_dict(self):
+        return {"title": self.title, "author": self.author, "price": self.price, "id": self.book_id}
 
 
 class Customer:
-    def __init__(self, name, email):
+    # Покупки хранятся как array('I') из ID книг, а не список ссылок на Book
+    __slots__ = ('name', 'email', 'balance', 'purchased_ids', '_catalog')
+    
+    def __init__(self, name, email, catalog=None):
         if not name or not email:
             raise BookStoreException("Имя и email обязательны")
         if "@" not in email:
             raise ValueError("Некорректный email")
         
-        self.name = name
+        self.name = sys.intern(name)
         self.email = email
-        self.purchased_books = []
+        self.purchased_ids = array('I')
         self.balance = 0
+        # Каталог book_id -> Book, по которому ID покупок превращаются в книги
+        self._catalog = catalog if catalog is not None else {}
+    
+    @property
+    def purchased_books(self):
+        """Купленные книги (кортеж: список собирается заново при каждом обращении)"""
+        catalog = self._catalog
+        return tuple(catalog[book_id] for book_id in self.purchased_ids if book_id in catalog)
+    
+    def library(self):
+        """Купленные книги на момент вызова (кортеж не меняется при новых покупках)"""
+        catalog = self._catalog
+        return tuple(catalog[book_id] for book_id in self.purchased_ids[:] if book_id in catalog)
     
     def add_balance(self, amount):
-        if amount <= 0:
-            raise ValueError("Сумма должна быть положительной")
+        _check_amount(amount)
         self.balance += amount
     
+    def _check_catalog(self, books):
+        """Покупать можно только книги каталога: сам каталог покупатель не меняет"""
+        for book in books:
+            if book.book_id not in self._catalog:
+                raise BookStoreException(f"Книга с ID {book.book_id} не найдена")
+    
     def buy_book(self, book):
+        self._check_catalog((book,))
         if self.balance < book.price:
             raise BookStoreException(f"Недостаточно средств! Нужно: {book.price} руб., у вас: {self.balance} руб.")
         self.balance -= book.price
-        self.purchased_books.append(book)
+        self._add_purchase(book.book_id)
+    
+    def buy_books(self, books):
+        """Покупает несколько книг сразу: либо все, либо ни одной"""
+        self._check_catalog(books)
+        total = sum(book.price for book in books)
+        if self.balance < total:
+            raise BookStoreException(f"Недостаточно средств! Нужно: {total} руб., у вас: {self.balance} руб.")
+        self.balance -= total
+        for book in books:
+            self._add_purchase(book.book_id)
+    
+    def _add_purchase(self, book_id):
+        self.purchased_ids.append(book_id)
     
     def __str__(self):
-        return f"{self.name} ({self.email}) | Баланс: {self.balance} руб. | Куплено книг: {len(self.purchased_books)}"
+        return f"{self.name} ({self.email}) | Баланс: {self.balance} руб. | Куплено книг: {len(self.purchased_ids)}"
+    
+    def to_dict(self):
+        return {"name": self.name, "email": self.email, "balance": self.balance,
+                "purchased": self.purchased_ids.tolist()}
 
 
-class BookStore:
+def _to_kopecks(amount):
+    return round(amount * 100)
+
+
+def _from_kopecks(kopecks):
+    rubles, rest = divmod(kopecks, 100)
+    return kopecks / 100 if rest else rubles
+
+
+class CustomerRow(Customer):
+    """Покупатель, чьи поля хранятся в строке CustomerTable"""
+    __slots__ = ('_table', '_row')
+    
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+    
+    @property
+    def name(self):
+        return self._table.names[self._row]
+    
+    @property
+    def email(self):
+        return self._table.emails[self._row]
+    
+    @property
+    def balance(self):
+        return _from_kopecks(self._table.balances[self._row])
+    
+    @balance.setter
+    def balance(self, value):
+        self._table.balances[self._row] = _to_kopecks(value)
+    
+    @property
+    def purchased_ids(self):
+        """Копия ID покупок; изменяются они только через buy_book"""
+        ids = array('I')
+        ids.frombytes(self._table.purchases[self._row])
+        return ids
+    
+    def _add_purchase(self, book_id):
+        purchases = self._table.purchases
+        purchases[self._row] += array('I', (book_id,)).tobytes()
+    
+    @property
+    def _catalog(self):
+        return self._table.catalog
+
+
+class CustomerTable:
+    """
+    Колоночная таблица покупателей
+    
+    Вместо объекта на каждого покупателя - параллельные массивы:
+    интернированные имена, email, балансы в копейках (array('q'))
+    и покупки (упакованные в bytes ID книг). Доступ по email
+    возвращает CustomerRow с обычным интерфейсом Customer.
+    """
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.names = []
+        self.emails = []
+        self.balances = array('q')
+        self.purchases = []
+        self._rows = {}
+    
+    def __len__(self):
+        return len(self.emails)
+    
+    def __contains__(self, email):
+        return email in self._rows
+    
+    def __iter__(self):
+        for row in range(len(self.emails)):
+            yield CustomerRow(self, row)
+    
+    def get(self, email, default=None):
+        row = self._rows.get(email)
+        if row is None:
+            return default
+        return CustomerRow(self, row)
+    
+    def append(self, customer):
+        """Копирует покупателя в новую строку таблицы и возвращает её"""
+        row = len(self.emails)
+        self.names.append(sys.intern(customer.name))
+        self.emails.append(customer.email)
+        self.balances.append(_to_kopecks(customer.balance))
+        self.purchases.append(customer.purchased_ids.tobytes())
+        self._rows[customer.email] = row
+        return CustomerRow(self, row)
+
+
+class PurchaseJournal:
+    """
+    Журнал операций магазина (append-only, JSON Lines)
+    
+    Каждая операция (регистрация, пополнение, покупка) дописывается в конец
+    файла одной компактной строкой. fsync выполняется группами по
+    sync_every записей, поэтому стоимость одной операции не зависит
+    от размера магазина.
+    """
+    
+    def __init__(self, filename, sync_every=16):
+        self.filename = filename
+        self.sync_every = sync_every
+        self.size = self._recover(filename)
+        self._file = open(filename, 'a', encoding='utf-8')
+        self._pending = 0
+    
+    def append(self, record):
+        """Дописывает запись в журнал"""
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self.size += 1
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+    
+    def sync(self):
+        """Сбрасывает накопленные записи на диск"""
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+    
+    def reset(self):
+        """Очищает журнал после сохранения снимка"""
+        self._file.close()
+        self._file = open(self.filename, 'w', encoding='utf-8')
+        self.size = 0
+        self._pending = 0
+    
+    def close(self):
+        self.sync()
+        self._file.close()
+    
+    @staticmethod
+    def _recover(filename):
+        """Отрезает оборванную после сбоя запись и возвращает число целых записей"""
+        if not os.path.exists(filename):
+            return 0
+        size = 0
+        valid_end = 0
+        with open(filename, 'rb+') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                size += 1
+                valid_end += len(line)
+            f.truncate(valid_end)
+        return size
+    
+    @staticmethod
+    def replay(filename):
+        """Читает записи журнала; оборванная последняя строка игнорируется"""
+        if not os.path.exists(filename):
+            return
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+
+# Структурные символы JSON; в UTF-8 они не встречаются внутри многобайтовых
+# последовательностей, поэтому документ можно разбирать прямо по байтам
+_JSON_STRUCTURE = re.compile(rb'["\\\[\]{}]')
+_JSON_SCALAR_END = re.compile(rb'[\s,\]}]')
+
+
+def _json_value_end(buf, pos, eof):
+    """
+    Возвращает индекс конца JSON-значения, начинающегося в buf[pos],
+    или -1, если значение не поместилось в буфер целиком
+    """
+    first = buf[pos:pos + 1]
+    if first not in (b'"', b'{', b'['):
+        match = _JSON_SCALAR_END.search(buf, pos)
+        if match:
+            return match.start()
+        return len(buf) if eof else -1
+    
+    depth = 0
+    in_string = False
+    i = pos
+    while True:
+        match = _JSON_STRUCTURE.search(buf, i)
+        if not match:
+            return -1
+        i = match.end()
+        char = match.group()
+        if in_string:
+            if char == b'\\':
+                i += 1
+            elif char == b'"':
+                in_string = False
+                if depth == 0:
+                    return i
+        elif char == b'"':
+            in_string = True
+        elif char in (b'{', b'['):
+            depth += 1
+        elif char in (b'}', b']'):
+            depth -= 1
+            if depth == 0:
+                return i
+
+
+def _iter_json_array(filename, key, extra, chunk_size=1 << 16):
+    """
+    Потоково перечисляет элементы массива data[key] из JSON-объекта в файле
+    
+    Выдаёт пары (смещение в байтах, байты элемента), держа в памяти
+    только текущий элемент и один блок файла. Остальные поля верхнего
+    уровня разбираются целиком и складываются в словарь extra.
+    """
+    with open(filename, 'rb') as f:
+        buf = b''
+        base = 0
+        pos = 0
+        eof = False
+        
+        def fill():
+            nonlocal buf, base, pos, eof
+            if pos > chunk_size:
+                buf = buf[pos:]
+                base += pos
+                pos = 0
+            chunk = f.read(chunk_size)
+            if not chunk:
+                if eof:
+                    raise json.JSONDecodeError("Неожиданный конец файла", '', base + pos)
+                eof = True
+            buf += chunk
+        
+        def skip(separators=b' \t\r\n'):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos:pos + 1] in separators:
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos:pos + 1]
+                fill()
+        
+        def value():
+            nonlocal pos
+            while True:
+                end = _json_value_end(buf, pos, eof)
+                if end != -1:
+                    start, pos = pos, end
+                    return base + start, buf[start:end]
+                fill()
+        
+        if skip() != b'{':
+            raise json.JSONDecodeError("Ожидался объект", '', base + pos)
+        pos += 1
+        while skip(b' \t\r\n,') != b'}':
+            _, raw_key = value()
+            if skip() != b':':
+                raise json.JSONDecodeError("Ожидалось ':'", '', base + pos)
+            pos += 1
+            skip()
+            name = json.loads(raw_key)
+            if name != key:
+                extra[name] = json.loads(value()[1])
+                continue
+            if buf[pos:pos + 1] != b'[':
+                raise json.JSONDecodeError("Ожидался массив", '', base + pos)
+            pos += 1
+            while skip(b' \t\r\n,') != b']':
+                yield value()
+            pos += 1
+
+
+def _json_head(catalog_file, books, journal_seq, delta_batch):
+    """Начало JSON-снимка до открытого массива customers"""
+    if catalog_file:
+        catalog = b'"catalog": ' + json.dumps(catalog_file, ensure_ascii=False).encode('utf-8')
+    else:
+        books = json.dumps(books, ensure_ascii=False, indent=2)
+        catalog = b'"books": ' + books.replace('\n', '\n  ').encode('utf-8')
+    return (b'{\n  ' + catalog + b',\n  "journal_seq": ' + str(journal_seq).encode()
+            + b',\n  "delta_batch": ' + str(delta_batch).encode() + b',\n  "customers": [')
+
+
+def _iter_xml_records(filename):
+    """Потоково перечисляет записи покупателей из XML (в том числе .gz)"""
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as f:
+        customers_elem = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == 'customers':
+                    customers_elem = elem
+                continue
+            if elem.tag == 'customer':
+                balance = elem.findtext('balance')
+                yield {
+                    'name': elem.findtext('name'),
+                    'email': elem.findtext('email'),
+                    'balance': float(balance) if '.' in balance else int(balance),
+                    'purchased': [int(b.text) for b in elem.iterfind('purchased_books/book_id')]
+                }
+                customers_elem.clear()
+
+
+class CatalogSearchIndex:
+    """
+    Инвертированный индекс каталога по названию и автору
+    
+    Токены приводятся к нижнему регистру через casefold (в том числе
+    кириллица) с заменой ё на е. Поддерживаются точное совпадение слова,
+    совпадение по префиксу (отсортированный список токенов + bisect)
+    и нечёткое совпадение по триграммам. Индекс обновляется при
+    добавлении и удалении каждой книги.
+    """
+    
+    TITLE_WEIGHT = 2
+    AUTHOR_WEIGHT = 1
+    EXACT_SCORE = 3
+    PREFIX_SCORE = 2
+    MIN_SIMILARITY = 0.4
+    
+    _TOKEN = re.compile(r'\w+')
+    
     def __init__(self):
+        self._postings = {}      # токен -> {book_id: вес поля}
+        self._tokens = []        # отсортированные токены для поиска по префиксу
+        self._trigrams = {}      # триграмма -> множество токенов
+        self._books = {}
+    
+    @classmethod
+    def tokenize(cls, text):
+        return cls._TOKEN.findall(text.casefold().replace('ё', 'е'))
+    
+    @staticmethod
+    def _token_trigrams(token):
+        padded = f"${token}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def _weights(self, book):
+        weights = {}
+        for token in self.tokenize(book.title):
+            weights[token] = weights.get(token, 0) | self.TITLE_WEIGHT
+        for token in self.tokenize(book.author):
+            weights[token] = weights.get(token, 0) | self.AUTHOR_WEIGHT
+        return weights
+    
+    def add(self, book):
+        """Добавляет книгу в индекс"""
+        self._books[book.book_id] = book
+        for token, weight in self._weights(book).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+                for trigram in self._token_trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[book.book_id] = weight
+    
+    def remove(self, book):
+        """Удаляет книгу из индекса"""
+        self._books.pop(book.book_id, None)
+        for token in self._weights(book):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(book.book_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+                for trigram in self._token_trigrams(token):
+                    tokens = self._trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+    
+    def _matches(self, query_token):
+        """Возвращает пары (токен индекса, оценка совпадения) для слова запроса"""
+        matches = []
+        if query_token in self._postings:
+            matches.append((query_token, self.EXACT_SCORE))
+        tokens = self._tokens
+        i = bisect.bisect_right(tokens, query_token)
+        while i < len(tokens) and tokens[i].startswith(query_token):
+            matches.append((tokens[i], self.PREFIX_SCORE))
+            i += 1
+        if matches:
+            return matches
+        
+        # Нечёткий поиск: сходство по Жаккару между множествами триграмм
+        query_trigrams = self._token_trigrams(query_token)
+        shared = {}
+        for trigram in query_trigrams:
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, count in shared.items():
+            # у слова длины n с двумя граничными символами ровно n триграмм
+            similarity = count / (len(query_trigrams) + len(token) - count)
+            if similarity >= self.MIN_SIMILARITY:
+                matches.append((token, similarity))
+        return matches
+    
+    def search(self, query, limit=20):
+        """
+        Возвращает книги, отсортированные по убыванию релевантности
+        
+        Слова запроса обрабатываются от самого редкого к самому частому:
+        полностью перебираются только книги редкого слова, а остальные
+        слова лишь проверяются у этих кандидатов. Слово, которое не
+        встречается ни у одного кандидата, не отсекает результаты.
+        """
+        postings = self._postings
+        token_matches = [m for m in map(self._matches, self.tokenize(query)) if m]
+        if not token_matches:
+            return []
+        token_matches.sort(key=lambda matches: sum(len(postings[token]) for token, _ in matches))
+        
+        scores = {}
+        for token, score in token_matches[0]:
+            for book_id, weight in postings[token].items():
+                if score * weight > scores.get(book_id, 0):
+                    scores[book_id] = score * weight
+        for matches in token_matches[1:]:
+            narrowed = {}
+            for book_id, total in scores.items():
+                value = max(score * postings[token].get(book_id, 0) for token, score in matches)
+                if value:
+                    narrowed[book_id] = total + value
+            if narrowed:
+                scores = narrowed
+        
+        ranked = heapq.nsmallest(limit, scores, key=lambda book_id: (-scores[book_id], self._books[book_id].title))
+        return [self._books[book_id] for book_id in ranked]
+
+
+class MmapCatalog:
+    """
+    Каталог книг в скомпилированном двоичном файле, отображённом в память
+    
+    Формат (little-endian):
+        заголовок  - магия b'BKCT', версия (H), резерв (H), число книг (I),
+                     смещение кучи строк (Q)
+        записи     - по одной на книгу, отсортированы по book_id:
+                     book_id (I), цена в копейках (q),
+                     смещение и длина названия (I, I), автора (I, I)
+        куча строк - названия и авторы в UTF-8
+    
+    Файл открывается только на чтение через mmap, поэтому несколько
+    процессов делят одни страницы через page cache, а при запуске ничего
+    не разбирается. Поиск книги по ID - двоичный поиск по записям.
+    Объект ведёт себя как словарь book_id -> Book для get/in/[],
+    а итерация перебирает сами книги в порядке ID.
+    """
+    
+    MAGIC = b'BKCT'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHIQ')
+    RECORD = struct.Struct('<IqIIII')
+    
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, self._heap = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise BookStoreException(f"Неизвестный формат каталога: {filename}")
+        # Книги, которые уже запрашивали: у одной книги всегда один объект
+        self._cache = {}
+    
+    @classmethod
+    def compile(cls, books, filename):
+        """Записывает книги в двоичный каталог"""
+        books = sorted(books, key=lambda b: b.book_id)
+        heap = bytearray()
+        records = bytearray()
+        for book in books:
+            title = book.title.encode('utf-8')
+            author = book.author.encode('utf-8')
+            records += cls.RECORD.pack(book.book_id, _to_kopecks(book.price),
+                                       len(heap), len(title), len(heap) + len(title), len(author))
+            heap += title + author
+        heap_offset = cls.HEADER.size + len(records)
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, len(books), heap_offset))
+            f.write(records)
+            f.write(heap)
+        os.replace(tmp_filename, filename)
+    
+    def _book_at(self, index):
+        book_id, price, title_off, title_len, author_off, author_len = self.RECORD.unpack_from(
+            self._map, self.HEADER.size + index * self.RECORD.size)
+        book = self._cache.get(book_id)
+        if book is None:
+            heap = self._heap
+            title = self._map[heap + title_off:heap + title_off + title_len].decode('utf-8')
+            author = self._map[heap + author_off:heap + author_off + author_len].decode('utf-8')
+            book = self._cache[book_id] = Book(title, author, _from_kopecks(price), book_id)
+        return book
+    
+    def _index_of(self, book_id):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            current = struct.unpack_from('<I', self._map, self.HEADER.size + middle * self.RECORD.size)[0]
+            if current < book_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and struct.unpack_from(
+                '<I', self._map, self.HEADER.size + low * self.RECORD.size)[0] == book_id:
+            return low
+        return -1
+    
+    def get(self, book_id, default=None):
+        if book_id in self._cache:
+            return self._cache[book_id]
+        if not isinstance(book_id, int) or book_id < 0:
+            return default
+        index = self._index_of(book_id)
+        return default if index < 0 else self._book_at(index)
+    
+    def __getitem__(self, book_id):
+        book = self.get(book_id)
+        if book is None:
+            raise KeyError(book_id)
+        return book
+    
+    def __contains__(self, book_id):
+        return self.get(book_id) is not None
+    
+    def __len__(self):
+        return self._count
+    
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._book_at(index)
+    
+    def __setitem__(self, book_id, book):
+        raise BookStoreException("Каталог доступен только для чтения")
+    
+    def close(self):
+        self._map.close()
+
+
+class BinarySnapshot:
+    """
+    Двоичный снимок магазина: покупатели, каталог и служебные номера
+    
+    Формат (little-endian):
+        заголовок  - магия b'BKSN', версия (H), флаги (H), journal_seq (Q),
+                     delta_batch (Q), число имён (I), число покупателей (I),
+                     смещения таблицы имён, каталога и индекса email (Q, Q, Q;
+                     смещение индекса 0 - индекса нет)
+        покупатели - записи с длиной в начале: длина записи (I), номер
+                     имени (I), баланс в копейках (q), длина email (H),
+                     число покупок (I), email в UTF-8, ID книг (I каждый)
+        имена      - длина (H) и UTF-8 каждого различного имени
+        каталог    - флаг внешнего каталога (B); путь (длина H + UTF-8)
+                     или число книг (I) и книги: ID (I), цена в копейках (q),
+                     название и автор (длина H + UTF-8)
+        индекс     - смещения записей (Q), отсортированные по email
+    
+    Имена покупателей повторяются, поэтому хранятся один раз в таблице
+    имён. Таблицы и индекс пишутся после записей, так что снимок
+    записывается потоково. Индекс позволяет найти покупателя по email
+    двоичным поиском, не читая остальные записи.
+    """
+    
+    MAGIC = b'BKSN'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHQQIIQQQ')
+    RECORD = struct.Struct('<IIqHI')
+    BOOK = struct.Struct('<Iq')
+    LENGTH = struct.Struct('<H')
+    FLAG_INDEX = 1
+    
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.flags, self.journal_seq, self.delta_batch, names, self._count,
+         names_offset, catalog_offset, self._index) = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._map.close()
+            raise BookStoreException(f"Неизвестный формат снимка: {filename}")
+        
+        self.names = []
+        pos = names_offset
+        for _ in range(names):
+            pos, name = self._read_string(pos)
+            self.names.append(sys.intern(name))
+        
+        self.catalog_file = None
         self.books = []
-        self.customers = []
+        pos = catalog_offset
+        if self._map[pos]:
+            _, self.catalog_file = self._read_string(pos + 1)
+        else:
+            (count,) = struct.unpack_from('<I', self._map, pos + 1)
+            pos += 5
+            for _ in range(count):
+                book_id, price = self.BOOK.unpack_from(self._map, pos)
+                pos, title = self._read_string(pos + self.BOOK.size)
+                pos, author = self._read_string(pos)
+                self.books.append(Book(title, author, _from_kopecks(price), book_id))
+    
+    def _read_string(self, pos):
+        (length,) = self.LENGTH.unpack_from(self._map, pos)
+        pos += self.LENGTH.size
+        return pos + length, self._map[pos:pos + length].decode('utf-8')
+    
+    @classmethod
+    def _string(cls, text):
+        data = text.encode('utf-8')
+        return cls.LENGTH.pack(len(data)) + data
+    
+    @classmethod
+    def write(cls, filename, records, meta, email_index=True):
+        """
+        Записывает снимок из записей покупателей в формате save_to_json
+        
+        meta - словарь с ключами снимка JSON: "books" (список словарей)
+        или "catalog" (путь), "journal_seq", "delta_batch". Он читается
+        после записей, поэтому может заполняться по ходу их перебора.
+        """
+        names = {}
+        index = [] if email_index else None
+        count = 0
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(bytes(cls.HEADER.size))
+            offset = cls.HEADER.size
+            for record in records:
+                name_index = names.setdefault(record['name'], len(names))
+                email = record['email'].encode('utf-8')
+                purchased = array('I', record['purchased'])
+                length = cls.RECORD.size + len(email) + purchased.itemsize * len(purchased)
+                f.write(cls.RECORD.pack(length, name_index, _to_kopecks(record['balance']),
+                                        len(email), len(purchased)))
+                f.write(email)
+                f.write(purchased.tobytes())
+                if index is not None:
+                    index.append((email, offset))
+                offset += length
+                count += 1
+            
+            names_offset = offset
+            f.write(b''.join(cls._string(name) for name in names))
+            catalog_offset = f.tell()
+            if meta.get('catalog'):
+                f.write(b'\x01' + cls._string(meta['catalog']))
+            else:
+                books = meta.get('books') or []
+                f.write(b'\x00' + struct.pack('<I', len(books)))
+                for book in books:
+                    f.write(cls.BOOK.pack(book['id'], _to_kopecks(book['price']))
+                            + cls._string(book['title']) + cls._string(book['author']))
+            index_offset = 0
+            if index is not None:
+                index_offset = f.tell()
+                index.sort()
+                f.write(array('Q', [record_offset for _, record_offset in index]).tobytes())
+            
+            f.seek(0)
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.FLAG_INDEX if index is not None else 0,
+                                    meta.get('journal_seq', 0), meta.get('delta_batch', 0), len(names),
+                                    count, names_offset, catalog_offset, index_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+    
+    def __len__(self):
+        return self._count
+    
+    def _row_at(self, pos):
+        length, name_index, balance, email_length, count = self.RECORD.unpack_from(self._map, pos)
+        start = pos + self.RECORD.size
+        email = self._map[start:start + email_length].decode('utf-8')
+        purchased = array('I')
+        purchased.frombytes(self._map[start + email_length:pos + length])
+        return length, (self.names[name_index], email, balance, purchased)
+    
+    def rows(self):
+        """Покупатели как кортежи (имя, email, баланс в копейках, array('I') покупок)"""
+        pos = self.HEADER.size
+        for _ in range(self._count):
+            length, row = self._row_at(pos)
+            yield row
+            pos += length
+    
+    @staticmethod
+    def _record(row):
+        name, email, balance, purchased = row
+        return {"name": name, "email": email, "balance": _from_kopecks(balance), "purchased": purchased.tolist()}
+    
+    def records(self):
+        """Покупатели как словари в формате save_to_json"""
+        return map(self._record, self.rows())
+    
+    def get(self, email):
+        """Запись покупателя по email через встроенный индекс (или None)"""
+        if not self._index:
+            raise BookStoreException("В снимке нет индекса email")
+        key = email.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            (pos,) = struct.unpack_from('<Q', self._map, self._index + middle * 8)
+            _, email_length = struct.unpack_from('<qH', self._map, pos + 8)
+            start = pos + self.RECORD.size
+            current = self._map[start:start + email_length]
+            if current == key:
+                return self._record(self._row_at(pos)[1])
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+    
+    def close(self):
+        self._map.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SalesStats:
+    """
+    Нарастающие итоги продаж
+    
+    Выручка по книгам и авторам хранится в копейках и обновляется при каждой
+    покупке. Книги держатся в списке _order по убыванию числа продаж:
+    при продаже ещё одного экземпляра книга меняется местами с первой
+    книгой своей группы (с тем же числом продаж) и переходит в соседнюю
+    группу, поэтому обновление стоит O(1), а top_sellers(k) - O(k).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._book_revenue = {}    # book_id -> копейки
+        self._author_revenue = {}  # автор -> копейки
+        self._total = 0
+        self._sold = {}            # book_id -> продано экземпляров
+        self._order = []           # book_id по убыванию _sold
+        self._pos = {}             # book_id -> индекс в _order
+        self._start = {}           # число продаж -> индекс начала группы в _order
+    
+    def add(self, book):
+        """Учитывает продажу одного экземпляра книги"""
+        kopecks = _to_kopecks(book.price)
+        book_id = book.book_id
+        with self._lock:
+            self._total += kopecks
+            self._book_revenue[book_id] = self._book_revenue.get(book_id, 0) + kopecks
+            self._author_revenue[book.author] = self._author_revenue.get(book.author, 0) + kopecks
+            
+            order, pos, start = self._order, self._pos, self._start
+            count = self._sold.get(book_id, 0)
+            if count == 0:
+                pos[book_id] = len(order)
+                order.append(book_id)
+                start.setdefault(0, pos[book_id])
+            # Перестановка в начало своей группы и переход в группу count + 1
+            i, j = pos[book_id], start[count]
+            order[i], order[j] = order[j], order[i]
+            pos[order[i]], pos[book_id] = i, j
+            self._sold[book_id] = count + 1
+            if j + 1 < len(order) and self._sold.get(order[j + 1], 0) == count:
+                start[count] = j + 1
+            else:
+                del start[count]
+            start.setdefault(count + 1, j)
+    
+    def add_counts(self, counts, catalog):
+        """
+        Учитывает сразу много продаж (counts: book_id -> экземпляров),
+        например после загрузки снимка; порядок по продажам
+        перестраивается один раз сортировкой
+        """
+        with self._lock:
+            for book_id, quantity in counts.items():
+                book = catalog.get(book_id)
+                if book is None:
+                    continue
+                kopecks = _to_kopecks(book.price) * quantity
+                self._total += kopecks
+                self._book_revenue[book_id] = self._book_revenue.get(book_id, 0) + kopecks
+                self._author_revenue[book.author] = self._author_revenue.get(book.author, 0) + kopecks
+                self._sold[book_id] = self._sold.get(book_id, 0) + quantity
+            self._order = sorted(self._sold, key=self._sold.__getitem__, reverse=True)
+            self._pos = {book_id: i for i, book_id in enumerate(self._order)}
+            self._start = {}
+            for i, book_id in enumerate(self._order):
+                self._start.setdefault(self._sold[book_id], i)
+    
+    def add_purchases(self, book_ids, catalog):
+        """Учитывает покупки одного покупателя (ID, которых нет в каталоге, пропускаются)"""
+        for book_id in book_ids:
+            book = catalog.get(book_id)
+            if book is not None:
+                self.add(book)
+    
+    def book_revenue(self, book_id):
+        return _from_kopecks(self._book_revenue.get(book_id, 0))
+    
+    def author_revenue(self, author):
+        return _from_kopecks(self._author_revenue.get(author, 0))
+    
+    def total_revenue(self):
+        return _from_kopecks(self._total)
+    
+    def sold(self, book_id):
+        return self._sold.get(book_id, 0)
+    
+    def top_sellers(self, k=10):
+        """k самых продаваемых книг: список (book_id, продано экземпляров)"""
+        with self._lock:
+            return [(book_id, self._sold[book_id]) for book_id in self._order[:k]]
+
+
+class StoreSnapshot:
+    """
+    Согласованный срез магазина на момент создания
+    
+    Каталог - кортеж книг той версии, что была опубликована к моменту
+    среза. Покупатели не копируются: пока срез открыт, операция перед
+    первым изменением покупателя сохраняет его прежнюю запись в preimages
+    (копирование при записи), и records() отдаёт для него именно её.
+    """
+    __slots__ = ('books', 'catalog_version', 'journal_seq', 'delta_batch', 'preimages', '_records')
+    
+    def __init__(self, books, catalog_version, journal_seq, delta_batch, records):
+        self.books = books
+        self.catalog_version = catalog_version
+        self.journal_seq = journal_seq
+        self.delta_batch = delta_batch
+        self.preimages = {}
+        self._records = records
+    
+    def preserve(self, customer):
+        """Запоминает запись покупателя до его первого изменения после среза"""
+        if customer.email not in self.preimages:
+            self.preimages[customer.email] = customer.to_dict()
+    
+    def records(self):
+        """Записи покупателей в состоянии на момент среза"""
+        return self._records(self)
+
+
+class BookStore:
+    # Число блокировок, между которыми распределяются покупатели
+    LOCK_STRIPES = 64
+    # Ключи сортировки list_books
+    SORT_KEYS = {
+        "price": lambda book: (book.price, book.book_id),
+        "title": lambda book: (book.title.casefold(), book.book_id),
+        "author": lambda book: (book.author.casefold(), book.title.casefold(), book.book_id),
+    }
+    
+    def __init__(self, columnar=False, catalog_file=None):
+        # Каталог публикуется целиком: при изменении books заменяется новым
+        # кортежем, а читатели дочитывают ту версию, которую взяли
+        self.books = ()
+        self.catalog_version = 0
+        self._catalog_lock = threading.Lock()
+        # Отсортированные индексы каталога: sort -> (версия каталога, кортеж книг)
+        self._sorted_indexes = {}
         self.current_customer = None
-        self._init_books()
+        # Индексы для поиска за O(1): book_id -> Book и email -> Customer
+        self._books_by_id = {}
+        # Поисковый индекс строится при первом поиске
+        self._search_index = None
+        # Внешний каталог: JSON или скомпилированный двоичный файл
+        self.catalog_file = catalog_file
+        if catalog_file:
+            self.load_catalog(catalog_file)
+        else:
+            self._init_books()
+        # columnar=True: покупатели хранятся в CustomerTable
+        self._columnar = columnar
+        # Ленивая загрузка: self._lazy_customers хранит email -> (смещение, длина)
+        # записи в файле self._lazy_source
+        self._lazy_source = None
+        self._reset_customers()
+        # Журнал операций и номер последней применённой записи
+        self.journal = None
+        self._journal_seq = 0
+        self._snapshot_file = None
+        self.compact_every = 1000
+        self._compaction_due = False
+        # Инкрементальные сохранения: изменённые покупатели и номер пакета в .delta
+        self._dirty = set()
+        self._delta_batch = 0
+        self.delta_limit = 0.5
+        # Блокировки: по email (полосы), на индекс покупателей и на журнал.
+        # Порядок захвата: полоса -> индекс -> журнал
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._registry_lock = threading.RLock()
+        self._journal_lock = threading.Lock()
+        # Открытые срезы read_snapshot (кортеж заменяется целиком)
+        self._snapshots = ()
     
     def _init_books(self):
         """Инициализация магазина книгами"""
-        self.books = [
+        self.add_books([
             Book("Война и мир", "Л.Толстой", 599, 1),
             Book("Мастер и Маргарита", "М.Булгаков", 450, 2),
             Book("Преступление и наказание", "Ф.Достоевский", 399, 3),
             Book("1984", "Дж.Оруэлл", 350, 4),
             Book("Гарри Поттер", "Дж.Роулинг", 500, 5)
-        ]
+        ])
     
-    def register_customer(self, name, email):
-        for customer in self.customers:
-            if customer.email == email:
-                raise BookStoreException("Пользователь с таким email уже существует")
+    def load_catalog(self, filename):
+        """
+        Загружает каталог из внешнего файла
         
-        customer = Customer(name, email)
+        Файл .bin (см. compile_catalog) отображается в память и не
+        разбирается; иначе читается JSON - список книг или объект с ключом
+        "books" в формате save_to_json.
+        """
+        if filename.endswith('.bin'):
+            self.books = self._books_by_id = MmapCatalog(filename)
+            self._search_index = None
+            return
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data['books']
+        self.add_books([Book(b['title'], b['author'], b['price'], b['id']) for b in data])
+    
+    def compile_catalog(self, filename):
+        """Сохраняет текущий каталог в двоичном формате MmapCatalog"""
+        MmapCatalog.compile(self.books, filename)
+    
+    def _check_catalog_writable(self):
+        if isinstance(self._books_by_id, MmapCatalog):
+            raise BookStoreException("Каталог доступен только для чтения")
+    
+    def add_book(self, book):
+        """Добавляет книгу в каталог и в индекс по ID"""
+        self.add_books([book])
+    
+    def add_books(self, books):
+        """
+        Добавляет книги в каталог и публикует новую версию каталога
+        одной заменой кортежа books (либо все книги, либо ни одной)
+        """
+        self._check_catalog_writable()
+        with self._catalog_lock:
+            ids = set()
+            for book in books:
+                if book.book_id in self._books_by_id or book.book_id in ids:
+                    raise BookStoreException(f"Книга с ID {book.book_id} уже есть в каталоге")
+                ids.add(book.book_id)
+            for book in books:
+                self._books_by_id[book.book_id] = book
+                if self._search_index is not None:
+                    self._search_index.add(book)
+            self.books = self.books + tuple(books)
+            self.catalog_version += 1
+    
+    def remove_book(self, book_id):
+        """Удаляет книгу из каталога и из индекса"""
+        self._check_catalog_writable()
+        with self._catalog_lock:
+            book = self._books_by_id.pop(book_id, None)
+            if book is None:
+                raise BookStoreException("Книга не найдена")
+            self.books = tuple(b for b in self.books if b is not book)
+            self.catalog_version += 1
+            if self._search_index is not None:
+                self._search_index.remove(book)
+        return book
+    
+    def get_book(self, book_id):
+        """Возвращает книгу по ID или None"""
+        return self._books_by_id.get(book_id)
+    
+    def search(self, query, limit=20):
+        """Поиск книг по названию и автору (слова, префиксы, опечатки)"""
+        # Индекс меняется на месте, поэтому поиск ждёт только изменений каталога
+        with self._catalog_lock:
+            if self._search_index is None:
+                self._search_index = CatalogSearchIndex()
+                for book in self.books:
+                    self._search_index.add(book)
+            return self._search_index.search(query, limit)
+    
+    def top_sellers(self, k=10):
+        """k самых продаваемых книг: список (Book, продано экземпляров)"""
+        return [(self.get_book(book_id), sold) for book_id, sold in self.stats.top_sellers(k)]
+    
+    def average_spend(self):
+        """Средняя сумма покупок на одного покупателя"""
+        count = self.customer_count()
+        if not count:
+            return 0
+        return _from_kopecks(round(_to_kopecks(self.stats.total_revenue()) / count))
+    
+    def get_customer(self, email):
+        """Возвращает покупателя по email или None"""
+        customer = self._customers_by_email.get(email)
+        if customer is None and email in self._lazy_customers:
+            with self._registry_lock:
+                customer = self._customers_by_email.get(email)
+                if customer is None and email in self._lazy_customers:
+                    customer = self._materialize(email)
+        return customer
+    
+    def customer_count(self):
+        return len(self._customers_by_email) + len(self._lazy_customers)
+    
+    def _reset_customers(self):
+        if self._columnar:
+            self.customers = self._customers_by_email = CustomerTable(self._books_by_id)
+        else:
+            self.customers = []
+            self._customers_by_email = {}
+        self._lazy_customers = {}
+        self.stats = SalesStats()
+        # Покупки загружаемых записей: book_id -> экземпляров (см. _flush_sales)
+        self._pending_sales = Counter()
+    
+    def _add_customer(self, customer):
+        """Добавляет покупателя и возвращает сохранённый объект"""
+        if self._columnar:
+            return self._customers_by_email.append(customer)
         self.customers.append(customer)
+        self._customers_by_email[customer.email] = customer
+        return customer
+    
+    def _customer_from_record(self, record):
+        customer = Customer(record['name'], record['email'], self._books_by_id)
+        customer.balance = record['balance']
+        customer.purchased_ids.extend(
+            book_id for book_id in record['purchased'] if book_id in self._books_by_id
+        )
+        return customer
+    
+    def _load_record(self, record, position=None):
+        """
+        Добавляет покупателя из снимка (при position - только запоминает
+        положение ленивой записи) и считает его покупки для статистики;
+        в статистику они попадают одним пакетом в _flush_sales
+        """
+        self._pending_sales.update(record['purchased'])
+        if position is None:
+            self._add_customer(self._customer_from_record(record))
+        else:
+            self._lazy_customers[record['email']] = position
+    
+    def _flush_sales(self):
+        if self._pending_sales:
+            self.stats.add_counts(self._pending_sales, self._books_by_id)
+            self._pending_sales = Counter()
+    
+    def _materialize(self, email):
+        """Создаёт Customer для записи, загруженной лениво"""
+        offset, length = self._lazy_customers.pop(email)
+        with open(self._lazy_source, 'rb') as f:
+            f.seek(offset)
+            customer = self._customer_from_record(json.loads(f.read(length)))
+        return self._add_customer(customer)
+    
+    def _iter_customer_records(self, include_lazy=True):
+        """Перечисляет записи всех покупателей, не создавая объекты для ленивых"""
+        for customer in self.customers:
+            yield customer.to_dict()
+        if include_lazy and self._lazy_customers:
+            with open(self._lazy_source, 'rb') as f:
+                for offset, length in list(self._lazy_customers.values()):
+                    f.seek(offset)
+                    yield json.loads(f.read(length))
+    
+    def _customer_lock(self, email):
+        return self._locks[hash(email) % len(self._locks)]
+    
+    @contextmanager
+    def _all_customers_locked(self):
+        """Останавливает все операции с покупателями (для снимка)"""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+    
+    def _preserve(self, customer):
+        # Вызывается под блокировкой покупателя перед его изменением
+        for snapshot in self._snapshots:
+            snapshot.preserve(customer)
+    
+    @contextmanager
+    def read_snapshot(self):
+        """
+        Открывает согласованный срез магазина (StoreSnapshot)
+        
+        Операции останавливаются только на время создания среза; пока
+        срез читают, покупки и пополнения продолжаются, а records()
+        возвращает состояние на момент создания.
+        """
+        source = None
+        with self._all_customers_locked(), self._registry_lock:
+            with self._catalog_lock:
+                books, version = self.books, self.catalog_version
+            count = len(self.customers)
+            lazy = list(self._lazy_customers.items())
+            if lazy:
+                # Держим открытым тот файл, на который указывают смещения
+                source = open(self._lazy_source, 'rb')
+            snapshot = StoreSnapshot(
+                books, version, self._journal_seq, self._delta_batch,
+                lambda snapshot: self._iter_snapshot_records(snapshot, count, lazy, source)
+            )
+            self._snapshots += (snapshot,)
+        try:
+            yield snapshot
+        finally:
+            with self._registry_lock:
+                self._snapshots = tuple(s for s in self._snapshots if s is not snapshot)
+            if source is not None:
+                source.close()
+    
+    def _iter_snapshot_records(self, snapshot, count, lazy, source):
+        preimages = snapshot.preimages
+        for customer in islice(self.customers, count):
+            # Запись читается до проверки preimages: если покупателя начали
+            # менять во время чтения, его прежняя запись уже сохранена
+            record = customer.to_dict()
+            yield preimages.get(customer.email, record)
+        for email, (offset, length) in lazy:
+            if email in preimages:
+                yield preimages[email]
+            else:
+                source.seek(offset)
+                record = json.loads(source.read(length))
+                yield preimages.get(email, record)
+    
+    def register_customer(self, name, email):
+        with self._customer_lock(email), self._registry_lock:
+            if self.get_customer(email) is not None:
+                raise BookStoreException("Пользователь с таким email уже существует")
+            
+            customer = self._add_customer(Customer(name, email, self._books_by_id))
+            self._dirty.add(email)
+            self._log({"op": "register", "name": name, "email": email})
         self.current_customer = customer
+        self._maybe_compact()
         return customer
     
+    def import_customers(self, records):
+        """
+        Массовое добавление проверенных записей покупателей с разными email
+        
+        Записи не пишутся в журнал по одной: пока идёт импорт, остальные
+        операции ждут, а если известен файл снимка (load_from_json,
+        load_from_binary, open_journal), он затем переписывается целиком.
+        Возвращает число добавленных покупателей.
+        """
+        count = 0
+        with self._all_customers_locked(), self._registry_lock:
+            for record in records:
+                self._load_record(record)
+                count += 1
+            self._flush_sales()
+            if count and self._snapshot_file is not None:
+                self._compact_locked()
+        return count
+    
     def login_customer(self, email):
-        for customer in self.customers:
-            if customer.email == email:
-                self.current_customer = customer
-                return customer
-        raise BookStoreException("Пользователь не найден")
-    
-    def show_books(self):
-        print("\n" + "="*60)
-        print("КАТАЛОГ КНИГ:")
-        print("="*60)
-        for book in self.books:
-            print(book)
-        print("="*60)
-    
-    def show_my_books(self):
+        customer = self.get_customer(email)
+        if customer is None:
+            raise BookStoreException("Пользователь не найден")
+        self.current_customer = customer
+        return customer
+    
+    def purchase(self, customer, book):
+        """Покупка книги с записью операции в журнал"""
+        with self._customer_lock(customer.email):
+            self._preserve(customer)
+            customer.buy_book(book)
+            self.stats.add(book)
+            self._dirty.add(customer.email)
+            self._log({"op": "buy", "email": customer.email, "book_id": book.book_id})
+        self._maybe_compact()
+    
+    def top_up(self, customer, amount):
+        """Пополнение баланса с записью операции в журнал"""
+        _check_amount(amount)
+        with self._customer_lock(customer.email):
+            self._preserve(customer)
+            customer.add_balance(amount)
+            self._dirty.add(customer.email)
+            self._log({"op": "topup", "email": customer.email, "amount": amount})
+        self._maybe_compact()
+    
+    def buy_many(self, email, book_ids):
+        """
+        Покупает несколько книг одной операцией
+        
+        Не использует current_customer, поэтому безопасен для вызова из
+        нескольких потоков: баланс покупателя проверяется и списывается
+        под его блокировкой, так что он никогда не становится отрицательным.
+        Возвращает купленные книги.
+        """
+        books = []
+        for book_id in book_ids:
+            book = self.get_book(book_id)
+            if book is None:
+                raise BookStoreException(f"Книга с ID {book_id} не найдена")
+            books.append(book)
+        customer = self.get_customer(email)
+        if customer is None:
+            raise BookStoreException("Пользователь не найден")
+        
+        with self._customer_lock(email):
+            self._preserve(customer)
+            customer.buy_books(books)
+            for book in books:
+                self.stats.add(book)
+            self._dirty.add(email)
+            self._log({"op": "buy_many", "email": email, "book_ids": [b.book_id for b in books]})
+        self._maybe_compact()
+        return books
+    
+    def open_journal(self, filename="lab1/bookstore_data.json", sync_every=16, compact_every=1000):
+        """
+        Включает журнал операций рядом со снимком filename
+        
+        Вместо перезаписи всего JSON после каждого действия операции
+        дописываются в filename + '.journal'. Когда в журнале накопится
+        compact_every записей, он сворачивается в новый снимок.
+        """
+        self.journal = PurchaseJournal(filename + '.journal', sync_every)
+        self._snapshot_file = filename
+        self.compact_every = compact_every
+    
+    def close_journal(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+    
+    def close(self):
+        """Сохраняет изменения перед завершением работы"""
+        with self._all_customers_locked():
+            self._checkpoint_locked()
+        self.close_journal()
+    
+    def compact(self):
+        """
+        Полная компактация: переписывает снимок целиком,
+        удаляет файл изменений .delta и очищает журнал
+        """
+        with self._all_customers_locked():
+            self._compact_locked()
+    
+    def save_changes(self):
+        """
+        Инкрементальное сохранение: дописывает в <снимок>.delta только
+        покупателей, изменившихся с прошлого сохранения, и очищает журнал.
+        Время сохранения зависит от числа изменений, а не от размера магазина.
+        Возвращает число сохранённых покупателей; None, если записан полный
+        JSON (без журнала) или произошла ошибка - об этом сообщается сразу.
+        """
+        with self._all_customers_locked():
+            return self._save_changes_locked()
+    
+    def _compact_locked(self):
+        self._compaction_due = False
+        if self._snapshot_file is None:
+            return self._save_json_locked()
+        if self.journal:
+            self.journal.sync()
+        try:
+            if self._snapshot_file.endswith('.bin'):
+                self._write_binary(self._snapshot_file)
+            else:
+                self._write_json(self._snapshot_file)
+            if os.path.exists(self._snapshot_file + '.delta'):
+                os.remove(self._snapshot_file + '.delta')
+        except IOError as e:
+            print(f"Ошибка записи в файл: {e}")
+            return
+        self._dirty.clear()
+        if self.journal:
+            self.journal.reset()
+    
+    def _save_changes_locked(self):
+        self._compaction_due = False
+        if self._snapshot_file is None:
+            return self._save_json_locked()
+        saved = len(self._dirty)
+        if self._dirty:
+            delta_file = self._snapshot_file + '.delta'
+            batch = {
+                "batch": self._delta_batch + 1,
+                "journal_seq": self._journal_seq,
+                "customers": [self.get_customer(email).to_dict() for email in self._dirty]
+            }
+            try:
+                PurchaseJournal._recover(delta_file)
+                with open(delta_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(batch, ensure_ascii=False, separators=(',', ':')) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            except IOError as e:
+                print(f"Ошибка записи в файл: {e}")
+                return None
+            self._delta_batch += 1
+            self._dirty.clear()
+        if self.journal:
+            self.journal.sync()
+            self.journal.reset()
+        return saved
+    
+    def _checkpoint_locked(self):
+        """
+        Сворачивает журнал: обычно в файл изменений, а когда он
+        перерастает delta_limit от размера снимка - в новый снимок
+        """
+        snapshot = self._snapshot_file
+        if snapshot is None or not os.path.exists(snapshot):
+            return self._compact_locked()
+        delta_file = snapshot + '.delta'
+        delta_size = os.path.getsize(delta_file) if os.path.exists(delta_file) else 0
+        if delta_size > os.path.getsize(snapshot) * self.delta_limit:
+            return self._compact_locked()
+        self._save_changes_locked()
+    
+    def _maybe_compact(self):
+        # Вызывается после освобождения блокировки покупателя
+        if self._compaction_due:
+            with self._all_customers_locked():
+                if self._compaction_due:
+                    self._checkpoint_locked()
+    
+    def _log(self, record):
+        if not self.journal:
+            return
+        with self._journal_lock:
+            self._journal_seq += 1
+            self.journal.append({"seq": self._journal_seq, **record})
+            if self.journal.size >= self.compact_every:
+                self._compaction_due = True
+    
+    def _replay_journal(self, filename):
+        """
+        Применяет записи журнала, которых ещё нет в снимке
+        
+        Покупки книг, которых нет в текущем каталоге (например, внешний
+        каталог изменился между запусками), пропускаются - так же, как
+        неизвестные ID в снимке при _customer_from_record.
+        """
+        for record in PurchaseJournal.replay(filename):
+            if record["seq"] <= self._journal_seq:
+                continue
+            op = record["op"]
+            if op == "register":
+                self._add_customer(Customer(record["name"], record["email"], self._books_by_id))
+            else:
+                customer = self.get_customer(record["email"])
+                if op == "topup":
+                    customer.add_balance(record["amount"])
+                elif op == "buy":
+                    book = self.get_book(record["book_id"])
+                    if book is not None:
+                        customer.buy_book(book)
+                        self.stats.add_purchases([record["book_id"]], self._books_by_id)
+                elif op == "buy_many":
+                    books = [book for book in map(self.get_book, record["book_ids"]) if book is not None]
+                    customer.buy_books(books)
+                    self.stats.add_purchases(record["book_ids"], self._books_by_id)
+            self._dirty.add(record["email"])
+            self._journal_seq = record["seq"]
+    
+    def list_books(self, offset=0, limit=PAGE_SIZE, sort=None):
+        """
+        Страница каталога: limit книг начиная с offset
+        
+        sort - None (порядок каталога), "price", "title" или "author";
+        с минусом ("-price") - по убыванию. Отсортированные индексы
+        строятся один раз на версию каталога и затем только режутся.
+        """
+        if offset < 0 or limit < 0:
+            raise ValueError("offset и limit не могут быть отрицательными")
+        if sort is None:
+            books = self.books
+            if isinstance(books, tuple):
+                return list(books[offset:offset + limit])
+            return list(islice(books, offset, offset + limit))
+        
+        descending = sort.startswith('-')
+        index = self._sorted_books(sort.lstrip('-'))
+        if not descending:
+            return list(index[offset:offset + limit])
+        stop = len(index) - offset
+        if stop <= 0:
+            return []
+        return index[max(0, stop - limit):stop][::-1]
+    
+    def _sorted_books(self, sort):
+        """Отсортированный кортеж книг для текущей версии каталога"""
+        key = self.SORT_KEYS.get(sort)
+        if key is None:
+            raise ValueError(f"Неизвестная сортировка: {sort}")
+        with self._catalog_lock:
+            books, version = self.books, self.catalog_version
+        cached = self._sorted_indexes.get(sort)
+        if cached is None or cached[0] != version:
+            cached = self._sorted_indexes[sort] = (version, tuple(sorted(books, key=key)))
+        return cached[1]
+    
+    @staticmethod
+    def _render(title, lines, footer=None):
+        """Собирает блок в одну строку и выводит его одним вызовом write"""
+        rule = "=" * 60
+        parts = ["", rule, title, rule]
+        parts.extend(lines)
+        if footer:
+            parts.append(footer)
+        parts.append(rule)
+        sys.stdout.write("\n".join(parts) + "\n")
+        sys.stdout.flush()
+    
+    @staticmethod
+    def _page_footer(offset, shown, total):
+        if shown == total:
+            return None
+        return f"Показаны {offset + 1}-{offset + shown} из {total}" if shown else f"Всего: {total}"
+    
+    def show_books(self, offset=0, limit=PAGE_SIZE, sort=None):
+        books = self.list_books(offset, limit, sort)
+        self._render("КАТАЛОГ КНИГ:", map(str, books), self._page_footer(offset, len(books), len(self.books)))
+    
+    def show_search_results(self, query):
+        books = self.search(query)
+        self._render(f"РЕЗУЛЬТАТЫ ПОИСКА: {query}", [str(book) for book in books] or ["Ничего не найдено"])
+    
+    def show_sales_stats(self, k=5):
+        lines = [
+            f"Выручка: {self.stats.total_revenue()} руб.",
+            f"В среднем на покупателя: {self.average_spend()} руб."
+        ]
+        for book, sold in self.top_sellers(k):
+            if book is not None:
+                lines.append(f"{sold:5} шт. | {self.stats.book_revenue(book.book_id)} руб. | {book}")
+        self._render("СТАТИСТИКА ПРОДАЖ:", lines)
+    
+    def show_my_books(self, offset=0, limit=PAGE_SIZE):
         if not self.current_customer:
             print("Сначала войдите в систему")
             return
         
-        print("\n" + "="*60)
-        print(f"МОИ КНИГИ ({self.current_customer.name}):")
-        print("="*60)
-        if self.current_customer.purchased_books:
-            for book in self.current_customer.purchased_books:
-                print(book)
-        else:
-            print("У вас пока нет купленных книг")
-        print("="*60)
+        # Снимок библиотеки: новые покупки не сдвигают уже показанные страницы
+        library = self.current_customer.library()
+        books = library[offset:offset + limit]
+        self._render(
+            f"МОИ КНИГИ ({self.current_customer.name}):",
+            [str(book) for book in books] or ["У вас пока нет купленных книг"],
+            self._page_footer(offset, len(books), len(library))
+        )
+        return len(library)
     
     def save_to_json(self, filename="lab1/bookstore_data.json"):
-        """Сохраняет данные в JSON"""
+        """Сохраняет согласованный срез данных в JSON, не останавливая покупки"""
+        if self._lazy_customers and os.path.abspath(filename) == os.path.abspath(self._lazy_source):
+            # Файл, из которого дочитываются ленивые записи, переписывается
+            # под блокировками: смещения записей в нём меняются
+            with self._all_customers_locked():
+                return self._save_json_locked(filename)
         try:
-            data = {
-                "books": [
-                    {"title": b.title, "author": b.author, "price": b.price, "id": b.book_id}
-                    for b in self.books
-                ],
-                "customers": [
-                    {"name": c.name, "email": c.email, "balance": c.balance,
-                     "purchased": [b.book_id for b in c.purchased_books]}
-                    for c in self.customers
-                ]
-            }
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self.read_snapshot() as snapshot:
+                self._write_json(filename, snapshot)
             print(f"Данные успешно сохранены в {filename}")
         except IOError as e:
             print(f"Ошибка записи в файл: {e}")
     
-    def save_to_xml(self, filename="lab1/bookstore_data.xml"):
-        """Сохраняет данные в XML"""
+    def _save_json_locked(self, filename="lab1/bookstore_data.json"):
+        # save_to_json для вызова под блокировками всех покупателей
         try:
-            # Создаём корневой элемент
-            root = ET.Element('bookstore')
-            
-            # Секция с книгами
-            books_elem = ET.SubElement(root, 'books')
-            for book in self.books:
-                book_elem = ET.SubElement(books_elem, 'book', id=str(book.book_id))
-                
-                title_elem = ET.SubElement(book_elem, 'title')
-                title_elem.text = book.title
-                
-                author_elem = ET.SubElement(book_elem, 'author')
-                author_elem.text = book.author
-                
-                price_elem = ET.SubElement(book_elem, 'price')
-                price_elem.text = str(book.price)
-            
-            # Секция с покупателями
-            customers_elem = ET.SubElement(root, 'customers')
-            for customer in self.customers:
-                customer_elem = ET.SubElement(customers_elem, 'customer')
-                
-                name_elem = ET.SubElement(customer_elem, 'name')
-                name_elem.text = customer.name
+            self._write_json(filename)
+            print(f"Данные успешно сохранены в {filename}")
+        except IOError as e:
+            print(f"Ошибка записи в файл: {e}")
+    
+    def _write_json(self, filename, snapshot=None):
+        """
+        Атомарно записывает снимок: сначала во временный файл,
+        затем os.replace, чтобы сбой не оставил файл наполовину записанным
+        
+        Покупатели пишутся по одному на строку. Без snapshot вызывается
+        под блокировками всех покупателей, и записи, загруженные лениво,
+        копируются из исходного файла без разбора.
+        """
+        tmp_filename = filename + '.tmp'
+        lazy_customers = {}
+        if snapshot is None:
+            books, journal_seq, delta_batch = self.books, self._journal_seq, self._delta_batch
+            records = self._iter_customer_records(include_lazy=False)
+        else:
+            books, journal_seq, delta_batch = snapshot.books, snapshot.journal_seq, snapshot.delta_batch
+            records = snapshot.records()
+        with open(tmp_filename, 'wb') as f:
+            # Внешний каталог не меняется во время работы - пишем только ссылку
+            f.write(_json_head(self.catalog_file, [b.to_dict() for b in books], journal_seq, delta_batch))
+            separator = b'\n    '
+            for record in records:
+                f.write(separator + json.dumps(record, ensure_ascii=False).encode('utf-8'))
+                separator = b',\n    '
+            if snapshot is None and self._lazy_customers:
+                with open(self._lazy_source, 'rb') as source:
+                    for email, (offset, length) in self._lazy_customers.items():
+                        source.seek(offset)
+                        f.write(separator)
+                        lazy_customers[email] = (f.tell(), length)
+                        f.write(source.read(length))
+                        separator = b',\n    '
+            f.write(b'\n  ]\n}\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+        if snapshot is None and self._lazy_customers:
+            self._lazy_customers = lazy_customers
+            self._lazy_source = filename
+    
+    def save_to_binary(self, filename="lab1/bookstore_data.bin", email_index=True):
+        """Сохраняет согласованный срез данных в двоичный снимок (BinarySnapshot)"""
+        try:
+            with self.read_snapshot() as snapshot:
+                self._write_binary(filename, snapshot, email_index)
+            print(f"Данные успешно сохранены в {filename}")
+        except IOError as e:
+            print(f"Ошибка записи в файл: {e}")
+    
+    def _write_binary(self, filename, snapshot=None, email_index=True):
+        if snapshot is None:
+            books, journal_seq, delta_batch = self.books, self._journal_seq, self._delta_batch
+            records = self._iter_customer_records()
+        else:
+            books, journal_seq, delta_batch = snapshot.books, snapshot.journal_seq, snapshot.delta_batch
+            records = snapshot.records()
+        meta = {"journal_seq": journal_seq, "delta_batch": delta_batch}
+        if self.catalog_file:
+            meta["catalog"] = self.catalog_file
+        else:
+            meta["books"] = [b.to_dict() for b in books]
+        BinarySnapshot.write(filename, records, meta, email_index)
+    
+    def save_to_xml(self, filename="lab1/bookstore_data.xml", compress=None):
+        """
+        Сохраняет данные в XML
+        
+        Элементы <book> и <customer> сериализуются и пишутся по одному,
+        поэтому память не растёт с числом покупателей. При compress=True
+        (или имени файла с расширением .gz) файл сжимается gzip.
+        """
+        if compress is None:
+            compress = filename.endswith('.gz')
+        tmp_filename = filename + '.tmp'
+        try:
+            opener = gzip.open if compress else open
+            with self.read_snapshot() as snapshot, opener(tmp_filename, 'wb') as f:
+                f.write(b"<?xml version='1.0' encoding='utf-8'?>\n<bookstore>")
                 
-                email_elem = ET.SubElement(customer_elem, 'email')
-                email_elem.text = customer.email
+                # Секция с книгами
+                f.write(b'<books>')
+                for book in snapshot.books:
+                    book_elem = ET.Element('book', id=str(book.book_id))
+                    ET.SubElement(book_elem, 'title').text = book.title
+                    ET.SubElement(book_elem, 'author').text = book.author
+                    ET.SubElement(book_elem, 'price').text = str(book.price)
+                    f.write(ET.tostring(book_elem, encoding='utf-8', xml_declaration=False))
+                f.write(b'</books>')
                 
-                balance_elem = ET.SubElement(customer_elem, 'balance')
-                balance_elem.text = str(customer.balance)
+                # Секция с покупателями
+                f.write(b'<customers>')
+                for record in snapshot.records():
+                    customer_elem = ET.Element('customer')
+                    ET.SubElement(customer_elem, 'name').text = record['name']
+                    ET.SubElement(customer_elem, 'email').text = record['email']
+                    ET.SubElement(customer_elem, 'balance').text = str(record['balance'])
+                    
+                    # Купленные книги
+                    if record['purchased']:
+                        purchased_elem = ET.SubElement(customer_elem, 'purchased_books')
+                        for book_id in record['purchased']:
+                            ET.SubElement(purchased_elem, 'book_id').text = str(book_id)
+                    f.write(ET.tostring(customer_elem, encoding='utf-8', xml_declaration=False))
+                f.write(b'</customers>')
                 
-                # Купленные книги
-                if customer.purchased_books:
-                    purchased_elem = ET.SubElement(customer_elem, 'purchased_books')
-                    for book in customer.purchased_books:
-                        book_id_elem = ET.SubElement(purchased_elem, 'book_id')
-                        book_id_elem.text = str(book.book_id)
-            
-            # Создаём дерево и сохраняем
-            tree = ET.ElementTree(root)
-            tree.write(filename, encoding='utf-8', xml_declaration=True)
+                f.write(b'</bookstore>')
+            os.replace(tmp_filename, filename)
             
             print(f"Данные успешно сохранены в {filename}")
-            
+        
         except Exception as e:
             print(f"Ошибка при сохранении XML: {e}")
     
-    def load_from_json(self, filename="lab1/bookstore_data.json"):
-        """Загружает данные из JSON"""
+    def load_from_xml(self, filename="lab1/bookstore_data.xml"):
+        """
+        Загружает покупателей из XML, сохранённого save_to_xml
+        
+        Файл разбирается через iterparse: каждый <customer> обрабатывается
+        и сразу удаляется из дерева. Файлы .gz распаковываются на лету.
+        """
         try:
-            if not os.path.exists(filename):
-                return
-            
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            self._reset_customers()
+            for record in _iter_xml_records(filename):
+                self._load_record(record)
+            self._flush_sales()
+        except (FileNotFoundError, ET.ParseError, OSError):
+            pass
+    
+    def load_snapshot(self, filename):
+        """Загружает снимок по расширению: .bin - двоичный, иначе JSON"""
+        if filename.endswith('.bin'):
+            self.load_from_binary(filename)
+        else:
+            self.load_from_json(filename)
+    
+    @staticmethod
+    def _delta_overrides(batches, base_batch):
+        """Записи из пакетов .delta, ещё не вошедших в снимок (email -> запись)"""
+        merged = {}
+        for batch in batches:
+            if batch['batch'] > base_batch:
+                for record in batch['customers']:
+                    merged[record['email']] = record
+        return merged
+    
+    def _finish_load(self, filename, batches, overrides, journal_seq, delta_batch):
+        """Добавляет новых покупателей из .delta и применяет журнал"""
+        for record in overrides.values():
+            self._load_record(record)
+        self._flush_sales()
+        self._delta_batch = max([delta_batch] + [b['batch'] for b in batches])
+        self._journal_seq = max([journal_seq] + [b['journal_seq'] for b in batches])
+        self._dirty = set()
+        self._replay_journal(filename + '.journal')
+    
+    def load_from_json(self, filename="lab1/bookstore_data.json", lazy=False):
+        """
+        Загружает снимок из JSON, файл изменений .delta и журнал операций
+        
+        Массив customers разбирается потоково, по одной записи. При lazy=True
+        строится только индекс email -> положение записи в файле, а объекты
+        Customer создаются при первом обращении (login_customer, get_customer).
+        Записи из .delta заменяют одноимённые записи снимка.
+        """
+        try:
+            self._snapshot_file = filename
+            batches = list(PurchaseJournal.replay(filename + '.delta'))
+            extra = {}
+            overrides = None
             
-            self.customers = []
-            for c in data['customers']:
-                customer = Customer(c['name'], c['email'])
-                customer.balance = c['balance']
-                for book_id in c['purchased']:
-                    book = next((b for b in self.books if b.book_id == book_id), None)
-                    if book:
-                        customer.purchased_books.append(book)
-                self.customers.append(customer)
+            self._reset_customers()
+            if os.path.exists(filename):
+                self._lazy_source = filename
+                for offset, raw in _iter_json_array(filename, 'customers', extra):
+                    if overrides is None:
+                        # Пакеты, уже вошедшие в снимок при компактации, пропускаются
+                        overrides = self._delta_overrides(batches, extra.get('delta_batch', 0))
+                    record = json.loads(raw)
+                    if record['email'] in overrides:
+                        self._load_record(overrides.pop(record['email']))
+                    else:
+                        self._load_record(record, (offset, len(raw)) if lazy else None)
+            if overrides is None:
+                overrides = self._delta_overrides(batches, extra.get('delta_batch', 0))
+            self._finish_load(filename, batches, overrides, extra.get('journal_seq', 0), extra.get('delta_batch', 0))
         except (FileNotFoundError, json.JSONDecodeError):
             pass
+    
+    def load_from_binary(self, filename="lab1/bookstore_data.bin"):
+        """
+        Загружает двоичный снимок (BinarySnapshot), файл изменений .delta
+        и журнал операций
+        
+        Строки и числа не разбираются: имена берутся из таблицы имён,
+        баланс - целое число копеек, покупки копируются в array('I') целиком.
+        """
+        self._snapshot_file = filename
+        batches = list(PurchaseJournal.replay(filename + '.delta'))
+        self._reset_customers()
+        journal_seq = delta_batch = 0
+        overrides = self._delta_overrides(batches, 0)
+        if os.path.exists(filename):
+            with BinarySnapshot(filename) as snapshot:
+                journal_seq, delta_batch = snapshot.journal_seq, snapshot.delta_batch
+                overrides = self._delta_overrides(batches, delta_batch)
+                catalog = self._books_by_id
+                for name, email, balance, purchased in snapshot.rows():
+                    if email in overrides:
+                        self._load_record(overrides.pop(email))
+                        continue
+                    customer = Customer(name, email, catalog)
+                    customer.balance = _from_kopecks(balance)
+                    if all(map(catalog.__contains__, purchased)):
+                        customer.purchased_ids = purchased
+                    else:
+                        customer.purchased_ids.extend(book_id for book_id in purchased if book_id in catalog)
+                    self._pending_sales.update(customer.purchased_ids)
+                    self._add_customer(customer)
+        self._finish_load(filename, batches, overrides, journal_seq, delta_batch)
+
+
+def convert_snapshot(source, target, email_index=True):
+    """Переводит снимок из JSON в двоичный формат или обратно (по расширению .bin)"""
+    if source.endswith('.bin'):
+        with BinarySnapshot(source) as snapshot:
+            tmp_filename = target + '.tmp'
+            with open(tmp_filename, 'wb') as f:
+                f.write(_json_head(snapshot.catalog_file, [b.to_dict() for b in snapshot.books],
+                                   snapshot.journal_seq, snapshot.delta_batch))
+                separator = b'\n    '
+                for record in snapshot.records():
+                    f.write(separator + json.dumps(record, ensure_ascii=False).encode('utf-8'))
+                    separator = b',\n    '
+                f.write(b'\n  ]\n}\n')
+            os.replace(tmp_filename, target)
+    else:
+        extra = {}
+        records = (json.loads(raw) for _, raw in _iter_json_array(source, 'customers', extra))
+        BinarySnapshot.write(target, records, extra, email_index)
 
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 
-def run():
-    store = BookStore()
-    store.load_from_json()
+def browse_books(store, page_size=PAGE_SIZE):
+    """Постраничный просмотр каталога с выбором сортировки"""
+    offset, sort = 0, None
+    while True:
+        store.show_books(offset, page_size, sort)
+        if len(store.books) <= page_size and sort is None:
+            return
+        command = input("[n] дальше, [p] назад, [s] сортировка, [Enter] выход: ").strip().lower()
+        if command == 'n':
+            if offset + page_size < len(store.books):
+                offset += page_size
+        elif command == 'p':
+            offset = max(0, offset - page_size)
+        elif command == 's':
+            choice = input("Сортировать по (price, -price, title, author, пусто - по ID): ").strip() or None
+            if choice is not None and choice.lstrip('-') not in store.SORT_KEYS:
+                print("Неизвестная сортировка")
+                continue
+            offset, sort = 0, choice
+        else:
+            return
+
+
+def browse_my_books(store, page_size=PAGE_SIZE):
+    """Постраничный просмотр купленных книг"""
+    offset = 0
+    while True:
+        total = store.show_my_books(offset, page_size)
+        if not total or total <= page_size:
+            return
+        command = input("[n] дальше, [p] назад, [Enter] выход: ").strip().lower()
+        if command == 'n':
+            if offset + page_size < total:
+                offset += page_size
+        elif command == 'p':
+            offset = max(0, offset - page_size)
+        else:
+            return
+
+
+def run(store=None):
+    if store is None:
+        store = BookStore()
+        store.load_from_json()
+        store.open_journal()
     
     print("=" * 60)
     print("         ЦИФРОВОЙ МАГАЗИН КНИГ")
@@ -220,6 +1920,8 @@ def run():
             print("1. Войти")
             print("2. Зарегистрироваться")
             print("3. Просмотреть каталог книг")
+            print("4. Поиск книг")
+            print("5. Статистика продаж")
             print("0. Выход")
             print("=" * 60)
             
@@ -243,9 +1945,16 @@ def run():
                     print(f"\nОшибка: {e}")
             
             elif choice == '3':
-                store.show_books()
+                browse_books(store)
+            
+            elif choice == '4':
+                store.show_search_results(input("Название или автор: ").strip())
+            
+            elif choice == '5':
+                store.show_sales_stats()
             
             elif choice == '0':
+                store.close()
                 print("\nДо свидания!")
                 break
             
@@ -263,30 +1972,30 @@ def run():
             print("4. Пополнить баланс")
             print("5. Сохранить данные")
             print("6. Выйти из аккаунта")
+            print("7. Поиск книг")
             print("0. Завершить программу")
             print("=" * 60)
             
             choice = input("Выберите действие: ").strip()
             
             if choice == '1':
-                store.show_books()
+                browse_books(store)
             
             elif choice == '2':
-                store.show_my_books()
+                browse_my_books(store)
             
             elif choice == '3':
                 try:
-                    store.show_books()
+                    browse_books(store)
                     book_id = int(input("\nВведите ID книги: "))
-                    book = next((b for b in store.books if b.book_id == book_id), None)
+                    book = store.get_book(book_id)
                     
                     if not book:
                         print("\nКнига не найдена")
                     else:
-                        store.current_customer.buy_book(book)
+                        store.purchase(store.current_customer, book)
                         print(f"\nКнига '{book.title}' успешно куплена!")
                         print(f"Остаток на балансе: {store.current_customer.balance} руб.")
-                        store.save_to_json()
                 except ValueError:
                     print("\nВведите корректное число")
                 except BookStoreException as e:
@@ -295,24 +2004,33 @@ def run():
             elif choice == '4':
                 try:
                     amount = float(input("Сумма пополнения: "))
-                    store.current_customer.add_balance(amount)
+                    store.top_up(store.current_customer, amount)
                     print(f"\nБаланс пополнен на {amount} руб.")
                     print(f"Текущий баланс: {store.current_customer.balance} руб.")
-                    store.save_to_json()
                 except ValueError as e:
                     print(f"\n{e}")
             
             elif choice == '5':
                 print("\n=== СОХРАНЕНИЕ ДАННЫХ ===")
-                print("1. Сохранить в JSON")
+                print("1. Сохранить изменения (инкрементально)")
                 print("2. Сохранить в XML")
+                print("3. Полная перезапись снимка")
+                print("4. Сохранить в двоичный снимок")
                 
                 save_choice = input("Выберите формат: ").strip()
                 
                 if save_choice == '1':
-                    store.save_to_json()
+                    saved = store.save_changes()
+                    if saved:
+                        print(f"Сохранены изменения покупателей: {saved}")
+                    elif saved == 0:
+                        print("Несохранённых изменений нет")
                 elif save_choice == '2':
                     store.save_to_xml()
+                elif save_choice == '3':
+                    store.compact()
+                elif save_choice == '4':
+                    store.save_to_binary()
                 else:
                     print("Неверный выбор")
             
@@ -320,8 +2038,11 @@ def run():
                 store.current_customer = None
                 print("\nВы вышли из аккаунта")
             
+            elif choice == '7':
+                store.show_search_results(input("Название или автор: ").strip())
+            
             elif choice == '0':
-                store.save_to_json()
+                store.close()
                 print("\nДанные сохранены. До свидания!")
                 break
             
@@ -329,5 +2050,34 @@ def run():
                 print("\nНеверный выбор")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Цифровой магазин книг")
+    parser.add_argument("--catalog", help="внешний каталог: JSON или скомпилированный .bin")
+    parser.add_argument("--compile-catalog", nargs=2, metavar=("SRC", "DST"),
+                        help="скомпилировать каталог SRC в двоичный файл DST и выйти")
+    parser.add_argument("--data", default="lab1/bookstore_data.json",
+                        help="снимок магазина: JSON или двоичный .bin")
+    parser.add_argument("--convert", nargs=2, metavar=("SRC", "DST"),
+                        help="перевести снимок SRC в DST (JSON <-> .bin) и выйти")
+    args = parser.parse_args()
+    
+    if args.convert:
+        source, target = args.convert
+        convert_snapshot(source, target)
+        print(f"Снимок {source} сохранён в {target}")
+        return
+    
+    if args.compile_catalog:
+        source, target = args.compile_catalog
+        BookStore(catalog_file=source).compile_catalog(target)
+        print(f"Каталог скомпилирован в {target}")
+        return
+    
+    store = BookStore(catalog_file=args.catalog)
+    store.load_snapshot(args.data)
+    store.open_journal(args.data)
+    run(store)
+
+
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    main()
\ No newline at end of file
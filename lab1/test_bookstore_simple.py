@@ -0,0 +1,1279 @@
+# Unit-тесты для BookStore (unittest - встроенный модуль)
+# Запуск: python test_bookstore_simple.py
+
+import unittest
+import tempfile
+import os
+import json
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from interactive_bookstore import (
+    BookStore, Book, BookStoreException, BinarySnapshot, PurchaseJournal, _iter_json_array, convert_snapshot
+)
+from bookstore_sqlite import SQLiteBookStore
+from bookstore_import import import_file
+
+try:
+    from aiohttp.test_utils import TestClient, TestServer
+    import bookstore_http
+except ImportError:
+    bookstore_http = None
+
+
+class TestBookStoreIndexes(unittest.TestCase):
+    """Тесты для индексов книг и покупателей"""
+    
+    def setUp(self):
+        self.store = BookStore()
+    
+    def test_get_book(self):
+        """Тест: поиск книги по ID"""
+        book = self.store.get_book(2)
+        self.assertIsNotNone(book)
+        self.assertEqual(book.title, "Мастер и Маргарита")
+    
+    def test_get_missing_book(self):
+        """Тест: несуществующая книга"""
+        self.assertIsNone(self.store.get_book(999))
+    
+    def test_add_book_updates_index(self):
+        """Тест: новая книга попадает в индекс"""
+        self.store.add_book(Book("Идиот", "Ф.Достоевский", 420, 6))
+        self.assertEqual(self.store.get_book(6).title, "Идиот")
+    
+    def test_add_duplicate_book(self):
+        """Тест: повторный ID книги"""
+        with self.assertRaises(BookStoreException):
+            self.store.add_book(Book("Идиот", "Ф.Достоевский", 420, 1))
+    
+    def test_remove_book_updates_index(self):
+        """Тест: удалённая книга исчезает из индекса"""
+        self.store.remove_book(1)
+        self.assertIsNone(self.store.get_book(1))
+        self.assertEqual(len(self.store.books), 4)
+    
+    def test_register_and_get_customer(self):
+        """Тест: регистрация добавляет покупателя в индекс"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        self.assertIs(self.store.get_customer("ivan@example.com"), customer)
+    
+    def test_register_duplicate_email(self):
+        """Тест: повторная регистрация"""
+        self.store.register_customer("Иван", "ivan@example.com")
+        with self.assertRaises(BookStoreException):
+            self.store.register_customer("Пётр", "ivan@example.com")
+    
+    def test_login_unknown_customer(self):
+        """Тест: вход несуществующего пользователя"""
+        with self.assertRaises(BookStoreException):
+            self.store.login_customer("nobody@example.com")
+    
+    def test_load_rebuilds_index(self):
+        """Тест: загрузка из JSON восстанавливает индекс и покупки"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(1000)
+        customer.buy_book(self.store.get_book(3))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "data.json")
+            self.store.save_to_json(filename)
+            
+            loaded = BookStore()
+            loaded.load_from_json(filename)
+        
+        restored = loaded.login_customer("ivan@example.com")
+        self.assertEqual(restored.balance, 601)
+        self.assertIs(restored.purchased_books[0], loaded.get_book(3))
+    
+    def test_foreign_book_is_rejected(self):
+        """Тест: книгу не из каталога купить нельзя, деньги и каталог не меняются"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(1000)
+        foreign = Book("Нос", "Н.Гоголь", 100, 999)
+        for buy in (lambda: customer.buy_book(foreign),
+                    lambda: customer.buy_books([self.store.get_book(3), foreign])):
+            with self.assertRaises(BookStoreException):
+                buy()
+        self.assertEqual(customer.balance, 1000)
+        self.assertEqual(customer.purchased_books, ())
+        self.assertIsNone(self.store.get_book(999))
+
+
+class TestPurchaseJournal(unittest.TestCase):
+    """Тесты для журнала операций"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "data.json")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _make_store(self, compact_every=1000):
+        store = BookStore()
+        store.load_from_json(self.filename)
+        store.open_journal(self.filename, compact_every=compact_every)
+        return store
+    
+    def test_operations_are_appended(self):
+        """Тест: каждая операция - одна строка журнала, снимок не пишется"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        store.purchase(customer, store.get_book(1))
+        store.close_journal()
+        
+        records = list(PurchaseJournal.replay(self.filename + '.journal'))
+        self.assertEqual([r['op'] for r in records], ['register', 'topup', 'buy'])
+        self.assertFalse(os.path.exists(self.filename))
+    
+    def test_replay_restores_state(self):
+        """Тест: загрузка применяет журнал к снимку"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        store.purchase(customer, store.get_book(1))
+        store.close_journal()
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        restored = loaded.get_customer("ivan@example.com")
+        self.assertEqual(restored.balance, 401)
+        self.assertEqual(len(restored.purchased_books), 1)
+    
+    def test_replay_skips_books_missing_from_catalog(self):
+        """Тест: покупки книг, которых больше нет в каталоге, пропускаются при загрузке"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 2000)
+        store.purchase(customer, store.get_book(2))
+        store.buy_many("ivan@example.com", [2, 4])
+        store.close_journal()
+        
+        catalog = os.path.join(self.tmp.name, "catalog.json")
+        book = store.get_book(4)
+        with open(catalog, 'w', encoding='utf-8') as f:
+            json.dump([{"title": book.title, "author": book.author, "price": book.price, "id": 4}], f)
+        loaded = BookStore(catalog_file=catalog)
+        loaded.load_from_json(self.filename)
+        restored = loaded.get_customer("ivan@example.com")
+        self.assertEqual(restored.purchased_ids.tolist(), [4])
+        self.assertEqual(restored.balance, 2000 - book.price)
+    
+    def test_compaction_folds_journal(self):
+        """Тест: компактация переносит журнал в снимок"""
+        store = self._make_store(compact_every=3)
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        store.purchase(customer, store.get_book(1))
+        store.top_up(customer, 50)
+        store.close_journal()
+        
+        self.assertEqual(len(list(PurchaseJournal.replay(self.filename + '.journal'))), 1)
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.get_customer("ivan@example.com").balance, 451)
+    
+    def test_invalid_top_up_is_rejected(self):
+        """Тест: NaN, бесконечность и bool не попадают ни в баланс, ни в журнал"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        for amount in (float('nan'), float('inf'), True, "100", None):
+            with self.subTest(amount=amount), self.assertRaises(ValueError):
+                store.top_up(customer, amount)
+        store.close_journal()
+        self.assertEqual(customer.balance, 0)
+        self.assertEqual([r["op"] for r in PurchaseJournal.replay(self.filename + '.journal')], ["register"])
+    
+    def test_replay_skips_records_already_in_snapshot(self):
+        """Тест: журнал, не очищенный после снимка, не применяется дважды"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        store.close_journal()
+        store.save_to_json(self.filename)
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.get_customer("ivan@example.com").balance, 1000)
+    
+    def test_torn_last_record_is_ignored(self):
+        """Тест: оборванная последняя запись после сбоя игнорируется"""
+        store = self._make_store()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        store.close_journal()
+        with open(self.filename + '.journal', 'a', encoding='utf-8') as f:
+            f.write('{"seq":3,"op":"buy","ema')
+        
+        loaded = self._make_store()
+        self.assertEqual(loaded.get_customer("ivan@example.com").balance, 1000)
+        loaded.top_up(loaded.get_customer("ivan@example.com"), 5)
+        loaded.close_journal()
+        
+        reloaded = BookStore()
+        reloaded.load_from_json(self.filename)
+        self.assertEqual(reloaded.get_customer("ivan@example.com").balance, 1005)
+
+
+class TestStreamingLoad(unittest.TestCase):
+    """Тесты для потоковой и ленивой загрузки JSON"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "data.json")
+        self.data = {
+            "books": [],
+            "customers": [
+                {"name": "Ш\"ов]{", "email": "a@example.com", "balance": 100, "purchased": [1, 2]},
+                {"name": "Иван", "email": "ivan@example.com", "balance": 0, "purchased": []}
+            ],
+            "journal_seq": 0
+        }
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_iter_json_array_small_chunks(self):
+        """Тест: элементы корректно собираются из блоков по 1 байту"""
+        extra = {}
+        with open(self.filename, 'rb') as f:
+            raw = f.read()
+        items = list(_iter_json_array(self.filename, 'customers', extra, chunk_size=1))
+        self.assertEqual([json.loads(r) for _, r in items], self.data['customers'])
+        for offset, item in items:
+            self.assertEqual(raw[offset:offset + len(item)], item)
+        self.assertEqual(extra, {"books": [], "journal_seq": 0})
+    
+    def test_lazy_load_defers_customers(self):
+        """Тест: при lazy=True покупатели создаются только при входе"""
+        store = BookStore()
+        store.load_from_json(self.filename, lazy=True)
+        self.assertEqual(store.customers, [])
+        self.assertEqual(store.customer_count(), 2)
+        
+        customer = store.login_customer("a@example.com")
+        self.assertEqual(customer.name, 'Ш"ов]{')
+        self.assertEqual(len(customer.purchased_books), 2)
+        self.assertEqual(len(store.customers), 1)
+    
+    def test_lazy_register_duplicate(self):
+        """Тест: проверка дубликата email видит ленивые записи"""
+        store = BookStore()
+        store.load_from_json(self.filename, lazy=True)
+        with self.assertRaises(BookStoreException):
+            store.register_customer("Пётр", "ivan@example.com")
+    
+    def test_save_keeps_lazy_customers(self):
+        """Тест: сохранение переносит незагруженные записи в новый снимок"""
+        store = BookStore()
+        store.load_from_json(self.filename, lazy=True)
+        store.login_customer("a@example.com").add_balance(50)
+        store.save_to_json(self.filename)
+        self.assertEqual(store.get_customer("ivan@example.com").name, "Иван")
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.customer_count(), 2)
+        self.assertEqual(loaded.get_customer("a@example.com").balance, 150)
+
+
+class TestXmlExport(unittest.TestCase):
+    """Тесты для потокового экспорта и импорта XML"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BookStore()
+        customer = self.store.register_customer("Иван <&>", "ivan@example.com")
+        customer.add_balance(1000)
+        customer.buy_book(self.store.get_book(2))
+        self.store.register_customer("Пётр", "petr@example.com")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _round_trip(self, filename):
+        self.store.save_to_xml(filename)
+        loaded = BookStore()
+        loaded.load_from_xml(filename)
+        return loaded
+    
+    def test_xml_round_trip(self):
+        """Тест: XML можно загрузить обратно"""
+        loaded = self._round_trip(os.path.join(self.tmp.name, "data.xml"))
+        customer = loaded.get_customer("ivan@example.com")
+        self.assertEqual(customer.name, "Иван <&>")
+        self.assertEqual(customer.balance, 550)
+        self.assertIs(customer.purchased_books[0], loaded.get_book(2))
+        self.assertEqual(loaded.customer_count(), 2)
+    
+    def test_gzip_round_trip(self):
+        """Тест: сжатый XML"""
+        filename = os.path.join(self.tmp.name, "data.xml.gz")
+        loaded = self._round_trip(filename)
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        self.assertEqual(loaded.get_customer("petr@example.com").name, "Пётр")
+    
+    def test_schema(self):
+        """Тест: структура документа совпадает с прежней"""
+        filename = os.path.join(self.tmp.name, "data.xml")
+        self.store.save_to_xml(filename)
+        root = ET.parse(filename).getroot()
+        self.assertEqual(root.tag, 'bookstore')
+        self.assertEqual(len(root.findall('books/book')), 5)
+        self.assertEqual(root.find('books/book').get('id'), '1')
+        self.assertEqual(root.findtext('customers/customer/purchased_books/book_id'), '2')
+        self.assertIsNone(root.find('customers/customer[2]/purchased_books'))
+
+
+class TestSQLiteBookStore(unittest.TestCase):
+    """Тесты для хранилища на SQLite"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp.name, "store.db")
+        self.store = SQLiteBookStore(self.db_file)
+    
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+    
+    def test_purchase_is_persisted(self):
+        """Тест: покупка видна из другого подключения к базе"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        self.store.top_up(customer, 1000)
+        self.store.purchase(customer, self.store.get_book(1))
+        self.assertEqual(customer.balance, 401)
+        
+        other = SQLiteBookStore(self.db_file)
+        restored = other.login_customer("ivan@example.com")
+        other.close()
+        self.assertEqual(restored.balance, 401)
+        self.assertEqual([b.book_id for b in restored.purchased_books], [1])
+    
+    def test_failed_purchase_rolls_back(self):
+        """Тест: при нехватке средств база не меняется"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        self.store.top_up(customer, 100)
+        with self.assertRaises(BookStoreException):
+            self.store.purchase(customer, self.store.get_book(1))
+        restored = self.store.get_customer("ivan@example.com")
+        self.assertEqual(restored.balance, 100)
+        self.assertEqual(restored.purchased_books, ())
+    
+    def test_invalid_top_up_is_rejected(self):
+        """Тест: NaN и бесконечность не записываются в базу"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        for amount in (float('nan'), float('inf'), True):
+            with self.subTest(amount=amount), self.assertRaises(ValueError):
+                self.store.top_up(customer, amount)
+        self.assertEqual(self.store.get_customer("ivan@example.com").balance, 0)
+    
+    def test_stats_see_other_connections(self):
+        """Тест: покупки из другого подключения попадают в статистику"""
+        customer = self.store.register_customer("Иван", "ivan@example.com")
+        self.store.top_up(customer, 2000)
+        self.store.purchase(customer, self.store.get_book(2))
+        self.assertEqual([(book.book_id, sold) for book, sold in self.store.top_sellers()], [(2, 1)])
+        
+        other = SQLiteBookStore(self.db_file)
+        other.buy_many("ivan@example.com", [3, 3])
+        other.close()
+        self.assertEqual([(book.book_id, sold) for book, sold in self.store.top_sellers()], [(3, 2), (2, 1)])
+        self.assertEqual(self.store.stats.total_revenue(),
+                         sum(self.store.get_book(i).price for i in (2, 3, 3)))
+    
+    def test_register_duplicate(self):
+        """Тест: повторный email отклоняется базой"""
+        self.store.register_customer("Иван", "ivan@example.com")
+        with self.assertRaises(BookStoreException):
+            self.store.register_customer("Пётр", "ivan@example.com")
+    
+    def test_json_import_export(self):
+        """Тест: JSON остаётся форматом импорта и экспорта"""
+        source = BookStore()
+        customer = source.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(1000)
+        customer.buy_book(source.get_book(5))
+        json_file = os.path.join(self.tmp.name, "data.json")
+        source.save_to_json(json_file)
+        
+        self.store.load_from_json(json_file)
+        self.assertEqual(self.store.customer_count(), 1)
+        export_file = os.path.join(self.tmp.name, "export.json")
+        self.store.save_to_json(export_file)
+        
+        loaded = BookStore()
+        loaded.load_from_json(export_file)
+        restored = loaded.get_customer("ivan@example.com")
+        self.assertEqual(restored.balance, 500)
+        self.assertIs(restored.purchased_books[0], loaded.get_book(5))
+
+
+class TestCompactCustomers(unittest.TestCase):
+    """Тесты для компактного представления покупателей"""
+    
+    def test_slots_without_dict(self):
+        """Тест: у книг и покупателей нет __dict__"""
+        store = BookStore()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        self.assertFalse(hasattr(customer, '__dict__'))
+        self.assertFalse(hasattr(store.get_book(1), '__dict__'))
+    
+    def test_purchases_stored_as_ids(self):
+        """Тест: покупки хранятся как массив ID"""
+        store = BookStore()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(1000)
+        customer.buy_book(store.get_book(4))
+        self.assertEqual(customer.purchased_ids.tolist(), [4])
+        self.assertIs(customer.purchased_books[0], store.get_book(4))
+    
+    def test_columnar_store(self):
+        """Тест: колоночный режим сохраняет интерфейс Customer"""
+        store = BookStore(columnar=True)
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000.5)
+        store.purchase(customer, store.get_book(2))
+        
+        restored = store.login_customer("ivan@example.com")
+        self.assertEqual(restored.balance, 550.5)
+        self.assertEqual([b.title for b in restored.purchased_books], ["Мастер и Маргарита"])
+        self.assertEqual(len(store.customers), 1)
+        self.assertEqual(str(restored), "Иван (ivan@example.com) | Баланс: 550.5 руб. | Куплено книг: 1")
+    
+    def test_columnar_round_trip(self):
+        """Тест: колоночный режим читает и пишет тот же JSON"""
+        store = BookStore()
+        customer = store.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(1000)
+        customer.buy_book(store.get_book(1))
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "data.json")
+            store.save_to_json(filename)
+            columnar = BookStore(columnar=True)
+            columnar.load_from_json(filename)
+            columnar.save_to_json(filename)
+            loaded = BookStore()
+            loaded.load_from_json(filename)
+        self.assertEqual(loaded.get_customer("ivan@example.com").to_dict(), customer.to_dict())
+
+
+class TestCatalogSearch(unittest.TestCase):
+    """Тесты для поиска по каталогу"""
+    
+    def setUp(self):
+        self.store = BookStore()
+    
+    def _titles(self, query):
+        return [b.title for b in self.store.search(query)]
+    
+    def test_case_folding(self):
+        """Тест: поиск не зависит от регистра"""
+        self.assertEqual(self._titles("ТОЛСТОЙ"), ["Война и мир"])
+    
+    def test_yo_folding(self):
+        """Тест: ё и е не различаются"""
+        self.store.add_book(Book("Ёжик в тумане", "С.Козлов", 200, 6))
+        self.assertEqual(self._titles("ежик"), ["Ёжик в тумане"])
+    
+    def test_prefix(self):
+        """Тест: поиск по началу слова"""
+        self.assertEqual(self._titles("маргар"), ["Мастер и Маргарита"])
+    
+    def test_typo(self):
+        """Тест: опечатка находится по триграммам"""
+        self.assertEqual(self._titles("достоевкий"), ["Преступление и наказание"])
+    
+    def test_several_words(self):
+        """Тест: несколько слов сужают результат"""
+        self.assertEqual(self._titles("дж оруэлл"), ["1984"])
+    
+    def test_title_ranked_above_author(self):
+        """Тест: совпадение в названии важнее совпадения в авторе"""
+        self.store.add_book(Book("Булгаков: жизнь", "А.Варламов", 300, 6))
+        self.assertEqual(self._titles("булгаков"), ["Булгаков: жизнь", "Мастер и Маргарита"])
+    
+    def test_incremental_updates(self):
+        """Тест: индекс обновляется при добавлении и удалении книг"""
+        self.store.add_book(Book("Идиот", "Ф.Достоевский", 420, 6))
+        self.assertIn("Идиот", self._titles("идиот"))
+        self.store.remove_book(6)
+        self.assertEqual(self._titles("идиот"), [])
+    
+    def test_no_results(self):
+        """Тест: пустой результат"""
+        self.assertEqual(self._titles("zzz"), [])
+
+
+class TestExternalCatalog(unittest.TestCase):
+    """Тесты для внешнего и двоичного каталога"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.json_catalog = os.path.join(self.tmp.name, "catalog.json")
+        self.bin_catalog = os.path.join(self.tmp.name, "catalog.bin")
+        books = [
+            {"title": "Идиот", "author": "Ф.Достоевский", "price": 420, "id": 10},
+            {"title": "Вишнёвый сад", "author": "А.Чехов", "price": 250.5, "id": 3},
+            {"title": "Мёртвые души", "author": "Н.Гоголь", "price": 300, "id": 7}
+        ]
+        with open(self.json_catalog, 'w', encoding='utf-8') as f:
+            json.dump(books, f, ensure_ascii=False)
+        BookStore(catalog_file=self.json_catalog).compile_catalog(self.bin_catalog)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_json_catalog(self):
+        """Тест: каталог из JSON-файла заменяет встроенный"""
+        store = BookStore(catalog_file=self.json_catalog)
+        self.assertEqual(len(store.books), 3)
+        self.assertEqual(store.get_book(10).title, "Идиот")
+        self.assertIsNone(store.get_book(1))
+    
+    def test_binary_catalog_lookup(self):
+        """Тест: поиск книг в двоичном каталоге"""
+        store = BookStore(catalog_file=self.bin_catalog)
+        self.assertEqual(len(store.books), 3)
+        self.assertEqual(store.get_book(3).title, "Вишнёвый сад")
+        self.assertEqual(store.get_book(3).price, 250.5)
+        self.assertIs(store.get_book(7), store.get_book(7))
+        self.assertIsNone(store.get_book(5))
+        self.assertEqual([b.book_id for b in store.books], [3, 7, 10])
+        self.assertEqual([b.title for b in store.search("мертвые")], ["Мёртвые души"])
+    
+    def test_binary_catalog_is_read_only(self):
+        """Тест: в двоичный каталог нельзя добавить книгу"""
+        store = BookStore(catalog_file=self.bin_catalog)
+        with self.assertRaises(BookStoreException):
+            store.add_book(Book("Нос", "Н.Гоголь", 100, 11))
+        customer = store.register_customer("Иван", "ivan@example.com")
+        store.top_up(customer, 1000)
+        with self.assertRaises(BookStoreException):
+            store.purchase(customer, Book("Нос", "Н.Гоголь", 100, 11))
+        self.assertEqual(customer.balance, 1000)
+    
+    def test_save_references_catalog(self):
+        """Тест: снимок хранит ссылку на каталог, а не сами книги"""
+        store = BookStore(catalog_file=self.bin_catalog)
+        customer = store.register_customer("Иван", "ivan@example.com")
+        customer.add_balance(500)
+        customer.buy_book(store.get_book(10))
+        filename = os.path.join(self.tmp.name, "data.json")
+        store.save_to_json(filename)
+        with open(filename, encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data['catalog'], self.bin_catalog)
+        self.assertNotIn('books', data)
+        
+        loaded = BookStore(catalog_file=self.bin_catalog)
+        loaded.load_from_json(filename)
+        self.assertEqual(loaded.get_customer("ivan@example.com").purchased_books[0].title, "Идиот")
+
+
+class TestConcurrentPurchases(unittest.TestCase):
+    """Тесты для многопоточных покупок"""
+    
+    def test_buy_many(self):
+        """Тест: пакетная покупка списывает сумму и добавляет все книги"""
+        store = BookStore()
+        store.register_customer("Иван", "ivan@example.com").add_balance(1000)
+        books = store.buy_many("ivan@example.com", [3, 4])
+        self.assertEqual([b.book_id for b in books], [3, 4])
+        customer = store.get_customer("ivan@example.com")
+        self.assertEqual(customer.balance, 251)
+        self.assertEqual(customer.purchased_ids.tolist(), [3, 4])
+    
+    def test_buy_many_is_atomic(self):
+        """Тест: если денег не хватает на все книги, не покупается ни одна"""
+        store = BookStore()
+        store.register_customer("Иван", "ivan@example.com").add_balance(1000)
+        with self.assertRaises(BookStoreException):
+            store.buy_many("ivan@example.com", [1, 2])
+        with self.assertRaises(BookStoreException):
+            store.buy_many("ivan@example.com", [1, 999])
+        customer = store.get_customer("ivan@example.com")
+        self.assertEqual(customer.balance, 1000)
+        self.assertEqual(len(customer.purchased_ids), 0)
+    
+    def test_thread_pool_stress(self):
+        """Тест: параллельные покупки не уводят баланс в минус и ничего не теряют"""
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "data.json")
+            store = BookStore()
+            store.open_journal(filename, compact_every=200)
+            emails = [f"user{i}@example.com" for i in range(8)]
+            for email in emails:
+                store.top_up(store.register_customer("Покупатель", email), 5000)
+            
+            def worker(n):
+                email = emails[n % len(emails)]
+                try:
+                    store.buy_many(email, [1 + n % 5, 1 + (n + 1) % 5])
+                    return 1
+                except BookStoreException:
+                    return 0
+            
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                succeeded = sum(pool.map(worker, range(2000)))
+            store.close()
+            
+            total = 0
+            for email in emails:
+                customer = store.get_customer(email)
+                self.assertGreaterEqual(customer.balance, 0)
+                spent = sum(b.price for b in customer.purchased_books)
+                self.assertEqual(customer.balance + spent, 5000)
+                total += len(customer.purchased_ids)
+            self.assertEqual(total, succeeded * 2)
+            
+            loaded = BookStore()
+            loaded.load_from_json(filename)
+            for email in emails:
+                self.assertEqual(loaded.get_customer(email).to_dict(), store.get_customer(email).to_dict())
+
+
+class TestIncrementalSave(unittest.TestCase):
+    """Тесты для инкрементального сохранения изменений"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "data.json")
+        self.store = BookStore()
+        self.store.load_from_json(self.filename)
+        self.store.open_journal(self.filename)
+        for i in range(20):
+            self.store.top_up(self.store.register_customer("Покупатель", f"user{i}@example.com"), 1000)
+        self.store.compact()
+    
+    def tearDown(self):
+        self.store.close_journal()
+        self.tmp.cleanup()
+    
+    def _delta(self):
+        return list(PurchaseJournal.replay(self.filename + '.delta'))
+    
+    def test_only_changed_customers_are_written(self):
+        """Тест: в .delta попадает только изменённый покупатель, снимок не трогается"""
+        snapshot = os.path.getmtime(self.filename), os.path.getsize(self.filename)
+        self.store.purchase(self.store.get_customer("user3@example.com"), self.store.get_book(1))
+        self.store.save_changes()
+        
+        batches = self._delta()
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([c['email'] for c in batches[0]['customers']], ["user3@example.com"])
+        self.assertEqual((os.path.getmtime(self.filename), os.path.getsize(self.filename)), snapshot)
+        self.assertEqual(list(PurchaseJournal.replay(self.filename + '.journal')), [])
+    
+    def test_save_without_changes_writes_nothing(self):
+        """Тест: повторное сохранение без изменений не дописывает пакет"""
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.assertEqual(self.store.save_changes(), 1)
+        self.assertEqual(self.store.save_changes(), 0)
+        self.assertEqual(len(self._delta()), 1)
+    
+    def test_load_applies_delta(self):
+        """Тест: загрузка накладывает пакеты изменений на снимок"""
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.store.save_changes()
+        self.store.purchase(self.store.get_customer("user1@example.com"), self.store.get_book(1))
+        self.store.register_customer("Новый", "new@example.com")
+        self.store.save_changes()
+        self.store.top_up(self.store.get_customer("user2@example.com"), 7)
+        
+        for lazy in (False, True):
+            loaded = BookStore()
+            loaded.load_from_json(self.filename, lazy=lazy)
+            self.assertEqual(loaded.customer_count(), 21)
+            self.assertEqual(loaded.get_customer("user1@example.com").balance, 406)
+            self.assertEqual(loaded.get_customer("user1@example.com").purchased_ids.tolist(), [1])
+            self.assertEqual(loaded.get_customer("user2@example.com").balance, 1007)
+            self.assertIsNotNone(loaded.get_customer("new@example.com"))
+    
+    def test_compact_folds_delta(self):
+        """Тест: полная компактация переносит изменения в снимок и удаляет .delta"""
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.store.save_changes()
+        self.store.compact()
+        self.assertFalse(os.path.exists(self.filename + '.delta'))
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.get_customer("user1@example.com").balance, 1005)
+    
+    def test_stale_delta_is_not_applied_twice(self):
+        """Тест: пакеты, уже вошедшие в снимок, при загрузке пропускаются"""
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.store.save_changes()
+        with open(self.filename + '.delta', encoding='utf-8') as f:
+            stale = f.read()
+        self.store.compact()
+        # Сбой между записью снимка и удалением .delta
+        with open(self.filename + '.delta', 'w', encoding='utf-8') as f:
+            f.write(stale)
+        self.store.top_up(self.store.get_customer("user1@example.com"), 10)
+        self.store.close_journal()
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.get_customer("user1@example.com").balance, 1015)
+    
+    def test_checkpoint_compacts_when_delta_grows(self):
+        """Тест: при большом .delta контрольная точка переписывает снимок"""
+        self.store.delta_limit = 0
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.store.save_changes()
+        self.store.top_up(self.store.get_customer("user1@example.com"), 5)
+        self.store.close()
+        self.assertFalse(os.path.exists(self.filename + '.delta'))
+        
+        loaded = BookStore()
+        loaded.load_from_json(self.filename)
+        self.assertEqual(loaded.get_customer("user1@example.com").balance, 1010)
+
+
+class TestBulkImport(unittest.TestCase):
+    """Тесты для массового импорта покупателей"""
+    
+    CSV = (
+        "name,email,balance,purchased\n"
+        "Иван,ivan@example.com,1000,1;4\n"
+        "Пётр,bad-email,10,\n"
+        "Анна,anna@example.com,-5,\n"
+        "Олег,oleg@example.com,99.5,42\n"
+        "Иван 2,ivan@example.com,1,\n"
+        "Мария,maria@example.com,,\n"
+        "Старый,old@example.com,1,\n"
+    )
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BookStore()
+        self.store.register_customer("Старый", "old@example.com")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _write(self, name, text):
+        filename = os.path.join(self.tmp.name, name)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return filename
+    
+    def test_csv_rejects_with_line_numbers(self):
+        """Тест: некорректные строки и повторы отклоняются с номерами строк"""
+        imported, rejected = import_file(self.store, self._write("c.csv", self.CSV), workers=0)
+        self.assertEqual(imported, 2)
+        self.assertEqual([line for line, _ in rejected], [3, 4, 5, 6, 8])
+        self.assertIn("строки 2", dict(rejected)[6])
+        self.assertIn("42", dict(rejected)[5])
+        
+        ivan = self.store.get_customer("ivan@example.com")
+        self.assertEqual(ivan.balance, 1000)
+        self.assertEqual(ivan.purchased_ids.tolist(), [1, 4])
+        self.assertEqual(self.store.get_customer("maria@example.com").balance, 0)
+    
+    def test_jsonl(self):
+        """Тест: JSONL, включая испорченную строку"""
+        text = (
+            '{"name": "Иван", "email": "ivan@example.com", "balance": 10.25, "purchased": [2]}\n'
+            '\n'
+            '{"name": "Пётр", "email": \n'
+            '{"name": "", "email": "petr@example.com"}\n'
+        )
+        imported, rejected = import_file(self.store, self._write("c.jsonl", text), workers=0)
+        self.assertEqual(imported, 1)
+        self.assertEqual([line for line, _ in rejected], [3, 4])
+        self.assertEqual(self.store.get_customer("ivan@example.com").balance, 10.25)
+    
+    def test_process_pool_keeps_order(self):
+        """Тест: проверка в пуле процессов даёт тот же результат"""
+        lines = ["name,email,balance"]
+        lines += [f"Покупатель,user{i % 150}@example.com,{i}" for i in range(200)]
+        filename = self._write("many.csv", "\n".join(lines) + "\n")
+        
+        imported, rejected = import_file(self.store, filename, workers=2, chunk_size=16)
+        self.assertEqual(imported, 150)
+        self.assertEqual([line for line, _ in rejected], list(range(152, 202)))
+        self.assertEqual(self.store.get_customer("user7@example.com").balance, 7)
+    
+    def test_import_is_persisted_with_journal(self):
+        """Тест: при открытом журнале импорт сразу попадает в снимок"""
+        data = os.path.join(self.tmp.name, "data.json")
+        store = BookStore()
+        store.load_from_json(data)
+        store.open_journal(data)
+        import_file(store, self._write("c.csv", self.CSV), workers=0)
+        store.close_journal()
+        
+        loaded = BookStore()
+        loaded.load_from_json(data)
+        self.assertEqual(loaded.get_customer("ivan@example.com").purchased_ids.tolist(), [1, 4])
+    
+    def test_import_is_persisted_without_journal(self):
+        """Тест: импорт в загруженный из снимка магазин сохраняется и без журнала"""
+        data = os.path.join(self.tmp.name, "data.json")
+        self.store.save_to_json(data)
+        store = BookStore()
+        store.load_from_json(data)
+        imported, _ = import_file(store, self._write("c.csv", self.CSV), workers=0)
+        store.close()
+        
+        loaded = BookStore()
+        loaded.load_from_json(data)
+        self.assertEqual(imported, 2)
+        self.assertEqual(loaded.customer_count(), 3)
+        self.assertEqual(loaded.get_customer("ivan@example.com").purchased_ids.tolist(), [1, 4])
+    
+    def test_sqlite_import(self):
+        """Тест: импорт в базу SQLite"""
+        store = SQLiteBookStore(os.path.join(self.tmp.name, "store.db"))
+        imported, rejected = import_file(store, self._write("c.csv", self.CSV), workers=0)
+        self.assertEqual(imported, 3)
+        self.assertEqual(store.get_customer("ivan@example.com").purchased_ids.tolist(), [1, 4])
+        store.close()
+
+
+class TestSalesStats(unittest.TestCase):
+    """Тесты для статистики продаж"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "data.json")
+        self.store = BookStore()
+        self.store.load_from_json(self.filename)
+        self.store.open_journal(self.filename)
+        for email in ("a@example.com", "b@example.com"):
+            self.store.top_up(self.store.register_customer("Покупатель", email), 10000)
+        self.store.purchase(self.store.get_customer("a@example.com"), self.store.get_book(4))
+        self.store.buy_many("b@example.com", [4, 2, 4])
+        self.store.buy_many("a@example.com", [2, 5])
+    
+    def tearDown(self):
+        self.store.close_journal()
+        self.tmp.cleanup()
+    
+    def _check(self, store):
+        stats = store.stats
+        self.assertEqual(stats.total_revenue(), 350 * 3 + 450 * 2 + 500)
+        self.assertEqual(stats.book_revenue(4), 1050)
+        self.assertEqual(stats.author_revenue("М.Булгаков"), 900)
+        self.assertEqual(stats.top_sellers(2), [(4, 3), (2, 2)])
+        self.assertEqual(store.average_spend(), 1225)
+    
+    def test_running_totals(self):
+        """Тест: итоги обновляются при каждой покупке"""
+        self._check(self.store)
+        self.assertEqual([book.book_id for book, _ in self.store.top_sellers(1)], [4])
+    
+    def test_failed_purchase_is_not_counted(self):
+        """Тест: неудавшаяся покупка не меняет статистику"""
+        with self.assertRaises(BookStoreException):
+            self.store.buy_many("a@example.com", [1] * 100)
+        self._check(self.store)
+    
+    def test_rebuilt_on_load(self):
+        """Тест: статистика восстанавливается из снимка и журнала"""
+        self.store.compact()
+        self.store.purchase(self.store.get_customer("a@example.com"), self.store.get_book(1))
+        for lazy in (False, True):
+            loaded = BookStore()
+            loaded.load_from_json(self.filename, lazy=lazy)
+            self.assertEqual(loaded.stats.sold(1), 1)
+            self.assertEqual(loaded.stats.top_sellers(2), [(4, 3), (2, 2)])
+    
+    def test_sqlite(self):
+        """Тест: статистика SQLite пересчитывается из базы при открытии"""
+        db_file = os.path.join(self.tmp.name, "store.db")
+        store = SQLiteBookStore(db_file)
+        store.top_up(store.register_customer("Иван", "ivan@example.com"), 2000)
+        store.buy_many("ivan@example.com", [3, 3])
+        store.close()
+        
+        store = SQLiteBookStore(db_file)
+        self.assertEqual(store.stats.top_sellers(), [(3, 2)])
+        self.assertEqual(store.stats.total_revenue(), 798)
+        store.close()
+
+
+class TestReadSnapshots(unittest.TestCase):
+    """Тесты для согласованных срезов (копирование при записи)"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _make_store(self, **kwargs):
+        store = BookStore(**kwargs)
+        for i in range(20):
+            store.top_up(store.register_customer("Покупатель", f"user{i}@example.com"), 10000)
+        return store
+    
+    def test_catalog_versions(self):
+        """Тест: изменение каталога публикует новую версию, старая не меняется"""
+        store = BookStore()
+        books, version = store.books, store.catalog_version
+        store.add_book(Book("Новая", "Автор", 100, 6))
+        store.remove_book(1)
+        self.assertEqual([b.book_id for b in books], [1, 2, 3, 4, 5])
+        self.assertEqual([b.book_id for b in store.books], [2, 3, 4, 5, 6])
+        self.assertEqual(store.catalog_version, version + 2)
+        with self.assertRaises(BookStoreException):
+            store.add_books([Book("А", "Б", 1, 7), Book("В", "Г", 1, 2)])
+        self.assertNotIn(7, [b.book_id for b in store.books])
+    
+    def test_library_is_immutable(self):
+        """Тест: снимок библиотеки покупателя не меняется после покупки"""
+        store = self._make_store()
+        customer = store.get_customer("user1@example.com")
+        store.purchase(customer, store.get_book(1))
+        library = customer.library()
+        store.purchase(customer, store.get_book(2))
+        self.assertEqual([b.book_id for b in library], [1])
+    
+    def test_records_are_point_in_time(self):
+        """Тест: срез видит состояние на момент создания"""
+        for columnar in (False, True):
+            store = self._make_store(columnar=columnar)
+            with store.read_snapshot() as snapshot:
+                store.buy_many("user3@example.com", [1, 2])
+                store.top_up(store.get_customer("user4@example.com"), 5)
+                store.register_customer("Новый", "new@example.com")
+                store.add_book(Book("Новая", "Автор", 100, 6))
+                records = {r['email']: r for r in snapshot.records()}
+            self.assertEqual(len(records), 20)
+            self.assertEqual(records["user3@example.com"]['purchased'], [])
+            self.assertEqual(records["user4@example.com"]['balance'], 10000)
+            self.assertEqual(len(snapshot.books), 5)
+            self.assertEqual(store._snapshots, ())
+    
+    def test_lazy_records_survive_compaction(self):
+        """Тест: ленивые записи среза читаются из файла на момент среза"""
+        filename = os.path.join(self.tmp.name, "data.json")
+        self._make_store().save_to_json(filename)
+        store = BookStore()
+        store.load_from_json(filename, lazy=True)
+        store.open_journal(filename)
+        with store.read_snapshot() as snapshot:
+            store.top_up(store.get_customer("user5@example.com"), 1)
+            store.compact()
+            records = {r['email']: r for r in snapshot.records()}
+        store.close_journal()
+        self.assertEqual(records["user5@example.com"]['balance'], 10000)
+        self.assertEqual(records["user6@example.com"]['balance'], 10000)
+    
+    def test_export_during_purchases_is_consistent(self):
+        """Тест: экспорт во время покупок не видит половину операции"""
+        store = self._make_store()
+        stop = False
+        
+        def buyer():
+            n = 0
+            while not stop:
+                try:
+                    store.buy_many(f"user{n % 20}@example.com", [1, 2])
+                except BookStoreException:
+                    pass
+                n += 1
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(buyer) for _ in range(2)]
+            filename = os.path.join(self.tmp.name, "export.json")
+            for _ in range(5):
+                store.save_to_json(filename)
+                with open(filename, encoding='utf-8') as f:
+                    for record in json.load(f)['customers']:
+                        spent = sum(store.get_book(book_id).price for book_id in record['purchased'])
+                        self.assertEqual(record['balance'] + spent, 10000)
+            stop = True
+            for future in futures:
+                future.result()
+
+
+class TestCatalogPaging(unittest.TestCase):
+    """Тесты для постраничного вывода каталога"""
+    
+    def setUp(self):
+        self.store = BookStore()
+    
+    def _ids(self, books):
+        return [book.book_id for book in books]
+    
+    def test_pages_and_sorting(self):
+        """Тест: страницы в порядке каталога и по индексам сортировки"""
+        self.assertEqual(self._ids(self.store.list_books(1, 2)), [2, 3])
+        self.assertEqual(self._ids(self.store.list_books(0, 3, sort="price")), [4, 3, 2])
+        self.assertEqual(self._ids(self.store.list_books(0, 2, sort="-price")), [1, 5])
+        self.assertEqual(self._ids(self.store.list_books(3, 10, sort="-price")), [3, 4])
+        self.assertEqual(self._ids(self.store.list_books(0, 5, sort="author")), [4, 5, 1, 2, 3])
+        self.assertEqual(self.store.list_books(10, 5, sort="-title"), [])
+        with self.assertRaises(ValueError):
+            self.store.list_books(sort="rating")
+    
+    def test_index_follows_catalog_version(self):
+        """Тест: отсортированный индекс перестраивается после изменения каталога"""
+        self.store.list_books(sort="price")
+        self.store.add_book(Book("Дешёвая", "Автор", 1, 6))
+        self.assertEqual(self._ids(self.store.list_books(0, 1, sort="price")), [6])
+        self.store.remove_book(6)
+        self.assertEqual(self._ids(self.store.list_books(0, 1, sort="price")), [4])
+    
+    def test_mmap_catalog(self):
+        """Тест: страницы двоичного каталога"""
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "catalog.bin")
+            self.store.compile_catalog(filename)
+            store = BookStore(catalog_file=filename)
+            self.assertEqual(self._ids(store.list_books(3, 5)), [4, 5])
+            self.assertEqual(self._ids(store.list_books(0, 1, sort="-price")), [1])
+            store.books.close()
+    
+    def test_page_is_written_once(self):
+        """Тест: страница выводится одним вызовом write"""
+        for i in range(6, 60):
+            self.store.add_book(Book(f"Книга {i}", "Автор", 100 + i, i))
+        writes = []
+        
+        class Output:
+            def write(self, text):
+                writes.append(text)
+            
+            def flush(self):
+                pass
+        
+        with redirect_stdout(Output()):
+            self.store.show_books(20, 20, sort="price")
+        self.assertEqual(len(writes), 1)
+        self.assertIn("Показаны 21-40 из 59", writes[0])
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    """Тесты для двоичного снимка"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BookStore()
+        for i in range(30):
+            customer = self.store.register_customer(f"Покупатель {i % 3}", f"user{i}@example.com")
+            self.store.top_up(customer, 2000.5 + i)
+            self.store.buy_many(customer.email, [1 + i % 5, 2])
+        self.filename = os.path.join(self.tmp.name, "data.bin")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _records(self, store):
+        return sorted(store._iter_customer_records(), key=lambda r: r['email'])
+    
+    def test_round_trip(self):
+        """Тест: двоичный снимок восстанавливает тех же покупателей"""
+        self.store.save_to_binary(self.filename)
+        loaded = BookStore()
+        loaded.load_from_binary(self.filename)
+        self.assertEqual(self._records(loaded), self._records(self.store))
+        self.assertEqual(loaded.stats.top_sellers(1), [(2, 36)])
+        
+        with BinarySnapshot(self.filename) as snapshot:
+            self.assertEqual(len(snapshot), 30)
+            self.assertEqual(len(snapshot.names), 3)
+            self.assertEqual([b.book_id for b in snapshot.books], [1, 2, 3, 4, 5])
+    
+    def test_email_index(self):
+        """Тест: поиск по встроенному индексу email"""
+        self.store.save_to_binary(self.filename)
+        with BinarySnapshot(self.filename) as snapshot:
+            record = snapshot.get("user17@example.com")
+            self.assertEqual(record['balance'], 2017.5 - 399 - 450)
+            self.assertIsNone(snapshot.get("nobody@example.com"))
+        
+        self.store.save_to_binary(self.filename, email_index=False)
+        with BinarySnapshot(self.filename) as snapshot:
+            with self.assertRaises(BookStoreException):
+                snapshot.get("user17@example.com")
+    
+    def test_convert_json(self):
+        """Тест: перевод JSON -> двоичный -> JSON без потерь"""
+        json_file = os.path.join(self.tmp.name, "data.json")
+        back_file = os.path.join(self.tmp.name, "back.json")
+        self.store.save_to_json(json_file)
+        convert_snapshot(json_file, self.filename)
+        convert_snapshot(self.filename, back_file)
+        with open(json_file, encoding='utf-8') as a, open(back_file, encoding='utf-8') as b:
+            self.assertEqual(json.load(a), json.load(b))
+    
+    def test_journal_and_delta(self):
+        """Тест: журнал и .delta работают поверх двоичного снимка"""
+        store = BookStore()
+        store.load_snapshot(self.filename)
+        store.open_journal(self.filename)
+        store.top_up(store.register_customer("Иван", "ivan@example.com"), 100)
+        store.compact()
+        store.top_up(store.get_customer("ivan@example.com"), 5)
+        store.save_changes()
+        store.top_up(store.get_customer("ivan@example.com"), 7)
+        store.close_journal()
+        
+        loaded = BookStore()
+        loaded.load_snapshot(self.filename)
+        self.assertEqual(loaded.get_customer("ivan@example.com").balance, 112)
+        with BinarySnapshot(self.filename) as snapshot:
+            self.assertEqual(len(snapshot), 1)
+    
+    def test_rejects_foreign_file(self):
+        """Тест: файл другого формата не принимается за снимок"""
+        with open(self.filename, 'wb') as f:
+            f.write(b'\0' * 100)
+        with self.assertRaises(BookStoreException):
+            BinarySnapshot(self.filename)
+
+
+@unittest.skipIf(bookstore_http is None, "aiohttp не установлен")
+class TestHttpFrontend(unittest.IsolatedAsyncioTestCase):
+    """Тесты для HTTP-сервиса"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        store = BookStore()
+        store.open_journal(os.path.join(self.tmp.name, "data.json"))
+        self.client = TestClient(TestServer(bookstore_http.create_app(store)))
+        await self.client.start_server()
+    
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.tmp.cleanup()
+    
+    async def _post(self, path, payload):
+        response = await self.client.post(path, json=payload)
+        return response.status, await response.json()
+    
+    async def test_catalog_and_search(self):
+        """Тест: каталог и поиск"""
+        response = await self.client.get("/books", params={"offset": 1, "limit": 2})
+        data = await response.json()
+        self.assertEqual(data["total"], 5)
+        self.assertEqual([b["id"] for b in data["books"]], [2, 3])
+        
+        response = await self.client.get("/books", params={"sort": "-price", "limit": 1})
+        self.assertEqual([b["id"] for b in (await response.json())["books"]], [1])
+        response = await self.client.get("/books", params={"sort": "rating"})
+        self.assertEqual(response.status, 400)
+        
+        response = await self.client.get("/search", params={"q": "оруэлл"})
+        self.assertEqual([b["id"] for b in (await response.json())["books"]], [4])
+    
+    async def test_purchase_flow(self):
+        """Тест: регистрация, пополнение и покупка"""
+        status, _ = await self._post("/customers", {"name": "Иван", "email": "ivan@example.com"})
+        self.assertEqual(status, 201)
+        status, customer = await self._post("/customers/ivan@example.com/balance", {"amount": 1000})
+        self.assertEqual(customer["balance"], 1000)
+        status, result = await self._post("/customers/ivan@example.com/purchases", {"book_ids": [1, 4]})
+        self.assertEqual(status, 200)
+        self.assertEqual(result["customer"]["balance"], 51)
+        self.assertEqual(result["customer"]["purchased"], [1, 4])
+        
+        status, error = await self._post("/customers/ivan@example.com/purchases", {"book_ids": [2]})
+        self.assertEqual(status, 400)
+        self.assertIn("Недостаточно средств", error["error"])
+    
+    async def test_errors(self):
+        """Тест: ошибки возвращаются в JSON"""
+        status, _ = await self._post("/login", {"email": "nobody@example.com"})
+        self.assertEqual(status, 404)
+        await self._post("/customers", {"name": "Иван", "email": "ivan@example.com"})
+        status, _ = await self._post("/customers", {"name": "Иван", "email": "ivan@example.com"})
+        self.assertEqual(status, 400)
+        response = await self.client.get("/books/999")
+        self.assertEqual(response.status, 404)
+    
+    async def test_bad_input_is_400(self):
+        """Тест: некорректные параметры и тела запросов - 400 с JSON, а не 500"""
+        response = await self.client.get("/search", params={"q": "оруэлл", "limit": "abc"})
+        self.assertEqual(response.status, 400)
+        self.assertIn("limit", (await response.json())["error"])
+        await self._post("/customers", {"name": "Иван", "email": "ivan@example.com"})
+        for path, payload in (
+                ("/customers", [1]),
+                ("/customers", {"name": "Иван", "email": ["x"]}),
+                ("/login", [1]),
+                ("/login", {"email": {}}),
+                ("/customers/ivan@example.com/balance", [1]),
+                ("/customers/ivan@example.com/balance", {}),
+                ("/customers/ivan@example.com/balance", {"amount": "100"}),
+                ("/customers/ivan@example.com/balance", {"amount": True}),
+                ("/customers/ivan@example.com/purchases", [1]),
+                ("/customers/ivan@example.com/purchases", {"book_ids": [[1]]}),
+                ("/customers/ivan@example.com/purchases", {"book_ids": [True]})):
+            with self.subTest(path=path, payload=payload):
+                status, error = await self._post(path, payload)
+                self.assertEqual(status, 400)
+                self.assertIn("error", error)
+        # json.dumps в клиенте не пишет NaN и Infinity как строки - отправляем текст
+        for amount in ("NaN", "Infinity", "-Infinity"):
+            with self.subTest(amount=amount):
+                response = await self.client.post("/customers/ivan@example.com/balance",
+                                                  data='{"amount": %s}' % amount,
+                                                  headers={"Content-Type": "application/json"})
+                self.assertEqual(response.status, 400)
+                self.assertIn("error", await response.json())
+        response = await self.client.get("/customers/ivan@example.com")
+        self.assertEqual((await response.json())["balance"], 0)
+
+
+def run_tests():
+    """Запуск всех тестов с красивым выводом"""
+    print("\n" + "="*70)
+    print("ЗАПУСК UNIT-ТЕСТОВ")
+    print("="*70 + "\n")
+    
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestBookStoreIndexes))
+    suite.addTests(loader.loadTestsFromTestCase(TestPurchaseJournal))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingLoad))
+    suite.addTests(loader.loadTestsFromTestCase(TestXmlExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestSQLiteBookStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestCompactCustomers))
+    suite.addTests(loader.loadTestsFromTestCase(TestCatalogSearch))
+    suite.addTests(loader.loadTestsFromTestCase(TestExternalCatalog))
+    suite.addTests(loader.loadTestsFromTestCase(TestConcurrentPurchases))
+    suite.addTests(loader.loadTestsFromTestCase(TestIncrementalSave))
+    suite.addTests(loader.loadTestsFromTestCase(TestBulkImport))
+    suite.addTests(loader.loadTestsFromTestCase(TestSalesStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestReadSnapshots))
+    suite.addTests(loader.loadTestsFromTestCase(TestCatalogPaging))
+    suite.addTests(loader.loadTestsFromTestCase(TestBinarySnapshot))
+    suite.addTests(loader.loadTestsFromTestCase(TestHttpFrontend))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    print("\n" + "="*70)
+    print("РЕЗУЛЬТАТЫ")
+    print("="*70)
+    print(f"Всего тестов: {result.testsRun}")
+    print(f" Успешно: {result.testsRun - len(result.failures) - len(result.errors)}")
+    print(f" Провалено: {len(result.failures)}")
+    print(f" Ошибки: {len(result.errors)}")
+    
+    if result.wasSuccessful():
+        print("\n ВСЕ ТЕСТЫ ПРОЙДЕНЫ!")
+    else:
+        print("\n ЕСТЬ ПРОВАЛЕННЫЕ ТЕСТЫ")
+    
+    print("="*70 + "\n")
+    
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,468 @@
+"""
+Замеры производительности PhoneValidator.
+
+Запуск: python lab2/bench_phone_validator.py parse --phones 200000
+
+parse - проверка, нормализация и разбор каждого номера:
+    separate - прежний вариант: три отдельных вызова, каждый со своим
+               re.match/re.sub по строке шаблона
+    parse    - один PhoneValidator.parse на номер
+    wrappers - validate_russian_phone + normalize_phone + extract_parts
+               (обёртки над parse с заранее скомпилированными шаблонами)
+    batch    - validate_many + normalize_many + extract_parts_many
+
+Пример (Python 3.11, 200 000 номеров):
+    separate  ~ 190 тыс. номеров/с
+    parse     ~ 550 тыс. номеров/с
+    wrappers  ~ 190 тыс. номеров/с (три разбора на номер, как и раньше)
+    batch     ~ 330 тыс. номеров/с
+
+file - поиск номеров в файле: чтение целиком, потоково блоками и через mmap,
+    время и пиковая память Python (tracemalloc):
+    python lab2/bench_phone_validator.py file --megabytes 200
+    Пример (50 МБ, ~430 тыс. номеров):
+        whole   ~ 1.4 с, пик ~ 196 МБ
+        chunks  ~ 1.6 с, пик ~  15 МБ (блоки по 1 млн символов)
+        mmap    ~ 1.7 с, пик < 1 МБ (страницы файла в кэше ОС)
+
+tree - просмотр дерева каталогов (scan_directory) при разном числе процессов:
+    python lab2/bench_phone_validator.py tree --files 20000 --megabytes 200
+    Файлы делятся между процессами, большие - по диапазонам байтов, так что
+    скорость растёт с числом ядер; на одном ядре пул лишь добавляет накладные
+    расходы на передачу заданий.
+
+engines - find_phones_in_text: регулярное выражение и PhoneStateMachine
+    на обычном журнале и на неудобных для шаблона данных:
+    python lab2/bench_phone_validator.py engines --megabytes 5
+    Пример (5 МБ):
+        журнал         regex 0.18 с   fsm 1.0 с
+        ряды цифр      regex 0.17 с   fsm 7.4 с
+        почти номера   regex 0.30 с   fsm 3.6 с
+    Шаблон без вложенных повторов, поэтому регулярное выражение и так
+    работает за линейное время (не больше 18 символов на попытку), а его
+    цикл на C быстрее цикла автомата на Python. Автомат читает каждый символ
+    один раз и полезен как независимая проверка и основа для переноса в C.
+
+crawl - обход локального сайта phone_crawler.crawl (нужен aiohttp):
+    python lab2/bench_phone_validator.py crawl --pages 500 --delay 20
+    Сервер в том же процессе отвечает с задержкой delay мс; страницы
+    ссылаются друг на друга, на каждой несколько номеров.
+    Пример (500 страниц, 20 мс):
+        1 запрос к хосту     ~   46 страниц/с
+        4                    ~  170 страниц/с
+        16                   ~  500 страниц/с
+        64                   ~ 1150 страниц/с
+
+phoneset - удаление повторов: set строк и PhoneSet (массив и битовая карта),
+    память (tracemalloc) и время добавления номеров с повторами:
+    python lab2/bench_phone_validator.py phoneset --phones 1000000
+    Пример (1 000 000 номеров 9XX, 666 тыс. различных):
+        set(str)  920 тыс. элементов (записи в разных форматах), ~37 байт/номер
+                  без учёта самих строк (~60 байт каждая), 0.2 с
+        PhoneSet  666 тыс., 8 байт/номер, ~5 с (в основном normalize_phone)
+        bitmap    666 тыс., 121 МБ: страницы 9XX заполнены почти все, ~4 с
+    Для миллиардов номеров битовая карта не превышает 1.25 ГБ, отсортированный
+    массив - 8 байт на различный номер.
+
+array - нормализация столбца номеров: normalize_phone в цикле и
+    PhoneValidator.normalize_array (нужен numpy) для массивов str и bytes
+    и с результатом в виде чисел:
+    python lab2/bench_phone_validator.py array --phones 1000000
+    Пример (1 000 000 номеров):
+        loop     ~ 2.0 с
+        str      ~ 0.17 с (~10x)
+        bytes    ~ 0.19 с
+        int      ~ 0.22 с
+
+batch - phone_batch.normalize_file: CSV с номерами в текущем процессе
+    и в пуле процессов:
+    python lab2/bench_phone_validator.py batch --rows 1000000
+    Пример (1 000 000 строк, 40 МБ, одно ядро):
+        процессов 0   ~ 190 тыс. строк/с
+        процессов 1   ~ 120 тыс. строк/с
+        процессов 2-4 ~  85 тыс. строк/с
+    Разбор номера дешевле передачи блока между процессами, поэтому на одном
+    ядре пул только мешает; на нескольких ядрах главный процесс читает
+    CSV и пишет результат, а parse выполняется параллельно. Память не
+    зависит от размера файла: в работе не больше 2 * workers блоков.
+
+international - определение страны и нормализация международных номеров:
+    PhoneValidator.parse_international (CountryCodeTrie) и прежний подход -
+    по регулярному выражению на страну, проверяемых по очереди:
+    python lab2/bench_phone_validator.py international --phones 200000
+    Пример (200 000 номеров 47 стран и ~10% неизвестных кодов):
+        regex    ~ 130-160 тыс. номеров/с
+        trie     ~ 250 тыс. номеров/с
+    Перебор выражений растёт с числом стран, спуск по дереву - нет
+    (не больше длины самого длинного кода).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+
+from lab2_phone_validator import COUNTRY_RULES, PhoneSet, PhoneValidator, scan_directory
+import phone_batch
+
+
+RUSSIAN = r'^(\+7|8|7)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})$'
+FORMATS = ["+7 {} {} {} {}", "8 ({}) {}-{}-{}", "+7-{}-{}-{}-{}", "7{}{}{}{}", "{} {} {} {}"]
+
+
+def _phones(count, seed=1):
+    """Смесь корректных номеров разных форматов и мусора (~20%)"""
+    rng = random.Random(seed)
+    phones = []
+    for _ in range(count):
+        parts = (f"{rng.randint(900, 999)}", f"{rng.randint(0, 999):03}",
+                 f"{rng.randint(0, 99):02}", f"{rng.randint(0, 99):02}")
+        phones.append(rng.choice(FORMATS).format(*parts))
+    return phones
+
+
+def _separate(phone):
+    """Прежняя реализация: три независимых разбора строки"""
+    valid = bool(re.match(RUSSIAN, phone.strip()))
+    cleaned = re.sub(r'[^\d+]', '', phone)
+    if len(cleaned) == 10:
+        normalized = '+7' + cleaned
+    elif len(cleaned) == 11 and cleaned[0] in ['7', '8']:
+        normalized = '+7' + cleaned[1:]
+    elif len(cleaned) == 12 and cleaned.startswith('+7'):
+        normalized = cleaned
+    else:
+        normalized = None
+    match = re.match(RUSSIAN, phone.strip())
+    parts = None
+    if match:
+        country, operator, part1, part2, part3 = match.groups()
+        parts = {'country_code': '+7', 'operator': operator, 'number': f"{part1}{part2}{part3}"}
+    return valid, normalized, parts
+
+
+def bench_parse(count):
+    phones = _phones(count)
+    
+    def separate():
+        for phone in phones:
+            _separate(phone)
+    
+    def parse():
+        for phone in phones:
+            PhoneValidator.parse(phone)
+    
+    def wrappers():
+        for phone in phones:
+            PhoneValidator.validate_russian_phone(phone)
+            PhoneValidator.normalize_phone(phone)
+            PhoneValidator.extract_parts(phone)
+    
+    def batch():
+        PhoneValidator.validate_many(phones)
+        PhoneValidator.normalize_many(phones)
+        PhoneValidator.extract_parts_many(phones)
+    
+    print(f"Номеров: {count}")
+    for label, run in (("separate", separate), ("parse", parse), ("wrappers", wrappers), ("batch", batch)):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:9} {count / elapsed:12.0f} номеров/с  {elapsed:6.2f} с")
+
+
+def _write_log(filename, megabytes, seed=1):
+    """Журнал звонков: строки с номерами вперемешку с текстом"""
+    lines = [f"2024-05-{i % 28 + 1:02} звонок от клиента, номер {phone}, оператор №{i % 40}\n"
+             for i, phone in enumerate(_phones(10000, seed))]
+    block = "".join(lines).encode('utf-8')
+    with open(filename, 'wb') as f:
+        for _ in range(max(1, megabytes * 2 ** 20 // len(block))):
+            f.write(block)
+
+
+def bench_file(megabytes):
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "calls.log")
+        _write_log(filename, megabytes)
+        print(f"Файл: {os.path.getsize(filename) / 2 ** 20:.0f} МБ")
+        
+        def whole():
+            with open(filename, encoding='utf-8') as f:
+                return len(PhoneValidator.find_phones_in_text(f.read()))
+        
+        def chunks():
+            return sum(1 for _ in PhoneValidator.iter_phones_in_file(filename))
+        
+        def mapped():
+            return sum(1 for _ in PhoneValidator.iter_phones_in_file(filename, use_mmap=True))
+        
+        for label, run in (("whole", whole), ("chunks", chunks), ("mmap", mapped)):
+            start = time.perf_counter()
+            found = run()
+            elapsed = time.perf_counter() - start
+            # Память - отдельным прогоном: tracemalloc сильно замедляет выделения
+            tracemalloc.start()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {label:7} {found:9} номеров  {elapsed:6.2f} с  пик {peak / 2 ** 20:8.1f} МБ")
+
+
+def bench_tree(files, megabytes):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Один большой файл на половину объёма и много мелких на остальное
+        _write_log(os.path.join(tmp, "big.log"), megabytes // 2)
+        small = max(1, (megabytes - megabytes // 2) * 2 ** 20 // files)
+        block = "".join(f"контакт {phone}\n" for phone in _phones(200)).encode('utf-8')
+        for i in range(files):
+            directory = os.path.join(tmp, f"d{i % 100:02}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"f{i}.txt"), 'wb') as f:
+                f.write((block * (small // len(block) + 1))[:small])
+        print(f"Файлов: {files + 1}, {megabytes} МБ, ядер: {os.cpu_count()}")
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            report = scan_directory(tmp, workers, range_size=16 << 20)
+            elapsed = time.perf_counter() - start
+            print(f"  процессов {workers}: {report.bytes_scanned / 2 ** 20 / elapsed:8.1f} МБ/с"
+                  f"  {elapsed:6.2f} с  номеров {report.matches}, различных {len(report.phones)}")
+
+
+def bench_engines(megabytes):
+    size = megabytes * 2 ** 20
+    log = "".join(f"2024-05-01 звонок от клиента, номер {phone}, оператор №{i % 40}\n"
+                  for i, phone in enumerate(_phones(10000)))
+    corpora = (
+        ("журнал", log),
+        ("ряды цифр", "7" * 200 + " "),
+        ("почти номера", "8 999 123 45 6 "),
+        ("скобки", "+7(+7(8(+8 ("),
+    )
+    print(f"Объём каждого текста: {megabytes} МБ")
+    for label, unit in corpora:
+        text = (unit * (size // len(unit) + 1))[:size]
+        times = []
+        for engine in PhoneValidator.ENGINES:
+            start = time.perf_counter()
+            found = len(PhoneValidator.find_phones_in_text(text, engine))
+            times.append(time.perf_counter() - start)
+        print(f"  {label:13} номеров {found:8}  regex {times[0]:6.2f} с  fsm {times[1]:6.2f} с")
+
+
+async def _crawl_site(pages, delay, per_host_values):
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from phone_crawler import crawl
+    
+    phones = _phones(pages * 3)
+    
+    async def page(request):
+        i = int(request.match_info["i"])
+        await asyncio.sleep(delay / 1000)
+        links = "".join(f'<a href="/p/{(i * 7 + k) % pages}">ссылка</a> ' for k in range(1, 11))
+        body = "".join(f"<p>Отдел {k}: {phones[i * 3 + k]}</p>" for k in range(3))
+        return web.Response(text=f"<html><body>{links}{body}{'текст ' * 500}</body></html>",
+                            content_type="text/html")
+    
+    app = web.Application()
+    app.router.add_get("/p/{i}", page)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        print(f"Страниц: {pages}, задержка ответа: {delay} мс")
+        for per_host in per_host_values:
+            result = await crawl(str(server.make_url("/p/0")), depth=pages, max_pages=pages,
+                                 per_host=per_host, concurrency=max(per_host, 1))
+            print(f"  запросов к хосту {per_host:3}: {result.pages_per_second:8.1f} страниц/с"
+                  f"  страниц {len(result.pages)}, номеров {len(result.phones)}")
+    finally:
+        await server.close()
+
+
+def bench_crawl(pages, delay):
+    asyncio.run(_crawl_site(pages, delay, (1, 4, 16, 64)))
+
+
+def bench_phoneset(count):
+    rng = random.Random(1)
+    # Мобильные номера 9XX, около трети - повторы в другом формате
+    codes = [9 * 10 ** 9 + rng.randrange(10 ** 9) for _ in range(count * 2 // 3)]
+    codes += rng.choices(codes, k=count - len(codes))
+    rng.shuffle(codes)
+    phones = [rng.choice(FORMATS).format(str(c)[:3], str(c)[3:6], str(c)[6:8], str(c)[8:])
+              for c in codes]
+    print(f"Номеров: {count}, различных: {len(set(codes))}")
+    
+    def raw_strings():
+        return set(phones)
+    
+    def sorted_codes():
+        result = PhoneSet(phones)
+        len(result)
+        return result
+    
+    def bitmap():
+        return PhoneSet(phones, bitmap=True)
+    
+    for label, build in (("set(str)", raw_strings), ("PhoneSet", sorted_codes), ("bitmap", bitmap)):
+        start = time.perf_counter()
+        built = build()
+        elapsed = time.perf_counter() - start
+        del built
+        tracemalloc.start()
+        built = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {label:9} элементов {len(built):9}  {current / 2 ** 20:8.1f} МБ"
+              f"  {current / len(built):6.1f} байт/номер  {elapsed:6.2f} с")
+        del built
+
+
+def bench_array(count):
+    import numpy as np
+    
+    phones = _phones(count)
+    strings = np.array(phones)
+    encoded = np.array([phone.encode('ascii') for phone in phones])
+    print(f"Номеров: {count}")
+    for label, run in (
+            ("loop", lambda: [PhoneValidator.normalize_phone(phone) for phone in phones]),
+            ("str", lambda: PhoneValidator.normalize_array(strings)),
+            ("bytes", lambda: PhoneValidator.normalize_array(encoded)),
+            ("int", lambda: PhoneValidator.normalize_array(strings, as_int=True))):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:9} {count / elapsed:12.0f} номеров/с  {elapsed:6.2f} с")
+
+
+def bench_batch(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "contacts.csv")
+        output = os.path.join(tmp, "out.csv")
+        with open(source, 'w', encoding='utf-8', newline='') as f:
+            f.write("id,name,phone\n")
+            for i, phone in enumerate(_phones(rows)):
+                f.write(f"{i},Абонент {i % 1000},{phone}\n")
+        print(f"Строк: {rows}, файл {os.path.getsize(source) / 2 ** 20:.1f} МБ")
+        for workers in (0, 1, 2, 4):
+            result = phone_batch.normalize_file(source, output, workers=workers)
+            print(f"  процессов {workers}: {result.rows_per_second:10.0f} строк/с  {result.elapsed:6.2f} с")
+
+
+def _international(count, seed=1):
+    """Номера всех стран COUNTRY_RULES в разных записях и ~10% неизвестных кодов"""
+    rng = random.Random(seed)
+    phones = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            phones.append(f"+{rng.choice(('999', '888', '0'))} {rng.randrange(10 ** 8)}")
+            continue
+        rule = rng.choice(COUNTRY_RULES)
+        length = rng.choice(rule.lengths)
+        national = rng.choice(rule.prefixes) + "".join(rng.choice("0123456789") for _ in range(length))
+        national = national[:length]
+        separator = rng.choice(" -.")
+        parts = [national[i:i + 3] for i in range(0, length, 3)]
+        phones.append(f"{rng.choice(('+', '00'))}{rule.code} {separator.join(parts)}")
+    return phones
+
+
+def _regex_per_country():
+    """Прежний подход: по регулярному выражению на страну, проверка по очереди"""
+    patterns = []
+    # Правила с началом номера - раньше общих (Казахстан раньше России)
+    for rule in sorted(COUNTRY_RULES, key=lambda rule: -len(rule.prefixes[0])):
+        prefixes = "|".join(rule.prefixes)
+        lengths = "|".join(rf"\d{{{length}}}" for length in rule.lengths)
+        patterns.append((rule, re.compile(rf"(?:\+|00){rule.code}((?=(?:{prefixes})){lengths})")))
+    separators = re.compile(r"[\s\-().]")
+    
+    def classify(phone):
+        cleaned = separators.sub("", phone)
+        for rule, pattern in patterns:
+            match = pattern.fullmatch(cleaned)
+            if match:
+                return rule.region, f"+{rule.code}{match.group(1)}"
+        return None, None
+    
+    return classify
+
+
+def bench_international(count):
+    phones = _international(count)
+    classify = _regex_per_country()
+    parse = PhoneValidator.parse_international
+    print(f"Номеров: {count}, стран: {len(COUNTRY_RULES)}")
+    results = {}
+    for label, run in (("regex", lambda: [classify(phone) for phone in phones]),
+                       ("trie", lambda: [(parsed.region, parsed.e164) if parsed.valid else (None, None)
+                                         for parsed in map(parse, phones)])):
+        start = time.perf_counter()
+        results[label] = run()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:9} {count / elapsed:12.0f} номеров/с  {elapsed:6.2f} с")
+    print(f"  результаты совпадают: {results['regex'] == results['trie']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности PhoneValidator")
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+    
+    parse = subparsers.add_parser("parse", help="проверка, нормализация и разбор номеров")
+    parse.add_argument("--phones", type=int, default=200000)
+    
+    file = subparsers.add_parser("file", help="поиск номеров в большом файле")
+    file.add_argument("--megabytes", type=int, default=200)
+    
+    tree = subparsers.add_parser("tree", help="просмотр дерева каталогов в пуле процессов")
+    tree.add_argument("--files", type=int, default=20000)
+    tree.add_argument("--megabytes", type=int, default=200)
+    
+    engines = subparsers.add_parser("engines", help="регулярное выражение и конечный автомат")
+    engines.add_argument("--megabytes", type=int, default=5)
+    
+    crawl = subparsers.add_parser("crawl", help="асинхронный обход локального сайта")
+    crawl.add_argument("--pages", type=int, default=500)
+    crawl.add_argument("--delay", type=int, default=20, help="задержка ответа сервера, мс")
+    
+    phoneset = subparsers.add_parser("phoneset", help="память и скорость PhoneSet")
+    phoneset.add_argument("--phones", type=int, default=1000000)
+    
+    array = subparsers.add_parser("array", help="нормализация столбца номеров через numpy")
+    array.add_argument("--phones", type=int, default=1000000)
+    
+    batch = subparsers.add_parser("batch", help="пакетная нормализация CSV в пуле процессов")
+    batch.add_argument("--rows", type=int, default=1000000)
+    
+    international = subparsers.add_parser("international", help="определение страны: дерево кодов и regex")
+    international.add_argument("--phones", type=int, default=200000)
+    
+    args = parser.parse_args()
+    if args.bench == "parse":
+        bench_parse(args.phones)
+    elif args.bench == "file":
+        bench_file(args.megabytes)
+    elif args.bench == "tree":
+        bench_tree(args.files, args.megabytes)
+    elif args.bench == "engines":
+        bench_engines(args.megabytes)
+    elif args.bench == "crawl":
+        bench_crawl(args.pages, args.delay)
+    elif args.bench == "phoneset":
+        bench_phoneset(args.phones)
+    elif args.bench == "array":
+        bench_array(args.phones)
+    elif args.bench == "batch":
+        bench_batch(args.rows)
+    elif args.bench == "international":
+        bench_international(args.phones)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,275 @@
 # Лабораторная работа №2
 # Регулярные выражения: Проверка номеров телефона
 
+import argparse
+import asyncio
+import csv
+import mmap
+import os
 import re
-from typing import List, Optional
+import stat
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class ParsedPhone(NamedTuple):
+    """Результат PhoneValidator.parse: всё, что известно о номере, за один разбор"""
+    valid: bool                        # номер в российском формате
+    e164: Optional[str]                # +7XXXXXXXXXX (как normalize_phone)
+    operator: Optional[str]            # код оператора, если номер корректен
+    subscriber: Optional[str]          # номер абонента (7 цифр)
+    span: Optional[Tuple[int, int]]    # границы номера в исходной строке
+
+
+class _CharClasses(dict):
+    """
+    Таблица для str.translate: символ -> класс для PhoneStateMachine
+    
+    Классы вычисляются при первой встрече символа и запоминаются, так что
+    дальше перевод текста в строку классов идёт целиком на C.
+    """
+    
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        if char in '78':
+            cls = 'a'           # код страны: [78]
+        elif char.isdecimal():
+            cls = 'd'           # любая цифра (\d)
+        elif char == '+':
+            cls = 'p'
+        elif char.isspace() or char == '-':
+            cls = 's'           # разделитель [\s\-]
+        elif char == '(':
+            cls = 'o'
+        elif char == ')':
+            cls = 'c'
+        else:
+            cls = 'x'
+        self[code] = cls
+        return cls
+
+
+class PhoneStateMachine:
+    """
+    Детерминированный автомат для поиска российских номеров за один проход
+    
+    Распознаёт то же, что PhoneValidator.PATTERNS['russian']. Каждый
+    необязательный элемент шаблона однозначно определяется следующим
+    символом, поэтому разбор с одной начальной позиции - цепочка
+    состояний без вариантов. Автомат ведёт одновременно все начатые
+    разборы (не больше длины номера) и отдаёт совпадения с тем же
+    приоритетом, что и регулярное выражение: раньше начавшееся побеждает,
+    следующий поиск - с конца найденного. Ни один символ не читается дважды.
+    """
+    
+    ACCEPT = 18
+    # Состояние -> {класс символа: следующее состояние}
+    TRANSITIONS = (
+        {'p': 1, 'a': 2},                   # 0: начало
+        {'a': 2},                           # 1: после +
+        {'s': 3, 'o': 4, 'a': 5, 'd': 5},   # 2: после 7/8
+        {'o': 4, 'a': 5, 'd': 5},           # 3: после разделителя
+        {'a': 5, 'd': 5},                   # 4: после (
+        {'a': 6, 'd': 6},                   # 5: 1-я цифра кода оператора
+        {'a': 7, 'd': 7},                   # 6: 2-я цифра
+        {'c': 8, 's': 9, 'a': 10, 'd': 10}, # 7: 3-я цифра
+        {'s': 9, 'a': 10, 'd': 10},         # 8: после )
+        {'a': 10, 'd': 10},                 # 9: после разделителя
+        {'a': 11, 'd': 11},                 # 10: 1-я цифра из трёх
+        {'a': 12, 'd': 12},                 # 11: 2-я цифра
+        {'s': 13, 'a': 14, 'd': 14},        # 12: 3-я цифра
+        {'a': 14, 'd': 14},                 # 13: после разделителя
+        {'a': 15, 'd': 15},                 # 14: 1-я цифра из двух
+        {'s': 16, 'a': 17, 'd': 17},        # 15: 2-я цифра
+        {'a': 17, 'd': 17},                 # 16: после разделителя
+        {'a': ACCEPT, 'd': ACCEPT},         # 17: 1-я цифра последней пары
+    )
+    _CLASSES = _CharClasses()
+    _START = re.compile('[pa]')
+    
+    @staticmethod
+    def spans(text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Перечисляет границы номеров в тексте
+        
+        Args:
+            text: Текст для поиска
+        
+        Yields:
+            Tuple[int, int]: (начало, конец) каждого номера, как у re.finditer
+        """
+        classes = text.translate(PhoneStateMachine._CLASSES)
+        transitions = PhoneStateMachine.TRANSITIONS
+        first = transitions[0]
+        accept = PhoneStateMachine.ACCEPT
+        search_start = PhoneStateMachine._START.search
+        # Начатые разборы в порядке начала: [начало, состояние, конец]
+        threads = []
+        position, length = 0, len(classes)
+        while position < length:
+            if not threads:
+                # Нет начатых разборов - переходим к ближайшему символу + или 7/8
+                found = search_start(classes, position)
+                if found is None:
+                    return
+                position = found.start()
+            cls = classes[position]
+            advanced = []
+            states = set()
+            for thread in threads:
+                state = thread[1]
+                if state != accept:
+                    state = transitions[state].get(cls)
+                    if state is None or state in states:
+                        # Разбор оборвался, или раньше начатый пришёл в то же состояние
+                        continue
+                    thread[1] = state
+                    if state == accept:
+                        thread[2] = position + 1
+                    else:
+                        states.add(state)
+                advanced.append(thread)
+            state = first.get(cls)
+            if state is not None and state not in states:
+                advanced.append([position, state, None])
+            threads = advanced
+            position += 1
+            # Раньше всех начатый разбор завершён - это совпадение
+            while threads and threads[0][1] == accept:
+                start, _, end = threads[0]
+                yield start, end
+                threads = [thread for thread in threads if thread[0] >= end]
+        # Текст кончился: незавершённые разборы отпадают
+        threads = [thread for thread in threads if thread[1] == accept]
+        while threads:
+            start, _, end = threads[0]
+            yield start, end
+            threads = [thread for thread in threads if thread[0] >= end]
+
+
+class CountryRule(NamedTuple):
+    """Правила номеров одной страны (или зоны с общим кодом)"""
+    region: str                         # код ISO 3166 (для +1 - зона NANP, обозначена US)
+    code: str                           # телефонный код страны без +
+    lengths: Tuple[int, ...]            # допустимые длины национального номера
+    groups: Tuple[int, ...]             # разбивка национального номера для вывода
+    prefixes: Tuple[str, ...] = ('',)   # начальные цифры национального номера (для общих кодов)
+
+
+class InternationalPhone(NamedTuple):
+    """Результат PhoneValidator.parse_international"""
+    valid: bool                         # код страны известен и длина номера допустима
+    region: Optional[str]               # страна по коду (и началу номера для общих кодов)
+    calling_code: Optional[str]         # телефонный код страны без +
+    national: Optional[str]             # национальный номер (цифры после кода)
+    e164: Optional[str]                 # +<код><номер> для корректного номера
+    formatted: Optional[str]            # '+<код> <группы цифр>' для корректного номера
+
+
+# Коды стран и длины национальных номеров (по плану нумерации ITU-T E.164).
+# Страны с общим кодом различаются началом национального номера:
+# +7 6XX и +7 7XX - Казахстан, остальные +7 - Россия.
+COUNTRY_RULES = (
+    CountryRule('US', '1', (10,), (3, 3, 4)),
+    CountryRule('RU', '7', (10,), (3, 3, 2, 2)),
+    CountryRule('KZ', '7', (10,), (3, 3, 2, 2), ('6', '7')),
+    CountryRule('EG', '20', (8, 9, 10), (2, 4, 4)),
+    CountryRule('ZA', '27', (9,), (2, 3, 4)),
+    CountryRule('GR', '30', (10,), (3, 3, 4)),
+    CountryRule('NL', '31', (9,), (1, 4, 4)),
+    CountryRule('BE', '32', (8, 9), (3, 2, 2, 2)),
+    CountryRule('FR', '33', (9,), (1, 2, 2, 2, 2)),
+    CountryRule('ES', '34', (9,), (3, 3, 3)),
+    CountryRule('HU', '36', (8, 9), (2, 3, 4)),
+    CountryRule('IT', '39', (6, 7, 8, 9, 10, 11), (3, 3, 4)),
+    CountryRule('RO', '40', (9,), (3, 3, 3)),
+    CountryRule('CH', '41', (9,), (2, 3, 2, 2)),
+    CountryRule('AT', '43', (4, 5, 6, 7, 8, 9, 10, 11, 12, 13), (3, 3, 4)),
+    CountryRule('GB', '44', (9, 10), (4, 6)),
+    CountryRule('DK', '45', (8,), (2, 2, 2, 2)),
+    CountryRule('SE', '46', (7, 8, 9), (2, 3, 2, 2)),
+    CountryRule('NO', '47', (8,), (3, 2, 3)),
+    CountryRule('PL', '48', (9,), (3, 3, 3)),
+    CountryRule('DE', '49', (6, 7, 8, 9, 10, 11), (3, 8)),
+    CountryRule('MX', '52', (10,), (2, 4, 4)),
+    CountryRule('BR', '55', (10, 11), (2, 5, 4)),
+    CountryRule('AU', '61', (9,), (1, 4, 4)),
+    CountryRule('JP', '81', (9, 10), (2, 4, 4)),
+    CountryRule('KR', '82', (9, 10), (2, 4, 4)),
+    CountryRule('CN', '86', (10, 11), (3, 4, 4)),
+    CountryRule('TR', '90', (10,), (3, 3, 2, 2)),
+    CountryRule('IN', '91', (10,), (5, 5)),
+    CountryRule('PT', '351', (9,), (3, 3, 3)),
+    CountryRule('IE', '353', (7, 8, 9), (2, 3, 4)),
+    CountryRule('FI', '358', (5, 6, 7, 8, 9, 10, 11, 12), (2, 3, 4)),
+    CountryRule('LT', '370', (8,), (3, 5)),
+    CountryRule('LV', '371', (8,), (2, 3, 3)),
+    CountryRule('EE', '372', (7, 8), (4, 4)),
+    CountryRule('MD', '373', (8,), (2, 3, 3)),
+    CountryRule('AM', '374', (8,), (2, 3, 3)),
+    CountryRule('BY', '375', (9,), (2, 3, 2, 2)),
+    CountryRule('UA', '380', (9,), (2, 3, 2, 2)),
+    CountryRule('AE', '971', (8, 9), (2, 3, 4)),
+    CountryRule('IL', '972', (8, 9), (2, 3, 4)),
+    CountryRule('TJ', '992', (9,), (2, 3, 4)),
+    CountryRule('TM', '993', (8,), (2, 6)),
+    CountryRule('AZ', '994', (9,), (2, 3, 2, 2)),
+    CountryRule('GE', '995', (9,), (3, 3, 3)),
+    CountryRule('KG', '996', (9,), (3, 3, 3)),
+    CountryRule('UZ', '998', (9,), (2, 3, 2, 2)),
+)
+
+
+class CountryCodeTrie:
+    """
+    Префиксное дерево по цифрам кодов стран
+    
+    Ключ - код страны и начало национального номера (для стран с общим
+    кодом), значение - CountryRule. Узлы хранятся в параллельных списках:
+    children[узел] - {цифра: следующий узел}, rules[узел] - правило,
+    которое заканчивается в этом узле, или None. Определение страны -
+    один спуск по цифрам номера, не зависящий от числа стран; побеждает
+    самый длинный совпавший ключ (+7 7XX - Казахстан, а не Россия).
+    """
+    
+    def __init__(self, rules: Iterable[CountryRule] = COUNTRY_RULES):
+        self.children: List[Dict[str, int]] = [{}]
+        self.rules: List[Optional[CountryRule]] = [None]
+        for rule in rules:
+            for prefix in rule.prefixes:
+                self.add(rule.code + prefix, rule)
+    
+    def add(self, key: str, rule: CountryRule):
+        """Добавляет ключ; ValueError, если ключ уже занят другим правилом"""
+        node = 0
+        for digit in key:
+            child = self.children[node].get(digit)
+            if child is None:
+                child = len(self.children)
+                self.children[node][digit] = child
+                self.children.append({})
+                self.rules.append(None)
+            node = child
+        if self.rules[node] is not None:
+            raise ValueError(f"Ключ +{key} уже занят: {self.rules[node].region}")
+        self.rules[node] = rule
+    
+    def match(self, digits: str) -> Optional[CountryRule]:
+        """Правило с самым длинным ключом, которым начинаются digits"""
+        node = 0
+        found = None
+        for digit in digits:
+            node = self.children[node].get(digit)
+            if node is None:
+                break
+            found = self.rules[node] or found
+        return found
 
 
 class PhoneValidator:
@@ -15,6 +282,68 @@ class PhoneValidator:
         'simple': r'\d{10,11}'
     }
     
+    # Скомпилированные один раз выражения (вместо разбора строки шаблона при каждом вызове)
+    _RUSSIAN_EXACT = re.compile(r'(\+7|8|7)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})')
+    _RUSSIAN_SEARCH = re.compile(PATTERNS['russian'])
+    _NOT_DIGIT_OR_PLUS = re.compile(r'[^\d+]')
+    # Тот же шаблон поиска над байтами (для mmap): только ASCII-цифры и пробелы
+    _RUSSIAN_SEARCH_BYTES = re.compile(PATTERNS['russian'].encode('ascii'))
+    # Не меньше длины самого длинного совпадения (18 символов): попытка
+    # совпадения с позиции p читает не дальше p + _MATCH_WINDOW
+    _MATCH_WINDOW = 32
+    # Размер блока при потоковом чтении файла (в символах)
+    CHUNK_SIZE = 1 << 20
+    # Движки поиска: регулярное выражение или PhoneStateMachine
+    ENGINES = ('regex', 'fsm')
+    # Коды стран для parse_international и поиск международных номеров в тексте
+    _COUNTRY_TRIE = CountryCodeTrie()
+    _INTERNATIONAL_SEARCH = re.compile(PATTERNS['international'])
+    # Символы, допустимые между цифрами международного номера (удаляются str.translate)
+    _INTERNATIONAL_SEPARATORS = str.maketrans('', '', ' -().')
+    # Наибольшее число цифр в номере E.164
+    _E164_DIGITS = 15
+    
+    @staticmethod
+    def parse(phone: str) -> ParsedPhone:
+        """
+        Разбирает номер за один проход регулярного выражения
+        
+        Для корректного номера проверка, нормализация и части номера
+        берутся из одного совпадения. Для остальных строк e164 считается
+        так же, как в normalize_phone (номер может нормализоваться,
+        не будучи корректным по формату).
+        
+        Args:
+            phone: Строка с номером телефона
+        
+        Returns:
+            ParsedPhone: Неизменяемая запись с результатами разбора
+        """
+        stripped = phone.strip()
+        match = PhoneValidator._RUSSIAN_EXACT.fullmatch(stripped)
+        if match:
+            _, operator, part1, part2, part3 = match.groups()
+            subscriber = part1 + part2 + part3
+            start = len(phone) - len(phone.lstrip())
+            return ParsedPhone(True, '+7' + operator + subscriber, operator, subscriber,
+                               (start, start + len(stripped)))
+        return ParsedPhone(False, PhoneValidator._normalize_cleaned(phone), None, None, None)
+    
+    @staticmethod
+    def _normalize_cleaned(phone: str) -> Optional[str]:
+        # Убираем все кроме цифр и +
+        cleaned = PhoneValidator._NOT_DIGIT_OR_PLUS.sub('', phone)
+        
+        # Проверяем длину
+        if len(cleaned) == 10:
+            return '+7' + cleaned
+        elif len(cleaned) == 11 and cleaned[0] in ['7', '8']:
+            return '+7' + cleaned[1:]
+        elif len(cleaned) == 12 and cleaned.startswith('+7'):
+            return cleaned
+        
+        return None
+    
     @staticmethod
     def validate_russian_phone(phone: str) -> bool:
         """
@@ -28,12 +357,11 @@ class PhoneValidator:
         
         Args:
             phone: Строка с номером телефона
-            
+        
         Returns:
             bool: True если номер корректен, иначе False
         """
-        pattern = r'^(\+7|8|7)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})$'
-        return bool(re.match(pattern, phone.strip()))
+        return PhoneValidator._RUSSIAN_EXACT.fullmatch(phone.strip()) is not None
     
     @staticmethod
     def normalize_phone(phone: str) -> Optional[str]:
@@ -42,53 +370,112 @@ class PhoneValidator:
         
         Args:
             phone: Строка с номером телефона
-            
+        
         Returns:
             str: Нормализованный номер или None если номер некорректен
         """
-        # Убираем все кроме цифр и +
-        cleaned = re.sub(r'[^\d+]', '', phone)
+        return PhoneValidator.parse(phone).e164
+    
+    @staticmethod
+    def parse_international(phone: str) -> InternationalPhone:
+        """
+        Определяет страну и нормализует международный номер за один проход
         
-        # Проверяем длину
-        if len(cleaned) == 10:
-            return '+7' + cleaned
-        elif len(cleaned) == 11 and cleaned[0] in ['7', '8']:
-            return '+7' + cleaned[1:]
-        elif len(cleaned) == 12 and cleaned.startswith('+7'):
-            return cleaned
+        Номер начинается с + или 00, между цифрами допустимы пробелы,
+        дефисы, точки и скобки. Страна определяется одним спуском по
+        CountryCodeTrie с первой цифры (самый длинный ключ, не больше
+        нескольких цифр) - без перебора стран; остальные цифры образуют
+        национальный номер, длина которого сверяется с правилами страны.
         
-        return None
+        Args:
+            phone: Строка с номером телефона
+        
+        Returns:
+            InternationalPhone: Страна, код, национальный номер и нормализованный
+                вид; для неизвестного кода region равен None
+        """
+        text = phone.strip()
+        if text.startswith('+'):
+            position = 1
+        elif text.startswith('00'):
+            position = 2
+        else:
+            return InternationalPhone(False, None, None, None, None, None)
+        digits = text[position:].translate(PhoneValidator._INTERNATIONAL_SEPARATORS)
+        if not (digits.isascii() and digits.isdigit()):
+            return InternationalPhone(False, None, None, None, None, None)
+        rule = PhoneValidator._COUNTRY_TRIE.match(digits)
+        if rule is None:
+            return InternationalPhone(False, None, None, None, None, None)
+        national = digits[len(rule.code):]
+        if len(national) not in rule.lengths or len(digits) > PhoneValidator._E164_DIGITS:
+            return InternationalPhone(False, rule.region, rule.code, national, None, None)
+        if len(national) == sum(rule.groups):
+            parts = []
+            start = 0
+            for size in rule.groups:
+                parts.append(national[start:start + size])
+                start += size
+            formatted = f"+{rule.code} {' '.join(parts)}"
+        else:
+            formatted = f"+{rule.code} {national}"
+        return InternationalPhone(True, rule.region, rule.code, national, f"+{rule.code}{national}", formatted)
     
     @staticmethod
-    def find_phones_in_text(text: str) -> List[str]:
+    def find_phones_in_text(text: str, engine: str = 'regex') -> List[str]:
         """
         Находит все номера телефонов в тексте
         
         Args:
             text: Текст для поиска
-            
+            engine: 'regex' - регулярное выражение, 'fsm' - PhoneStateMachine
+        
         Returns:
             List[str]: Список найденных номеров
         """
-        pattern = PhoneValidator.PATTERNS['russian']
-        phones = re.findall(pattern, text)
-        return phones
+        if engine == 'regex':
+            return PhoneValidator._RUSSIAN_SEARCH.findall(text)
+        return [text[start:end] for start, end in PhoneValidator._spans(engine)(text)]
     
     @staticmethod
-    def find_phones_in_file(filename: str) -> List[str]:
+    def find_international_phones(text: str) -> List[InternationalPhone]:
+        """
+        Находит в тексте международные номера (шаблон PATTERNS['international'])
+        
+        Args:
+            text: Текст для поиска
+        
+        Returns:
+            List[InternationalPhone]: Корректные номера в порядке следования
+        """
+        parse = PhoneValidator.parse_international
+        return [phone for phone in map(parse, PhoneValidator._INTERNATIONAL_SEARCH.findall(text)) if phone.valid]
+    
+    @staticmethod
+    def _spans(engine: str) -> Callable[[str], Iterator[Tuple[int, int]]]:
+        """Функция, перечисляющая границы номеров в тексте выбранным движком"""
+        if engine == 'fsm':
+            return PhoneStateMachine.spans
+        if engine == 'regex':
+            finditer = PhoneValidator._RUSSIAN_SEARCH.finditer
+            return lambda text: (match.span() for match in finditer(text))
+        raise ValueError(f"Неизвестный движок поиска: {engine!r}, ожидается один из {PhoneValidator.ENGINES}")
+    
+    @staticmethod
+    def find_phones_in_file(filename: str, engine: str = 'regex') -> List[str]:
         """
         Находит номера телефонов в файле
         
         Args:
             filename: Путь к файлу
-            
+            engine: Движок поиска, как в find_phones_in_text
+        
         Returns:
             List[str]: Список найденных номеров
         """
+        PhoneValidator._spans(engine)
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                text = f.read()
-            return PhoneValidator.find_phones_in_text(text)
+            return list(PhoneValidator.iter_phones_in_file(filename, engine=engine))
         except FileNotFoundError:
             print(f"Файл {filename} не найден")
             return []
@@ -96,23 +483,68 @@ class PhoneValidator:
             print(f"Ошибка при чтении файла: {e}")
             return []
     
+    @staticmethod
+    def iter_phones_in_file(filename: str, chunk_size: Optional[int] = None,
+                            use_mmap: bool = False, engine: str = 'regex') -> Iterator[str]:
+        """
+        Лениво перечисляет номера в файле, не читая его целиком
+        
+        Файл читается блоками по chunk_size символов; номер, разрезанный
+        границей блоков, находится так же, как в find_phones_in_text.
+        Память ограничена размером блока. С use_mmap=True файл
+        отображается в память и просматривается как байты без
+        декодирования (шаблон тогда понимает только ASCII-цифры и пробелы).
+        
+        Args:
+            filename: Путь к файлу (UTF-8)
+            chunk_size: Размер блока в символах (по умолчанию CHUNK_SIZE)
+            use_mmap: Просматривать файл через mmap (только движок 'regex')
+            engine: Движок поиска, как в find_phones_in_text
+        
+        Yields:
+            str: Найденные номера в порядке следования
+        """
+        stream = PhoneStream(engine)
+        if use_mmap:
+            if engine != 'regex':
+                raise ValueError("Просмотр через mmap поддерживает только движок 'regex'")
+            with open(filename, 'rb') as f:
+                if f.seek(0, 2) == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for match in PhoneValidator._RUSSIAN_SEARCH_BYTES.finditer(mapped):
+                        yield match.group().decode('ascii')
+            return
+        
+        chunk_size = chunk_size or PhoneValidator.CHUNK_SIZE
+        with open(filename, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(chunk_size), ''):
+                yield from stream.feed(block)
+        yield from stream.close()
+    
     @staticmethod
     def find_phones_on_webpage(url: str) -> List[str]:
         """
         Находит номера телефонов на веб-странице
         
+        Страница загружается асинхронным обходчиком из phone_crawler
+        (aiohttp) без перехода по ссылкам.
+        
         Args:
             url: URL веб-страницы
-            
+        
         Returns:
             List[str]: Список найденных номеров
         """
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            text = response.text
-            return PhoneValidator.find_phones_in_text(text)
-        except requests.RequestException as e:
+            from aiohttp import ClientError
+            from phone_crawler import fetch_phones
+        except ImportError as e:
+            print(f"Для загрузки страниц нужен aiohttp: {e}")
+            return []
+        try:
+            return asyncio.run(fetch_phones(url))
+        except (ClientError, asyncio.TimeoutError, ValueError) as e:
             print(f"Ошибка при загрузке страницы: {e}")
             return []
     
@@ -123,21 +555,617 @@ class PhoneValidator:
         
         Args:
             phone: Строка с номером телефона
-            
+        
         Returns:
             dict: Словарь с частями номера или None
         """
-        pattern = r'^(\+7|8|7)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})$'
-        match = re.match(pattern, phone.strip())
+        return PhoneValidator._parts(PhoneValidator.parse(phone))
+    
+    @staticmethod
+    def _parts(parsed: ParsedPhone) -> Optional[dict]:
+        if not parsed.valid:
+            return None
+        return {
+            'country_code': '+7',
+            'operator': parsed.operator,
+            'number': parsed.subscriber
+        }
+    
+    @staticmethod
+    def validate_many(phones: Iterable[str]) -> List[bool]:
+        """
+        Проверяет много номеров за один проход
         
-        if match:
-            country, operator, part1, part2, part3 = match.groups()
-            return {
-                'country_code': '+7',
-                'operator': operator,
-                'number': f"{part1}{part2}{part3}"
-            }
-        return None
+        Args:
+            phones: Итерируемый набор строк
+        
+        Returns:
+            List[bool]: Результаты validate_russian_phone в том же порядке
+        """
+        fullmatch = PhoneValidator._RUSSIAN_EXACT.fullmatch
+        return [fullmatch(phone.strip()) is not None for phone in phones]
+    
+    @staticmethod
+    def normalize_many(phones: Iterable[str]) -> List[Optional[str]]:
+        """
+        Нормализует много номеров за один проход
+        
+        Args:
+            phones: Итерируемый набор строк
+        
+        Returns:
+            List[Optional[str]]: Результаты normalize_phone в том же порядке
+        """
+        fullmatch = PhoneValidator._RUSSIAN_EXACT.fullmatch
+        normalize = PhoneValidator._normalize_cleaned
+        result = []
+        append = result.append
+        for phone in phones:
+            match = fullmatch(phone.strip())
+            if match:
+                _, operator, part1, part2, part3 = match.groups()
+                append('+7' + operator + part1 + part2 + part3)
+            else:
+                append(normalize(phone))
+        return result
+    
+    @staticmethod
+    def extract_parts_many(phones: Iterable[str]) -> List[Optional[dict]]:
+        """
+        Извлекает части много номеров за один проход
+        
+        Args:
+            phones: Итерируемый набор строк
+        
+        Returns:
+            List[Optional[dict]]: Результаты extract_parts в том же порядке
+        """
+        fullmatch = PhoneValidator._RUSSIAN_EXACT.fullmatch
+        result = []
+        append = result.append
+        for phone in phones:
+            match = fullmatch(phone.strip())
+            if match:
+                _, operator, part1, part2, part3 = match.groups()
+                append({'country_code': '+7', 'operator': operator, 'number': part1 + part2 + part3})
+            else:
+                append(None)
+        return result
+    
+    @staticmethod
+    def normalize_array(phones, as_int: bool = False):
+        """
+        Нормализует столбец номеров операциями над массивами numpy
+        
+        Результат совпадает с normalize_phone для каждого элемента:
+        из строки удаляются все символы, кроме цифр и +, и по длине
+        остатка (10, 11 с первой 7/8, 12 с началом +7) строится +7XXXXXXXXXX.
+        Строки ('U') обрабатываются целиком векторно, включая цифры
+        Юникода. Для байтов ('S') векторно обрабатываются ASCII-строки,
+        остальные декодируются из UTF-8 и проходят через normalize_phone.
+        Нужен numpy.
+        
+        Args:
+            phones: Массив numpy со строками или байтами (или список строк)
+            as_int: Вернуть числа (десять цифр после +7, как PhoneSet.encode)
+                    вместо строк
+        
+        Returns:
+            tuple: (нормализованные номера, маска корректных номеров).
+                Номера - массив строк 'U12' (пустая строка для
+                некорректных) или int64 (-1 для некорректных). С as_int
+                номер, в котором после +7 остались не ASCII-цифры,
+                считается некорректным.
+        """
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+        
+        phones = np.asarray(phones)
+        if phones.dtype.kind not in 'US':
+            phones = phones.astype(str)
+        phones = phones.ravel()
+        count = len(phones)
+        is_bytes = phones.dtype.kind == 'S'
+        width = max(phones.dtype.itemsize // (1 if is_bytes else 4), 1)
+        chars = np.ascontiguousarray(phones).view(np.uint8 if is_bytes else np.uint32).reshape(count, width)
+        
+        # Какие символы оставить: цифры и +
+        slow_rows = np.zeros(count, dtype=bool)
+        if is_bytes or chars.max(initial=0) < 128:
+            # Только однобайтные символы: считаем в uint8 (вычитание по модулю 256
+            # даёт проверку на цифру одним сравнением)
+            chars = chars.astype(np.uint8, copy=False)
+            keep = (chars - np.uint8(ord('0')) < 10) | (chars == ord('+'))
+            if is_bytes:
+                # Не-ASCII байты: строка уходит в normalize_phone после декодирования
+                slow_rows = (chars >= 128).any(axis=1)
+        else:
+            keep = ((chars >= ord('0')) & (chars <= ord('9'))) | (chars == ord('+'))
+            wide = chars >= 128
+            # Цифры Юникода (\d): проверяем каждую различную кодовую точку один раз
+            decimals = [code for code in np.unique(chars[wide]).tolist() if chr(code).isdecimal()]
+            if decimals:
+                keep |= wide & np.isin(chars, decimals)
+        
+        # Оставленные символы всех строк подряд; строка i занимает
+        # kept[starts[i]:ends[i]] (со сдвигом на 12 нулей в начале, чтобы
+        # индексы коротких строк не уходили за границу)
+        lengths = keep.sum(axis=1, dtype=np.uint8 if width < 256 else np.int64)
+        ends = np.cumsum(lengths, dtype=np.int64) + 12
+        starts = ends - lengths
+        kept = np.concatenate([np.zeros(12, dtype=chars.dtype), chars[keep]])
+        
+        last = len(kept) - 1
+        first, second = kept[np.minimum(starts, last)], kept[np.minimum(starts + 1, last)]
+        ten = lengths == 10
+        eleven = (lengths == 11) & ((first == ord('7')) | (first == ord('8')))
+        twelve = (lengths == 12) & (first == ord('+')) & (second == ord('7'))
+        valid = (ten | eleven | twelve) & ~slow_rows
+        # У корректного номера десять цифр после +7 - последние десять оставленных символов
+        digits = sliding_window_view(kept, 10)[ends - 10]
+        
+        if slow_rows.any():
+            digits = digits.astype(np.uint32)
+            for index in np.nonzero(slow_rows)[0].tolist():
+                normalized = PhoneValidator.normalize_phone(phones[index].decode('utf-8', 'replace'))
+                if normalized:
+                    valid[index] = True
+                    digits[index] = [ord(char) for char in normalized[2:]]
+        
+        if as_int:
+            ascii_digits = valid & ((digits >= 48) & (digits <= 57)).all(axis=1)
+            values = np.where(ascii_digits[:, None], digits - 48, 0).astype(np.int64)
+            codes = values @ (10 ** np.arange(9, -1, -1, dtype=np.int64))
+            return np.where(ascii_digits, codes, -1), ascii_digits
+        
+        result = np.zeros((count, 12), dtype=np.uint32)
+        result[:, 0], result[:, 1], result[:, 2:] = ord('+'), ord('7'), digits
+        result[~valid] = 0
+        return result.view('<U12').ravel(), valid
+
+
+class PhoneStream:
+    """
+    Поиск номеров в тексте, поступающем частями (файл блоками, ответ HTTP)
+    
+    Совпадения, начинающиеся ближе PhoneValidator._MATCH_WINDOW к концу
+    накопленного текста, могут зависеть от следующей части: хвост с этой
+    позиции (или с конца последнего совпадения) переносится в начало
+    следующей. Номера находятся так же, как find_phones_in_text во всём
+    тексте сразу, а память ограничена размером части.
+    """
+    
+    def __init__(self, engine: str = 'regex'):
+        self._spans = PhoneValidator._spans(engine)
+        self._tail = ''
+    
+    def feed(self, text: str) -> List[str]:
+        """Принимает очередную часть текста и возвращает номера, которые уже не изменятся"""
+        buffer = self._tail + text
+        safe = len(buffer) - PhoneValidator._MATCH_WINDOW + 1
+        rest = max(safe, 0)
+        phones = []
+        found = self._spans(buffer)
+        for start, end in found:
+            if start >= safe:
+                break
+            phones.append(buffer[start:end])
+            rest = max(end, safe)
+        found.close()
+        self._tail = buffer[rest:]
+        return phones
+    
+    def close(self) -> List[str]:
+        """Текст закончился: возвращает номера из оставшегося хвоста"""
+        tail, self._tail = self._tail, ''
+        return [tail[start:end] for start, end in self._spans(tail)]
+
+
+class PhoneSet:
+    """
+    Множество российских номеров, хранящихся как целые числа
+    
+    Номер +7XXXXXXXXXX хранится как число из десяти цифр после +7, так что
+    разные записи одного номера совпадают. Два представления:
+    
+    - отсортированный array('Q') (8 байт на номер) и буфер новых номеров
+      не больше _MAX_BUFFER элементов, который вливается в массив на
+      месте: массив удлиняется на число новых номеров, и его части
+      сдвигаются с конца (memmove), без промежуточных списков чисел;
+    - битовая карта всего пространства 10^10 номеров (bitmap=True):
+      1 бит на возможный номер, страницы по PAGE_BITS бит выделяются при
+      первой записи; заполненная целиком карта занимает 1.25 ГБ при любом
+      числе найденных номеров.
+    
+    Отсортированный массив выгоднее до ~10^8 различных номеров, дальше -
+    битовая карта.
+    """
+    
+    SPACE = 10 ** 10
+    PAGE_BITS = 1 << 16
+    _MAGIC = b'PHST'
+    _HEADER = struct.Struct('<4sBBQ')
+    _MIN_BUFFER = 1 << 16
+    # Наибольший буфер: множество чисел Python занимает ~60 байт на элемент,
+    # так что буфер добавляет не больше ~16 МБ при любом размере массива
+    _MAX_BUFFER = 1 << 18
+    _NONZERO = re.compile(rb'[^\x00]')
+    
+    def __init__(self, phones: Iterable[str] = (), bitmap: bool = False):
+        self.bitmap = bitmap
+        self._codes = array('Q')        # отсортированные различные номера
+        self._pending = set()           # новые номера, ещё не влитые в _codes
+        self._pages = {}                # номер страницы -> bytearray(PAGE_BITS // 8)
+        self._count = 0                 # число номеров в битовой карте
+        self.update(phones)
+    
+    @staticmethod
+    def encode(phone: str) -> Optional[int]:
+        """
+        Номер в любом формате -> число (десять цифр после +7) или None
+        
+        normalize_phone оставляет в номере + и цифры Юникода, поэтому
+        кодируется только +7 и ровно десять ASCII-цифр - как в
+        normalize_array(as_int=True).
+        """
+        normalized = PhoneValidator.normalize_phone(phone)
+        if not normalized or len(normalized) != 12 or not normalized.startswith('+7'):
+            return None
+        digits = normalized[2:]
+        return int(digits) if digits.isascii() and digits.isdigit() else None
+    
+    @staticmethod
+    def decode(code: int) -> str:
+        """Число -> номер +7XXXXXXXXXX"""
+        return f"+7{code:010d}"
+    
+    def add(self, phone: str) -> bool:
+        """
+        Добавляет номер
+        
+        Args:
+            phone: Номер в любом формате, который понимает normalize_phone
+        
+        Returns:
+            bool: False если номер не удалось нормализовать
+        """
+        code = self.encode(phone)
+        if code is None:
+            return False
+        self.add_code(code)
+        return True
+    
+    def add_code(self, code: int):
+        """Добавляет номер, уже переведённый в число"""
+        if self.bitmap:
+            page = self._pages.get(code // self.PAGE_BITS)
+            if page is None:
+                page = self._pages[code // self.PAGE_BITS] = bytearray(self.PAGE_BITS // 8)
+            offset = code % self.PAGE_BITS
+            bit = 1 << (offset & 7)
+            if not page[offset >> 3] & bit:
+                page[offset >> 3] |= bit
+                self._count += 1
+            return
+        self._pending.add(code)
+        if len(self._pending) >= min(self._MAX_BUFFER, max(self._MIN_BUFFER, len(self._codes) >> 1)):
+            self._flush()
+    
+    def update(self, phones: Iterable[str]) -> int:
+        """Добавляет номера; возвращает число тех, что не удалось нормализовать"""
+        rejected = 0
+        for phone in phones:
+            if not self.add(phone):
+                rejected += 1
+        return rejected
+    
+    def _flush(self):
+        """Вливает буфер в отсортированный массив"""
+        if self._pending:
+            new = sorted(self._pending)
+            self._pending = set()
+            self._merge(self._codes, new)
+    
+    @staticmethod
+    def _merge(codes: array, new: Iterable[int]):
+        """
+        Вливает возрастающие различные числа new в отсортированный массив codes на месте
+        
+        Места новых чисел находятся двоичным поиском, затем массив
+        удлиняется и заполняется с конца: каждый участок старых чисел
+        сдвигается одним копированием памяти. Дополнительная память -
+        только на списки новых чисел и их мест.
+        """
+        fresh = []
+        positions = []
+        start = 0
+        size = len(codes)
+        for code in new:
+            index = bisect_left(codes, code, start)
+            if index < size and codes[index] == code:
+                continue
+            fresh.append(code)
+            positions.append(index)
+            start = index
+        if not fresh:
+            return
+        codes.frombytes(bytes(8 * len(fresh)))
+        with memoryview(codes) as view:
+            end = size
+            for k in range(len(fresh) - 1, -1, -1):
+                index = positions[k]
+                view[index + k + 1:end + k + 1] = view[index:end]
+                view[index + k] = fresh[k]
+                end = index
+    
+    def contains_code(self, code: int) -> bool:
+        if self.bitmap:
+            page = self._pages.get(code // self.PAGE_BITS)
+            offset = code % self.PAGE_BITS
+            return page is not None and bool(page[offset >> 3] & (1 << (offset & 7)))
+        if code in self._pending:
+            return True
+        index = bisect_left(self._codes, code)
+        return index < len(self._codes) and self._codes[index] == code
+    
+    def __contains__(self, phone: str) -> bool:
+        code = self.encode(phone)
+        return code is not None and self.contains_code(code)
+    
+    def __len__(self) -> int:
+        if self.bitmap:
+            return self._count
+        self._flush()
+        return len(self._codes)
+    
+    def codes(self) -> Iterator[int]:
+        """Номера-числа по возрастанию"""
+        if not self.bitmap:
+            self._flush()
+            yield from self._codes
+            return
+        for index in sorted(self._pages):
+            base = index * self.PAGE_BITS
+            # Пропуск нулевых байтов - на C
+            for match in self._NONZERO.finditer(self._pages[index]):
+                byte = match.start()
+                value = match.group()[0]
+                for bit in range(8):
+                    if value >> bit & 1:
+                        yield base + byte * 8 + bit
+    
+    def __iter__(self) -> Iterator[str]:
+        return map(self.decode, self.codes())
+    
+    def union(self, other: 'PhoneSet') -> 'PhoneSet':
+        """
+        Объединение двух множеств
+        
+        Результат - битовая карта, если хотя бы одно из множеств - карта.
+        """
+        result = PhoneSet(bitmap=self.bitmap or other.bitmap)
+        if not result.bitmap:
+            self._flush()
+            other._flush()
+            larger, smaller = sorted((self._codes, other._codes), key=len, reverse=True)
+            result._codes = array('Q', larger)
+            for start in range(0, len(smaller), self._MAX_BUFFER):
+                self._merge(result._codes, smaller[start:start + self._MAX_BUFFER])
+            return result
+        for source in (self, other):
+            if not source.bitmap:
+                for code in source.codes():
+                    result.add_code(code)
+                continue
+            for index, page in source._pages.items():
+                mine = result._pages.get(index)
+                if mine is None:
+                    result._pages[index] = bytearray(page)
+                else:
+                    merged = int.from_bytes(mine, 'little') | int.from_bytes(page, 'little')
+                    result._pages[index] = bytearray(merged.to_bytes(len(page), 'little'))
+        result._count = sum(int.from_bytes(page, 'little').bit_count() for page in result._pages.values())
+        return result
+    
+    def __or__(self, other: 'PhoneSet') -> 'PhoneSet':
+        return self.union(other)
+    
+    def save(self, filename: str):
+        """
+        Сохраняет множество в двоичный файл
+        
+        Формат: заголовок (PHST, версия, вид, число номеров), затем либо
+        номера по возрастанию (uint64 LE), либо число страниц и для каждой
+        страницы её индекс (uint64 LE) и биты.
+        """
+        with open(filename, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, 1, int(self.bitmap), len(self)))
+            if not self.bitmap:
+                codes = self._codes
+                if sys.byteorder == 'big':
+                    codes = array('Q', codes)
+                    codes.byteswap()
+                codes.tofile(f)
+                return
+            f.write(struct.pack('<Q', len(self._pages)))
+            for index in sorted(self._pages):
+                f.write(struct.pack('<Q', index))
+                f.write(self._pages[index])
+    
+    @classmethod
+    def load(cls, filename: str) -> 'PhoneSet':
+        """Загружает множество, сохранённое save"""
+        with open(filename, 'rb') as f:
+            magic, version, kind, count = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            if magic != cls._MAGIC or version != 1:
+                raise ValueError(f"{filename}: не файл PhoneSet")
+            result = cls(bitmap=bool(kind))
+            if not result.bitmap:
+                result._codes.fromfile(f, count)
+                if sys.byteorder == 'big':
+                    result._codes.byteswap()
+                return result
+            (pages,) = struct.unpack('<Q', f.read(8))
+            for _ in range(pages):
+                (index,) = struct.unpack('<Q', f.read(8))
+                page = bytearray(cls.PAGE_BITS // 8)
+                if f.readinto(page) != len(page):
+                    raise ValueError(f"{filename}: файл обрезан")
+                result._pages[index] = page
+            result._count = count
+        return result
+
+
+# Байт, который не может входить ни в одно совпадение: по таким байтам
+# большие файлы делятся на диапазоны без потери и дублирования номеров
+_SEPARATOR = re.compile(rb'[^\d\s+()\-]')
+# Размер диапазона при делении больших файлов и объём одного задания пула
+RANGE_SIZE = 64 << 20
+# Наибольшее число файлов в одном задании пула
+TASK_FILES = 512
+
+
+class ScanReport(NamedTuple):
+    """Итог просмотра дерева каталогов"""
+    files_scanned: int                  # просмотрено файлов
+    bytes_scanned: int                  # их общий размер в байтах
+    matches: int                        # всего найдено номеров (с повторами)
+    per_file: Dict[str, int]            # файл -> число номеров (только файлы с номерами)
+    phones: Counter                     # номер (+7XXXXXXXXXX или как найден) -> число вхождений
+    errors: List[Tuple[str, str]]       # (файл, причина) для файлов, которые не удалось прочитать
+
+
+def _boundary(mapped: mmap.mmap, position: int) -> int:
+    """Ближайшая к position (не левее) граница диапазона - байт-разделитель"""
+    if position <= 0:
+        return 0
+    match = _SEPARATOR.search(mapped, position)
+    return match.start() if match else len(mapped)
+
+
+def _scan_range(path: str, start: int, end: int) -> Counter:
+    """
+    Ищет номера в диапазоне байтов файла через mmap
+    
+    Обе границы сдвигаются вправо до ближайшего байта-разделителя, поэтому
+    соседние диапазоны одного файла сходятся в одной точке, а номер
+    целиком принадлежит ровно одному из них.
+    """
+    found = Counter()
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return found
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start, end = _boundary(mapped, start), _boundary(mapped, min(end, len(mapped)))
+            raw = Counter(PhoneValidator._RUSSIAN_SEARCH_BYTES.findall(mapped, start, end))
+    # Нормализуем каждую различную запись один раз
+    for phone, count in raw.items():
+        phone = phone.decode('ascii')
+        found[PhoneValidator.normalize_phone(phone) or phone] += count
+    return found
+
+
+def _scan_task(units: List[Tuple[str, int, int]]) -> List[tuple]:
+    """Задание для процесса пула: [(файл, начало, конец), ...] -> [(файл, байты, номера, ошибка), ...]"""
+    results = []
+    for path, start, end in units:
+        try:
+            results.append((path, end - start, _scan_range(path, start, end), None))
+        except (OSError, ValueError) as e:
+            results.append((path, end - start, None, str(e)))
+    return results
+
+
+def _plan_tasks(root: str, range_size: int) -> Tuple[List[list], int, int]:
+    """
+    Обходит дерево и раскладывает файлы по заданиям пула
+    
+    Мелкие файлы собираются в задания до range_size байт (или TASK_FILES
+    файлов), большие делятся на диапазоны по range_size байт. Всё, что не
+    является обычным файлом (каналы FIFO, сокеты, устройства), пропускается:
+    open() на канале без пишущей стороны ждал бы вечно.
+    """
+    tasks, current, current_size = [], [], 0
+    files = total = 0
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                # Например, битая ссылка: ошибка попадёт в отчёт при чтении
+                size = 0
+            else:
+                if not stat.S_ISREG(info.st_mode):
+                    continue
+                size = info.st_size
+            files += 1
+            total += size
+            if size > range_size:
+                tasks.extend([(path, start, min(start + range_size, size))]
+                             for start in range(0, size, range_size))
+                continue
+            current.append((path, 0, size))
+            current_size += size
+            if current_size >= range_size or len(current) >= TASK_FILES:
+                tasks.append(current)
+                current, current_size = [], 0
+    if current:
+        tasks.append(current)
+    return tasks, files, total
+
+
+def scan_directory(root: str, workers: Optional[int] = None, range_size: int = RANGE_SIZE,
+                   progress: Optional[Callable[[int, int, float], None]] = None) -> ScanReport:
+    """
+    Рекурсивно ищет номера во всех файлах каталога в пуле процессов
+    
+    Файлы просматриваются как байты через mmap (без декодирования, так что
+    кодировка и двоичные файлы не мешают; шаблон понимает только
+    ASCII-цифры и пробелы). Номера объединяются по нормализованному виду.
+    
+    Args:
+        root: Корневой каталог
+        workers: Число процессов (None - по числу ядер, 0 - в текущем процессе)
+        range_size: Размер диапазона для деления больших файлов, байт
+        progress: Функция progress(обработано байт, всего байт, прошло секунд)
+    
+    Returns:
+        ScanReport: Счётчики по файлам и номерам, ошибки чтения
+    """
+    tasks, files, total = _plan_tasks(root, range_size)
+    per_file = Counter()
+    phones = Counter()
+    errors = []
+    failed = set()
+    done = 0
+    started = time.perf_counter()
+    
+    def merge(results):
+        nonlocal done
+        for path, size, found, error in results:
+            done += size
+            if error is not None:
+                if path not in failed:
+                    failed.add(path)
+                    errors.append((path, error))
+                continue
+            count = sum(found.values())
+            if count:
+                per_file[path] += count
+                phones.update(found)
+        if progress:
+            progress(done, total, time.perf_counter() - started)
+    
+    if workers == 0:
+        for task in tasks:
+            merge(_scan_task(task))
+    else:
+        with ProcessPoolExecutor(workers or os.cpu_count() or 1) as pool:
+            for future in as_completed([pool.submit(_scan_task, task) for task in tasks]):
+                merge(future.result())
+    errors.sort()
+    return ScanReport(files, total, sum(phones.values()), dict(per_file), phones, errors)
 
 
 def interactive_mode():
@@ -158,13 +1186,12 @@ def interactive_mode():
         
         if choice == "1":
             phone = input("Введите номер телефона: ")
-            if PhoneValidator.validate_russian_phone(phone):
+            parsed = PhoneValidator.parse(phone)
+            if parsed.valid:
                 print(f"✓ Номер '{phone}' корректен")
-                parts = PhoneValidator.extract_parts(phone)
-                if parts:
-                    print(f"  Код страны: {parts['country_code']}")
-                    print(f"  Код оператора: {parts['operator']}")
-                    print(f"  Номер: {parts['number']}")
+                print("  Код страны: +7")
+                print(f"  Код оператора: {parsed.operator}")
+                print(f"  Номер: {parsed.subscriber}")
             else:
                 print(f"✗ Номер '{phone}' некорректен")
         
@@ -196,11 +1223,17 @@ def interactive_mode():
         
         elif choice == "4":
             filename = input("Введите путь к файлу: ")
-            phones = PhoneValidator.find_phones_in_file(filename)
-            if phones:
-                print(f"\nНайдено номеров: {len(phones)}")
-                for i, phone in enumerate(phones, 1):
-                    print(f"{i}. {phone}")
+            count = 0
+            try:
+                # Номера выводятся по мере чтения, не дожидаясь конца файла
+                for count, phone in enumerate(PhoneValidator.iter_phones_in_file(filename), 1):
+                    print(f"{count}. {phone}")
+            except FileNotFoundError:
+                print(f"Файл {filename} не найден")
+            except Exception as e:
+                print(f"Ошибка при чтении файла: {e}")
+            if count:
+                print(f"\nНайдено номеров: {count}")
             else:
                 print("Номера не найдены")
         
@@ -210,9 +1243,13 @@ def interactive_mode():
             phones = PhoneValidator.find_phones_on_webpage(url)
             if phones:
                 print(f"\nНайдено номеров: {len(phones)}")
-                # Убираем дубликаты
-                unique_phones = list(set(phones))
-                for i, phone in enumerate(unique_phones, 1):
+                # Убираем дубликаты: разные записи одного номера совпадают после нормализации
+                unique = PhoneSet()
+                others = []
+                for phone in phones:
+                    if not unique.add(phone) and phone not in others:
+                        others.append(phone)
+                for i, phone in enumerate(list(unique) + others, 1):
                     print(f"{i}. {phone}")
             else:
                 print("Номера не найдены")
@@ -225,6 +1262,52 @@ def interactive_mode():
             print("Неверный выбор!")
 
 
+def _print_progress(done: int, total: int, elapsed: float):
+    """Строка прогресса в stderr: доля, скорость и оценка оставшегося времени"""
+    speed = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / speed if speed else 0
+    percent = done * 100 / total if total else 100
+    sys.stderr.write(f"\r  {percent:5.1f}%  {done / 2 ** 20:10.1f} / {total / 2 ** 20:.1f} МБ"
+                     f"  {speed / 2 ** 20:7.1f} МБ/с  осталось ~{eta:5.0f} с")
+    sys.stderr.flush()
+
+
+def scan_mode(root: str, workers: Optional[int] = None, top: int = 20, output: Optional[str] = None):
+    """
+    Режим просмотра дерева каталогов из командной строки
+    
+    Args:
+        root: Корневой каталог
+        workers: Число процессов (None - по числу ядер)
+        top: Сколько самых частых номеров и файлов показать
+        output: CSV-файл для всех найденных номеров (phone,count)
+    """
+    print(f"Просмотр каталога {root}...")
+    report = scan_directory(root, workers, progress=_print_progress)
+    sys.stderr.write("\n")
+    
+    print(f"Файлов: {report.files_scanned}, {report.bytes_scanned / 2 ** 20:.1f} МБ")
+    print(f"Найдено номеров: {report.matches}, различных: {len(report.phones)}, "
+          f"в файлах: {len(report.per_file)}")
+    if report.phones:
+        print("\nЧаще всего встречаются:")
+        for phone, count in report.phones.most_common(top):
+            print(f"  {phone:20} {count}")
+        print("\nБольше всего номеров в файлах:")
+        for path, count in Counter(report.per_file).most_common(top):
+            print(f"  {count:8}  {path}")
+    if report.errors:
+        print(f"\nНе удалось прочитать файлов: {len(report.errors)}")
+        for path, error in report.errors[:top]:
+            print(f"  {path}: {error}")
+    if output:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("phone", "count"))
+            writer.writerows(report.phones.most_common())
+        print(f"\nВсе номера сохранены в {output}")
+
+
 def demo_examples():
     """Демонстрация работы с примерами"""
     print("\n" + "="*60)
@@ -243,9 +1326,8 @@ def demo_examples():
     
     print("\nПроверка корректных номеров:")
     for phone in valid_phones:
-        is_valid = PhoneValidator.validate_russian_phone(phone)
-        normalized = PhoneValidator.normalize_phone(phone)
-        print(f"  {phone:25} -> {'✓' if is_valid else '✗'} -> {normalized}")
+        parsed = PhoneValidator.parse(phone)
+        print(f"  {phone:25} -> {'✓' if parsed.valid else '✗'} -> {parsed.e164}")
     
     # Примеры некорректных номеров
     invalid_phones = [
@@ -261,6 +1343,20 @@ def demo_examples():
         is_valid = PhoneValidator.validate_russian_phone(phone)
         print(f"  {phone:25} -> {'✓' if is_valid else '✗'}")
     
+    # Международные номера: страна по коду
+    international_phones = [
+        "+7 (701) 123-45-67",
+        "+1 202 555 0123",
+        "0044 20 7946 0958",
+        "+380 44 123 4567",
+        "+999 123 45 67"
+    ]
+    
+    print("\nМеждународные номера:")
+    for phone in international_phones:
+        parsed = PhoneValidator.parse_international(phone)
+        print(f"  {phone:25} -> {parsed.region or '?':3} -> {parsed.formatted}")
+    
     # Поиск в тексте
     text = """
     Контакты:
@@ -278,11 +1374,21 @@ def demo_examples():
 
 
 if __name__ == "__main__":
-    # Сначала демонстрация
-    demo_examples()
-    
-    # Затем интерактивный режим
-    try:
-        interactive_mode()
-    except KeyboardInterrupt:
-        print("\n\nПрограмма прервана")
+    parser = argparse.ArgumentParser(description="Проверка и поиск номеров телефонов")
+    parser.add_argument("--scan", metavar="DIR", help="найти номера во всех файлах каталога и выйти")
+    parser.add_argument("--workers", type=int, help="процессов для --scan (0 - без пула)")
+    parser.add_argument("--top", type=int, default=20, help="сколько частых номеров показать")
+    parser.add_argument("--output", help="CSV со всеми найденными номерами")
+    args = parser.parse_args()
+    
+    if args.scan:
+        scan_mode(args.scan, args.workers, args.top, args.output)
+    else:
+        # Сначала демонстрация
+        demo_examples()
+        
+        # Затем интерактивный режим
+        try:
+            interactive_mode()
+        except KeyboardInterrupt:
+            print("\n\nПрограмма прервана")
@@ -0,0 +1,267 @@
+"""
+Пакетная нормализация номеров телефонов в CSV и JSONL.
+
+Вход читается потоково (файл, .gz или стандартный ввод), блоками по
+chunk_size строк. Блоки разбираются PhoneValidator.parse в пуле процессов,
+а главный процесс получает результаты в исходном порядке и сразу пишет их
+в выход, так что в памяти одновременно не больше нескольких блоков на
+процесс и размер файла не ограничен объёмом памяти.
+
+В каждой записи столбец с номером заменяется нормализованным номером
+(+7XXXXXXXXXX; если номер не нормализуется, значение остаётся как было)
+и добавляются (или перезаписываются) столбцы:
+    valid    - номер корректен по формату (CSV: 1/0, JSONL: true/false)
+    operator - код оператора корректного номера, иначе пустая строка
+
+CSV:   первая строка - заголовок; строки с другим числом полей пропускаются
+JSONL: по объекту в строке; строки с некорректным JSON пропускаются
+Пропущенные строки попадают в отчёт с номерами строк входа.
+
+Запуск: python lab2/phone_batch.py contacts.csv --column phone -o normalized.csv
+        cat contacts.jsonl | python lab2/phone_batch.py - --format jsonl > normalized.jsonl
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import List, NamedTuple, Optional, TextIO, Tuple
+
+from lab2_phone_validator import PhoneValidator
+
+
+VALID_COLUMN = 'valid'
+OPERATOR_COLUMN = 'operator'
+CHUNK_SIZE = 5000
+# Сколько пропущенных строк хранить для отчёта (остальные только считаются)
+MAX_ERRORS = 1000
+
+
+class BatchResult(NamedTuple):
+    """Итог пакетной нормализации"""
+    rows: int                           # записано записей
+    valid: int                          # из них с корректным номером
+    normalized: int                     # из них с нормализованным номером
+    rejected: int                       # пропущено строк входа
+    errors: List[Tuple[int, str]]       # (номер строки, причина), не больше MAX_ERRORS
+    elapsed: float                      # длительность, с
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _open_input(filename: str):
+    if filename == '-':
+        sys.stdin.reconfigure(encoding='utf-8', newline='')
+        return nullcontext(sys.stdin)
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt', encoding='utf-8', newline='')
+    return open(filename, encoding='utf-8', newline='')
+
+
+def _open_output(filename: Optional[str]):
+    if filename is None or filename == '-':
+        sys.stdout.reconfigure(encoding='utf-8', newline='')
+        return nullcontext(sys.stdout)
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    return open(filename, 'w', encoding='utf-8', newline='')
+
+
+def _csv_layout(header: List[str], column: str) -> Tuple[List[str], Tuple[int, int, int, int]]:
+    """
+    Заголовок выхода и расположение столбцов
+    
+    Returns:
+        tuple: (заголовок выхода, (число полей входа, индекс номера,
+            индекс valid, индекс operator))
+    """
+    names = [name.strip() for name in header]
+    if column not in names:
+        raise ValueError(f"В заголовке CSV нет столбца {column!r}")
+    output = list(header)
+    for name in (VALID_COLUMN, OPERATOR_COLUMN):
+        if name not in names:
+            names.append(name)
+            output.append(name)
+    return output, (len(header), names.index(column), names.index(VALID_COLUMN), names.index(OPERATOR_COLUMN))
+
+
+def _normalize_csv_chunk(layout, chunk):
+    """Нормализует блок строк CSV; возвращает (строки выхода, корректных, нормализованных, ошибки)"""
+    width, column, valid_column, operator_column = layout
+    rows = []
+    errors = []
+    valid = normalized = 0
+    padding = [''] * (max(valid_column, operator_column) + 1 - width)
+    parse = PhoneValidator.parse
+    for line, row in chunk:
+        if len(row) != width:
+            errors.append((line, f"Полей {len(row)}, в заголовке {width}"))
+            continue
+        parsed = parse(row[column])
+        row.extend(padding)
+        if parsed.e164:
+            row[column] = parsed.e164
+            normalized += 1
+        row[valid_column] = '1' if parsed.valid else '0'
+        row[operator_column] = parsed.operator or ''
+        valid += parsed.valid
+        rows.append(row)
+    return rows, valid, normalized, errors
+
+
+def _normalize_jsonl_chunk(column, chunk):
+    """Нормализует блок строк JSONL; возвращает (строки выхода, корректных, нормализованных, ошибки)"""
+    lines = []
+    errors = []
+    valid = normalized = 0
+    parse = PhoneValidator.parse
+    for line, text in chunk:
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError:
+            errors.append((line, "Некорректный JSON"))
+            continue
+        if not isinstance(record, dict):
+            errors.append((line, "Запись должна быть объектом"))
+            continue
+        value = record.get(column)
+        parsed = parse(value if isinstance(value, str) else '' if value is None else str(value))
+        if parsed.e164:
+            record[column] = parsed.e164
+            normalized += 1
+        record[VALID_COLUMN] = parsed.valid
+        record[OPERATOR_COLUMN] = parsed.operator or ''
+        valid += parsed.valid
+        lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+    return lines, valid, normalized, errors
+
+
+def _normalize_chunk(fmt, setting, chunk):
+    if fmt == 'csv':
+        return _normalize_csv_chunk(setting, chunk)
+    return _normalize_jsonl_chunk(setting, chunk)
+
+
+def _pool_map(pool, normalize, chunks, window):
+    """pool.map, который читает блоки входа не дальше window вперёд, а не весь поток сразу"""
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(normalize, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def normalize_stream(source: TextIO, target: TextIO, fmt: str = 'csv', column: str = 'phone',
+                     workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> BatchResult:
+    """
+    Нормализует номера в потоке CSV или JSONL и пишет результат в target
+    
+    Args:
+        source: Текстовый поток входа (для CSV открытый с newline='')
+        target: Текстовый поток выхода
+        fmt: 'csv' или 'jsonl'
+        column: Столбец (ключ) с номером телефона
+        workers: Число процессов (None - по числу ядер, 0 - в текущем процессе)
+        chunk_size: Строк в одном блоке
+    
+    Returns:
+        BatchResult: Число записей, корректных и нормализованных номеров, пропущенные строки
+    
+    Raises:
+        ValueError: Неизвестный формат или в заголовке CSV нет столбца column
+    """
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Неизвестный формат: {fmt!r}")
+    started = time.perf_counter()
+    if fmt == 'csv':
+        reader = csv.reader(source)
+        header = next(reader, None)
+        if header is None:
+            return BatchResult(0, 0, 0, 0, [], time.perf_counter() - started)
+        output, setting = _csv_layout(header, column)
+        writer = csv.writer(target)
+        writer.writerow(output)
+        write = writer.writerows
+        rows = ((reader.line_num, row) for row in reader if row)
+    else:
+        setting = column
+        write = target.writelines
+        rows = ((line_num, line) for line_num, line in enumerate(source, 1) if line.strip())
+    chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+    normalize = partial(_normalize_chunk, fmt, setting)
+    
+    totals = [0, 0, 0, 0]
+    errors = []
+    
+    def consume(results):
+        for written, valid, normalized, rejected in results:
+            write(written)
+            totals[0] += len(written)
+            totals[1] += valid
+            totals[2] += normalized
+            totals[3] += len(rejected)
+            errors.extend(rejected[:MAX_ERRORS - len(errors)])
+    
+    if workers == 0:
+        consume(map(normalize, chunks))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            consume(_pool_map(pool, normalize, chunks, workers * 2))
+    target.flush()
+    return BatchResult(*totals, errors, time.perf_counter() - started)
+
+
+def normalize_file(source: str, output: Optional[str] = None, column: str = 'phone', fmt: Optional[str] = None,
+                   workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> BatchResult:
+    """
+    Нормализует номера в файле CSV/JSONL (можно .gz; '-' - стандартный ввод)
+    
+    Формат определяется по расширению source, для стандартного ввода - CSV,
+    если fmt не задан. output=None или '-' - стандартный вывод.
+    """
+    if fmt is None:
+        name = source[:-3] if source.endswith('.gz') else source
+        fmt = 'csv' if source == '-' or name.lower().endswith('.csv') else 'jsonl'
+    with _open_input(source) as f_in, _open_output(output) as f_out:
+        return normalize_stream(f_in, f_out, fmt, column, workers, chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная нормализация номеров телефонов в CSV/JSONL")
+    parser.add_argument("source", help="файл .csv или .jsonl (можно .gz), '-' - стандартный ввод")
+    parser.add_argument("-o", "--output", help="файл результата (по умолчанию стандартный вывод)")
+    parser.add_argument("--column", default="phone", help="столбец с номером телефона")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="формат (по умолчанию по расширению)")
+    parser.add_argument("--workers", type=int, help="процессов (0 - без пула)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="строк в одном блоке")
+    args = parser.parse_args()
+    
+    try:
+        result = normalize_file(args.source, args.output, args.column, args.format, args.workers, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+    # Итог - в stderr, чтобы не смешивать его с результатом в стандартном выводе
+    print(f"Записей: {result.rows}, корректных номеров: {result.valid}, нормализовано: {result.normalized}, "
+          f"пропущено строк: {result.rejected} ({result.elapsed:.2f} с, {result.rows_per_second:.0f} строк/с)",
+          file=sys.stderr)
+    for line, reason in result.errors[:20]:
+        print(f"  строка {line}: {reason}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Асинхронный обходчик сайтов для поиска номеров телефонов (aiohttp).
+
+Страницы загружаются через одну сессию с общим пулом соединений;
+число одновременных запросов ограничено и в целом (concurrency), и для
+каждого хоста (per_host). Тело ответа читается частями: каждая часть
+сразу декодируется и передаётся в PhoneStream и в разбор ссылок, так что
+страница целиком в памяти не хранится. Переход идёт только по ссылкам
+того же сайта (схема http/https, тот же хост и порт) до глубины depth.
+Номера объединяются по нормализованному виду, как в scan_directory.
+
+Запуск: python lab2/phone_crawler.py https://example.com --depth 2 --per-host 8
+"""
+
+import argparse
+import asyncio
+import codecs
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from lab2_phone_validator import PhoneStream, PhoneValidator
+
+
+# Размер части тела ответа, байт
+CHUNK_SIZE = 64 * 1024
+# Страницы длиннее этого обрезаются
+MAX_PAGE_BYTES = 10 * 2 ** 20
+
+
+class CrawlResult(NamedTuple):
+    """Итог обхода сайта"""
+    pages: Dict[str, int]               # адрес страницы -> число номеров на ней
+    phones: Counter                     # номер (+7XXXXXXXXXX или как найден) -> число вхождений
+    errors: List[Tuple[str, str]]       # (адрес, причина) для страниц, которые не удалось загрузить
+    elapsed: float                      # длительность обхода, с
+    
+    @property
+    def pages_per_second(self) -> float:
+        return len(self.pages) / self.elapsed if self.elapsed else 0.0
+
+
+class _LinkParser(HTMLParser):
+    """Собирает ссылки <a href> и <area href> по мере поступления HTML"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in ('a', 'area'):
+            for name, value in attrs:
+                if name == 'href' and value:
+                    self.links.append(value)
+
+
+def _site(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+async def _read_page(session: ClientSession, url: str, follow_links: bool,
+                     chunk_size: int = CHUNK_SIZE, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[List[str], List[str]]:
+    """
+    Загружает страницу, читая тело частями
+    
+    Returns:
+        (номера в порядке следования, абсолютные адреса ссылок без #фрагмента)
+    """
+    async with session.get(url) as response:
+        response.raise_for_status()
+        content_type = response.content_type
+        if not content_type.startswith('text/') and content_type not in ('application/xhtml+xml', 'application/xml'):
+            return [], []
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        stream = PhoneStream()
+        parser = _LinkParser() if follow_links and 'html' in content_type else None
+        phones = []
+        size = 0
+        async for chunk in response.content.iter_chunked(chunk_size):
+            chunk = chunk[:max_bytes - size]
+            size += len(chunk)
+            text = decoder.decode(chunk)
+            phones.extend(stream.feed(text))
+            if parser:
+                parser.feed(text)
+            if size >= max_bytes:
+                break
+        text = decoder.decode(b'', final=True)
+        phones.extend(stream.feed(text))
+        phones.extend(stream.close())
+        if not parser:
+            return phones, []
+        parser.feed(text)
+        parser.close()
+        base = str(response.url)
+        links = []
+        for link in parser.links:
+            try:
+                links.append(urldefrag(urljoin(base, link)).url)
+            except ValueError:
+                # Некорректный адрес (например, http://[bad) - пропускаем ссылку
+                continue
+        return phones, links
+
+
+def _session(concurrency: int, per_host: int, timeout: float) -> ClientSession:
+    connector = TCPConnector(limit=concurrency, limit_per_host=per_host)
+    return ClientSession(connector=connector, timeout=ClientTimeout(total=timeout))
+
+
+async def fetch_phones(url: str, timeout: float = 10) -> List[str]:
+    """
+    Находит номера на одной странице (без перехода по ссылкам)
+    
+    Ошибки загрузки (aiohttp.ClientError, таймаут) передаются вызывающему.
+    """
+    async with _session(1, 1, timeout) as session:
+        phones, _ = await _read_page(session, url, follow_links=False)
+    return phones
+
+
+async def crawl(start_url: str, depth: int = 1, max_pages: int = 1000, per_host: int = 4,
+                concurrency: int = 32, timeout: float = 10, chunk_size: int = CHUNK_SIZE,
+                session: Optional[ClientSession] = None) -> CrawlResult:
+    """
+    Обходит сайт, начиная с start_url, и собирает номера телефонов
+    
+    Args:
+        start_url: Начальная страница
+        depth: Глубина перехода по ссылкам (0 - только начальная страница)
+        max_pages: Наибольшее число страниц
+        per_host: Одновременных запросов к одному хосту
+        concurrency: Одновременных запросов всего
+        timeout: Таймаут одной страницы, с
+        chunk_size: Размер части тела ответа, байт
+        session: Готовая сессия aiohttp (иначе создаётся своя)
+    
+    Returns:
+        CrawlResult: Номера по страницам и в целом, ошибки, скорость обхода
+    """
+    start_url = urldefrag(start_url).url
+    site = _site(start_url)
+    pages = {}
+    phones = Counter()
+    errors = []
+    seen = {start_url}
+    queue = asyncio.Queue()
+    queue.put_nowait((start_url, 0))
+    own_session = session is None
+    if own_session:
+        session = _session(concurrency, per_host, timeout)
+    
+    async def visit(url, level):
+        try:
+            found, links = await _read_page(session, url, level < depth, chunk_size)
+        except (ClientError, asyncio.TimeoutError) as e:
+            errors.append((url, str(e) or type(e).__name__))
+            return
+        pages[url] = len(found)
+        for phone in found:
+            phones[PhoneValidator.normalize_phone(phone) or phone] += 1
+        for link in links:
+            try:
+                parts = urlsplit(link)
+                netloc = parts.netloc.lower()
+            except ValueError:
+                continue
+            if parts.scheme in ('http', 'https') and netloc == site \
+                    and link not in seen and len(seen) < max_pages:
+                seen.add(link)
+                queue.put_nowait((link, level + 1))
+    
+    async def worker():
+        while True:
+            url, level = await queue.get()
+            try:
+                await visit(url, level)
+            except Exception as e:
+                # Ошибка не должна останавливать обработчик: иначе очередь не опустеет
+                errors.append((url, f"{type(e).__name__}: {e}"))
+            finally:
+                queue.task_done()
+    
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if own_session:
+            await session.close()
+    errors.sort()
+    return CrawlResult(pages, phones, errors, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск номеров телефонов на сайте")
+    parser.add_argument("url", help="начальная страница")
+    parser.add_argument("--depth", type=int, default=1, help="глубина перехода по ссылкам")
+    parser.add_argument("--max-pages", type=int, default=1000)
+    parser.add_argument("--per-host", type=int, default=4, help="одновременных запросов к хосту")
+    parser.add_argument("--concurrency", type=int, default=32, help="одновременных запросов всего")
+    parser.add_argument("--top", type=int, default=20, help="сколько частых номеров показать")
+    args = parser.parse_args()
+    
+    result = asyncio.run(crawl(args.url, args.depth, args.max_pages, args.per_host, args.concurrency))
+    print(f"Страниц: {len(result.pages)} за {result.elapsed:.2f} с ({result.pages_per_second:.1f} страниц/с)")
+    print(f"Найдено номеров: {sum(result.phones.values())}, различных: {len(result.phones)}")
+    for phone, count in result.phones.most_common(args.top):
+        print(f"  {phone:20} {count}")
+    if result.errors:
+        print(f"\nОшибки загрузки: {len(result.errors)}")
+        for url, error in result.errors[:args.top]:
+            print(f"  {url}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,31 @@
 # Запуск: python test_phone_validator_simple.py
 
 import unittest
+import asyncio
 import tempfile
+import gzip
+import io
 import os
-from lab2_phone_validator import PhoneValidator
+import random
+import re
+from contextlib import redirect_stdout
+from urllib.parse import urlsplit
+from lab2_phone_validator import (
+    COUNTRY_RULES, CountryCodeTrie, ParsedPhone, PhoneSet, PhoneValidator, scan_directory
+)
+import phone_batch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from aiohttp import ClientError, web
+    from aiohttp.test_utils import TestServer
+    import phone_crawler
+except ImportError:
+    phone_crawler = None
 
 
 class TestValidateRussianPhone(unittest.TestCase):
@@ -165,6 +187,559 @@ class TestFindPhonesInFile(unittest.TestCase):
         self.assertEqual(len(phones), 0)
 
 
+class TestParse(unittest.TestCase):
+    """Тесты для разбора номера за один проход и пакетных функций"""
+    
+    SAMPLES = [
+        "+7 999 123 45 67", "8 (495) 123-45-67", "  79991234567\n", "+7(999)1234567",
+        "9991234567", "+7 999 123 45 67 доб", "123-45-67", "+1 555 123 4567",
+        "8-800-555-35-35", "7+9991234567", "", "   ", "+7 999 123 45 678"
+    ]
+    
+    def test_valid_record(self):
+        """Тест: все поля корректного номера"""
+        parsed = PhoneValidator.parse("  8 (495) 123-45-67 ")
+        self.assertEqual(parsed, ParsedPhone(True, '+74951234567', '495', '1234567', (2, 19)))
+    
+    def test_normalizable_but_invalid(self):
+        """Тест: нормализация мягче проверки формата"""
+        parsed = PhoneValidator.parse("9991234567")
+        self.assertFalse(parsed.valid)
+        self.assertEqual(parsed.e164, '+79991234567')
+        self.assertIsNone(parsed.operator)
+        self.assertIsNone(parsed.span)
+    
+    def test_record_is_immutable(self):
+        """Тест: запись нельзя изменить"""
+        parsed = PhoneValidator.parse("+7 999 123 45 67")
+        with self.assertRaises(AttributeError):
+            parsed.valid = False
+    
+    def test_matches_previous_implementation(self):
+        """Тест: обёртки ведут себя как прежние отдельные функции"""
+        pattern = r'^(\+7|8|7)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})$'
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_contacts.txt")
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        for phone in self.SAMPLES + lines:
+            match = re.match(pattern, phone.strip())
+            cleaned = re.sub(r'[^\d+]', '', phone)
+            if len(cleaned) == 10:
+                normalized = '+7' + cleaned
+            elif len(cleaned) == 11 and cleaned[0] in ['7', '8']:
+                normalized = '+7' + cleaned[1:]
+            elif len(cleaned) == 12 and cleaned.startswith('+7'):
+                normalized = cleaned
+            else:
+                normalized = None
+            with self.subTest(phone=phone):
+                self.assertEqual(PhoneValidator.validate_russian_phone(phone), bool(match))
+                self.assertEqual(PhoneValidator.normalize_phone(phone), normalized)
+                parts = PhoneValidator.extract_parts(phone)
+                if match:
+                    self.assertEqual(parts['operator'], match.group(2))
+                    self.assertEqual(parts['number'], ''.join(match.groups()[2:]))
+                else:
+                    self.assertIsNone(parts)
+    
+    def test_batch_functions(self):
+        """Тест: пакетные функции совпадают с поштучными"""
+        self.assertEqual(PhoneValidator.validate_many(self.SAMPLES),
+                         [PhoneValidator.validate_russian_phone(p) for p in self.SAMPLES])
+        self.assertEqual(PhoneValidator.normalize_many(iter(self.SAMPLES)),
+                         [PhoneValidator.normalize_phone(p) for p in self.SAMPLES])
+        self.assertEqual(PhoneValidator.extract_parts_many(self.SAMPLES),
+                         [PhoneValidator.extract_parts(p) for p in self.SAMPLES])
+
+
+class TestStreamingFileScan(unittest.TestCase):
+    """Тесты для потокового поиска номеров в файле"""
+    
+    def setUp(self):
+        rng = random.Random(7)
+        pieces = []
+        for i in range(400):
+            pieces.append(rng.choice(["Звонок ", "тел.", "", " ", "\n", "номер: ", "8", "+", "12"]))
+            pieces.append(rng.choice(["+7 999 123 45 67", "8 (495) 123-45-67", "89161234567",
+                                      "+7-800-555-35-35", "8 999 12", "7 (999) 000 00 00 00"]))
+        self.text = "".join(pieces)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as f:
+            f.write(self.text)
+            self.filename = f.name
+    
+    def tearDown(self):
+        os.unlink(self.filename)
+    
+    def test_chunk_boundaries(self):
+        """Тест: номера на границах блоков находятся при любом размере блока"""
+        expected = PhoneValidator.find_phones_in_text(self.text)
+        self.assertGreater(len(expected), 100)
+        for chunk_size in (1, 2, 5, 17, 31, 32, 33, 100, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                found = list(PhoneValidator.iter_phones_in_file(self.filename, chunk_size))
+                self.assertEqual(found, expected)
+    
+    def test_mmap(self):
+        """Тест: просмотр через mmap даёт тот же результат"""
+        found = list(PhoneValidator.iter_phones_in_file(self.filename, use_mmap=True))
+        self.assertEqual(found, PhoneValidator.find_phones_in_text(self.text))
+    
+    def test_is_lazy(self):
+        """Тест: первый номер возвращается до чтения всего файла"""
+        phones = PhoneValidator.iter_phones_in_file(self.filename, chunk_size=64)
+        self.assertEqual(next(phones), PhoneValidator.find_phones_in_text(self.text)[0])
+        phones.close()
+    
+    def test_empty_file(self):
+        """Тест: пустой файл"""
+        with open(self.filename, 'w', encoding='utf-8'):
+            pass
+        self.assertEqual(list(PhoneValidator.iter_phones_in_file(self.filename)), [])
+        self.assertEqual(list(PhoneValidator.iter_phones_in_file(self.filename, use_mmap=True)), [])
+    
+    def test_contacts_file(self):
+        """Тест: пример с контактами"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_contacts.txt")
+        with open(path, encoding='utf-8') as f:
+            expected = PhoneValidator.find_phones_in_text(f.read())
+        self.assertEqual(PhoneValidator.find_phones_in_file(path), expected)
+        self.assertEqual(list(PhoneValidator.iter_phones_in_file(path, chunk_size=10)), expected)
+
+
+class TestScanDirectory(unittest.TestCase):
+    """Тесты для просмотра дерева каталогов в пуле процессов"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        rng = random.Random(3)
+        phones = ["+7 999 123 45 67", "8 (999) 123-45-67", "8 495 000 11 22", "+7-800-555-35-35"]
+        self.big = "".join(
+            rng.choice(["звонок ", "id 123 ", "\n", " "]) + rng.choice(phones) + rng.choice([",", ";", "\n", "."])
+            for _ in range(300)
+        )
+        os.makedirs(os.path.join(self.root, "a", "b"))
+        self._write(os.path.join("a", "b", "big.log"), self.big.encode('utf-8'))
+        self._write("one.txt", "Менеджер: +7 999 123 45 67".encode('cp1251'))
+        self._write(os.path.join("a", "none.txt"), b"no phones here")
+        self._write(os.path.join("a", "empty.txt"), b"")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _write(self, name, data):
+        with open(os.path.join(self.root, name), 'wb') as f:
+            f.write(data)
+    
+    def test_counts_and_dedupe(self):
+        """Тест: счётчики по файлам и по нормализованным номерам"""
+        report = scan_directory(self.root, workers=0)
+        big_count = len(PhoneValidator.find_phones_in_text(self.big))
+        self.assertEqual(report.files_scanned, 4)
+        self.assertEqual(report.per_file, {
+            os.path.join(self.root, "a", "b", "big.log"): big_count,
+            os.path.join(self.root, "one.txt"): 1
+        })
+        self.assertEqual(report.matches, big_count + 1)
+        self.assertEqual(len(report.phones), 3)
+        self.assertEqual(report.errors, [])
+    
+    @unittest.skipUnless(hasattr(os, "mkfifo"), "нужен os.mkfifo")
+    def test_special_files_are_skipped(self):
+        """Тест: канал FIFO в дереве пропускается, а не блокирует просмотр"""
+        os.mkfifo(os.path.join(self.root, "a", "pipe"))
+        report = scan_directory(self.root, workers=0)
+        self.assertEqual(report.files_scanned, 4)
+        self.assertEqual(report.errors, [])
+    
+    def test_byte_ranges(self):
+        """Тест: деление большого файла на диапазоны не теряет и не дублирует номера"""
+        expected = scan_directory(self.root, workers=0)
+        for range_size in (7, 20, 64, 1000):
+            with self.subTest(range_size=range_size):
+                report = scan_directory(self.root, workers=0, range_size=range_size)
+                self.assertEqual(report.per_file, expected.per_file)
+                self.assertEqual(report.phones, expected.phones)
+    
+    def test_process_pool_and_progress(self):
+        """Тест: пул процессов и отчёт о прогрессе"""
+        calls = []
+        report = scan_directory(self.root, workers=2, range_size=256,
+                                progress=lambda done, total, elapsed: calls.append((done, total)))
+        self.assertEqual(report.phones, scan_directory(self.root, workers=0).phones)
+        self.assertEqual(calls[-1], (report.bytes_scanned, report.bytes_scanned))
+
+
+class TestStateMachine(unittest.TestCase):
+    """Сравнение PhoneStateMachine с регулярным выражением"""
+    
+    def assertSameAsRegex(self, text):
+        self.assertEqual(PhoneValidator.find_phones_in_text(text, engine='fsm'),
+                         PhoneValidator.find_phones_in_text(text))
+    
+    def test_contacts_file(self):
+        """Тест: пример с контактами"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_contacts.txt")
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        self.assertGreater(len(PhoneValidator.find_phones_in_text(text, engine='fsm')), 0)
+        self.assertSameAsRegex(text)
+    
+    def test_generated_corpora(self):
+        """Тест: случайные строки из символов, значимых для шаблона"""
+        alphabet = "+78 9-()\n\t ٣a0778"
+        rng = random.Random(5)
+        for _ in range(3000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            with self.subTest(text=text):
+                self.assertSameAsRegex(text)
+    
+    def test_adversarial_input(self):
+        """Тест: длинные ряды цифр и почти-номера"""
+        for text in ("7" * 1000, "8" * 999 + "+", "8 999 123 45 6" * 50, "+7(" * 300,
+                     "+7 999 123 45 67" * 20, "7-" * 500, "78" * 11 + "(" + "9" * 30):
+            with self.subTest(text=text[:30]):
+                self.assertSameAsRegex(text)
+    
+    def test_file_engine(self):
+        """Тест: потоковый поиск в файле автоматом"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_contacts.txt")
+        expected = PhoneValidator.find_phones_in_file(path)
+        self.assertEqual(PhoneValidator.find_phones_in_file(path, engine='fsm'), expected)
+        self.assertEqual(list(PhoneValidator.iter_phones_in_file(path, chunk_size=7, engine='fsm')), expected)
+    
+    def test_unknown_engine(self):
+        """Тест: неизвестный движок"""
+        with self.assertRaises(ValueError):
+            PhoneValidator.find_phones_in_text("+7 999 123 45 67", engine='dfa')
+        with self.assertRaises(ValueError):
+            PhoneValidator.find_phones_in_file("nonexistent_file.txt", engine='dfa')
+
+
+@unittest.skipIf(phone_crawler is None, "нужен aiohttp")
+class TestCrawler(unittest.IsolatedAsyncioTestCase):
+    """Тесты для асинхронного обходчика на локальном сервере"""
+    
+    PAGES = {
+        "/": '<a href="/a">A</a> <a href="/b#top">B</a> <a href="http://external.example/x">X</a>'
+             '<a href="mailto:info@example.com">почта</a> Офис: +7 999 123 45 67',
+        "/a": '<a href="/c">C</a> <a href="/">Главная</a> Тел. 8 (999) 123-45-67',
+        "/b": '<a href="/missing">?</a> <a href="/file.pdf">PDF</a> ' + "текст " * 3000 + "8-800-555-35-35",
+        "/c": '<a href="/d">D</a> Склад: 8 495 000 11 22',
+        "/d": 'Слишком глубоко: +7 912 000 00 00',
+        "/bad": '<a href="http://[bad">?</a> <a href="/c">C</a>',
+    }
+    
+    async def asyncSetUp(self):
+        async def page(request):
+            if request.path == "/file.pdf":
+                return web.Response(body=b"+7 999 000 00 00", content_type="application/pdf")
+            if request.path not in self.PAGES:
+                raise web.HTTPNotFound()
+            return web.Response(text=self.PAGES[request.path], content_type="text/html")
+        
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url("/"))
+    
+    async def asyncTearDown(self):
+        await self.server.close()
+    
+    async def test_depth_and_same_site(self):
+        """Тест: переход только по ссылкам своего сайта до заданной глубины"""
+        result = await phone_crawler.crawl(self.url, depth=2, chunk_size=50)
+        paths = sorted(urlsplit(url).path for url in result.pages)
+        self.assertEqual(paths, ["/", "/a", "/b", "/c", "/file.pdf"])
+        self.assertEqual([urlsplit(url).path for url, _ in result.errors], ["/missing"])
+        self.assertGreater(result.pages_per_second, 0)
+    
+    async def test_dedupe_and_chunks(self):
+        """Тест: номера объединяются между страницами, номер на границе частей находится"""
+        result = await phone_crawler.crawl(self.url, depth=0, chunk_size=7)
+        self.assertEqual(dict(result.phones), {"+79991234567": 1})
+        result = await phone_crawler.crawl(self.url, depth=2, chunk_size=7)
+        self.assertEqual(dict(result.phones), {"+79991234567": 2, "+78005553535": 1, "+74950001122": 1})
+    
+    async def test_malformed_link_is_skipped(self):
+        """Тест: некорректная ссылка пропускается, обход завершается"""
+        start = str(self.server.make_url("/bad"))
+        result = await asyncio.wait_for(phone_crawler.crawl(start, depth=3, concurrency=2), 10)
+        self.assertEqual(sorted(urlsplit(url).path for url in result.pages), ["/bad", "/c", "/d"])
+        self.assertEqual(result.errors, [])
+    
+    async def test_fetch_single_page(self):
+        """Тест: одна страница без перехода по ссылкам"""
+        phones = await phone_crawler.fetch_phones(str(self.server.make_url("/a")))
+        self.assertEqual(phones, ["8 (999) 123-45-67"])
+        with self.assertRaises(ClientError):
+            await phone_crawler.fetch_phones(str(self.server.make_url("/missing")))
+    
+    def test_webpage_wrapper_errors(self):
+        """Тест: find_phones_on_webpage возвращает [] при ошибке"""
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(PhoneValidator.find_phones_on_webpage("not a url"), [])
+
+
+class TestPhoneSet(unittest.TestCase):
+    """Тесты для множества номеров в целочисленном виде"""
+    
+    def _codes(self, count, seed):
+        rng = random.Random(seed)
+        return [rng.randrange(PhoneSet.SPACE) for _ in range(count)]
+    
+    def test_formats_are_deduplicated(self):
+        """Тест: разные записи одного номера - один элемент"""
+        for bitmap in (False, True):
+            phones = PhoneSet(["+7 999 123 45 67", "8 (999) 123-45-67", "79991234567"], bitmap=bitmap)
+            self.assertEqual(len(phones), 1)
+            self.assertIn("8-999-123-45-67", phones)
+            self.assertNotIn("+7 999 123 45 68", phones)
+            self.assertFalse(phones.add("123-45-67"))
+            self.assertEqual(list(phones), ["+79991234567"])
+    
+    def test_plus_and_unicode_digits_are_rejected(self):
+        """Тест: номера с + внутри или цифрами Юникода не кодируются"""
+        bad = ["12345+6789", "8+12345678", "+123456789", "7٣99123456"]
+        for phone in bad:
+            self.assertIsNone(PhoneSet.encode(phone), phone)
+        for bitmap in (False, True):
+            phones = PhoneSet(bitmap=bitmap)
+            for phone in bad:
+                self.assertFalse(phones.add(phone), phone)
+                self.assertNotIn(phone, phones)
+            self.assertEqual(phones.update(bad + ["89991234567"]), len(bad))
+            self.assertEqual(list(phones), ["+79991234567"])
+    
+    def test_sorted_merge(self):
+        """Тест: буфер новых номеров вливается в отсортированный массив"""
+        phones = PhoneSet()
+        phones._MIN_BUFFER = 8
+        phones._MAX_BUFFER = 32
+        codes = self._codes(500, 1) + [0, PhoneSet.SPACE - 1]
+        for code in codes + codes[:100]:
+            phones.add_code(code)
+            self.assertLess(len(phones._pending), 32)
+        self.assertEqual(len(phones), len(set(codes)))
+        self.assertEqual(list(phones.codes()), sorted(set(codes)))
+        self.assertTrue(all(phones.contains_code(code) for code in codes))
+        self.assertFalse(phones.contains_code(1))
+    
+    def test_bitmap(self):
+        """Тест: битовая карта"""
+        phones = PhoneSet(bitmap=True)
+        codes = self._codes(500, 2) + [0, PhoneSet.SPACE - 1]
+        for code in codes:
+            phones.add_code(code)
+        self.assertEqual(len(phones), len(set(codes)))
+        self.assertEqual(list(phones.codes()), sorted(set(codes)))
+        self.assertFalse(phones.contains_code(5))
+    
+    def test_union(self):
+        """Тест: объединение для всех сочетаний видов"""
+        first, second = self._codes(300, 3), self._codes(300, 4)[:200] + self._codes(300, 3)[:50]
+        expected = sorted(set(first) | set(second))
+        for left_bitmap in (False, True):
+            for right_bitmap in (False, True):
+                left, right = PhoneSet(bitmap=left_bitmap), PhoneSet(bitmap=right_bitmap)
+                # Слияние по частям: объединение вливает меньшее множество блоками
+                left._MAX_BUFFER = right._MAX_BUFFER = 16
+                for code in first:
+                    left.add_code(code)
+                for code in second:
+                    right.add_code(code)
+                with self.subTest(left=left_bitmap, right=right_bitmap):
+                    union = left | right
+                    self.assertEqual(union.bitmap, left_bitmap or right_bitmap)
+                    self.assertEqual(len(union), len(expected))
+                    self.assertEqual(list(union.codes()), expected)
+    
+    def test_save_and_load(self):
+        """Тест: сохранение и загрузка"""
+        codes = self._codes(1000, 5)
+        with tempfile.TemporaryDirectory() as tmp:
+            for bitmap in (False, True):
+                phones = PhoneSet(bitmap=bitmap)
+                for code in codes:
+                    phones.add_code(code)
+                filename = os.path.join(tmp, f"phones{int(bitmap)}.bin")
+                phones.save(filename)
+                loaded = PhoneSet.load(filename)
+                self.assertEqual(loaded.bitmap, bitmap)
+                self.assertEqual(len(loaded), len(set(codes)))
+                self.assertEqual(list(loaded.codes()), sorted(set(codes)))
+            bad = os.path.join(tmp, "bad.bin")
+            with open(bad, 'wb') as f:
+                f.write(b"not a phone set")
+            with self.assertRaises(ValueError):
+                PhoneSet.load(bad)
+
+
+@unittest.skipIf(np is None, "нужен numpy")
+class TestNormalizeArray(unittest.TestCase):
+    """Тесты для векторной нормализации столбца номеров"""
+    
+    def setUp(self):
+        rng = random.Random(9)
+        alphabet = "+78 9-()\t ٣a0778012345"
+        self.phones = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 18))) for _ in range(3000)]
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_contacts.txt")
+        with open(path, encoding='utf-8') as f:
+            self.phones += f.read().splitlines()
+        self.phones += ["", "99+9123456", "доб. 8 999 123 45 67", "1" * 300,
+                        "12345+6789", "8+12345678", "+123456789", "7٣99123456"]
+    
+    def assertMatchesNormalize(self, phones, result, valid):
+        for phone, normalized, ok in zip(phones, result.tolist(), valid.tolist()):
+            expected = PhoneValidator.normalize_phone(phone)
+            self.assertEqual((normalized, ok), (expected or '', expected is not None), phone)
+    
+    def test_strings(self):
+        """Тест: строки совпадают с normalize_phone, включая цифры Юникода"""
+        result, valid = PhoneValidator.normalize_array(np.array(self.phones))
+        self.assertEqual(result.dtype, np.dtype('<U12'))
+        self.assertGreater(valid.sum(), 100)
+        self.assertMatchesNormalize(self.phones, result, valid)
+    
+    def test_ascii_and_bytes(self):
+        """Тест: ASCII-строки и байты (не-ASCII строки байтов декодируются)"""
+        ascii_phones = [phone for phone in self.phones if phone.isascii()]
+        self.assertMatchesNormalize(ascii_phones, *PhoneValidator.normalize_array(ascii_phones))
+        encoded = np.array([phone.encode('utf-8') for phone in self.phones])
+        self.assertMatchesNormalize(self.phones, *PhoneValidator.normalize_array(encoded))
+    
+    def test_int_codes(self):
+        """Тест: числа совпадают с PhoneSet.encode"""
+        codes, valid = PhoneValidator.normalize_array(self.phones, as_int=True)
+        self.assertEqual(codes.dtype, np.int64)
+        for phone, code, ok in zip(self.phones, codes.tolist(), valid.tolist()):
+            expected = PhoneSet.encode(phone)
+            self.assertEqual(ok, expected is not None, phone)
+            self.assertEqual(code, -1 if expected is None else expected, phone)
+    
+    def test_empty(self):
+        """Тест: пустой массив"""
+        result, valid = PhoneValidator.normalize_array(np.array([], dtype=str))
+        self.assertEqual((len(result), len(valid)), (0, 0))
+
+
+class TestBatchNormalize(unittest.TestCase):
+    """Тесты для пакетной нормализации CSV и JSONL"""
+    
+    def test_csv(self):
+        """Тест: столбец нормализуется, добавляются valid и operator"""
+        source = io.StringIO('name,phone\nИван,8 (999) 123-45-67\nПётр,тел. 89991234567\nОлег,123\nлишнее,1,2\n')
+        target = io.StringIO()
+        result = phone_batch.normalize_stream(source, target, 'csv', 'phone', workers=0)
+        self.assertEqual(target.getvalue().splitlines(), [
+            'name,phone,valid,operator',
+            'Иван,+79991234567,1,999',
+            'Пётр,+79991234567,0,',
+            'Олег,123,0,',
+        ])
+        self.assertEqual((result.rows, result.valid, result.normalized, result.rejected), (3, 1, 2, 1))
+        self.assertEqual([line for line, _ in result.errors], [5])
+    
+    def test_csv_existing_columns_and_missing_column(self):
+        """Тест: существующий столбец valid перезаписывается; нет столбца с номером - ошибка"""
+        target = io.StringIO()
+        phone_batch.normalize_stream(io.StringIO('valid,tel\nx,+7 912 345 67 89\n'), target, 'csv', 'tel', workers=0)
+        self.assertEqual(target.getvalue().splitlines(), ['valid,tel,operator', '1,+79123456789,912'])
+        with self.assertRaises(ValueError):
+            phone_batch.normalize_stream(io.StringIO('name\nx\n'), io.StringIO(), 'csv', 'phone', workers=0)
+    
+    def test_jsonl(self):
+        """Тест: JSONL, некорректные строки пропускаются с номерами строк"""
+        source = io.StringIO('{"phone": "+7 912 345 67 89", "id": 1}\nне JSON\n\n[1]\n{"id": 2}\n')
+        target = io.StringIO()
+        result = phone_batch.normalize_stream(source, target, 'jsonl', workers=0)
+        self.assertEqual(target.getvalue().splitlines(), [
+            '{"phone": "+79123456789", "id": 1, "valid": true, "operator": "912"}',
+            '{"id": 2, "valid": false, "operator": ""}',
+        ])
+        self.assertEqual(result.errors, [(2, "Некорректный JSON"), (4, "Запись должна быть объектом")])
+    
+    def test_file_in_process_pool_keeps_order(self):
+        """Тест: .csv.gz в пуле процессов, порядок строк сохраняется"""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "contacts.csv.gz")
+            output = os.path.join(tmp, "out.csv")
+            with gzip.open(source, 'wt', encoding='utf-8', newline='') as f:
+                f.write("id,phone\n")
+                for i in range(300):
+                    f.write(f"{i},8 999 {i:03} 45 67\n")
+            result = phone_batch.normalize_file(source, output, workers=2, chunk_size=16)
+            with open(output, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        self.assertEqual((result.rows, result.valid), (300, 300))
+        self.assertEqual(lines[1:], [f"{i},+7999{i:03}4567,1,999" for i in range(300)])
+
+
+class TestParseInternational(unittest.TestCase):
+    """Тесты для международных номеров и дерева кодов стран"""
+    
+    def test_countries(self):
+        """Тест: страна определяется по коду и началу номера"""
+        cases = {
+            "+7 999 123-45-67": ('RU', '+79991234567', '+7 999 123 45 67'),
+            "+7 (701) 123 45 67": ('KZ', '+77011234567', '+7 701 123 45 67'),
+            "+1 (202) 555-0123": ('US', '+12025550123', '+1 202 555 0123'),
+            "0044 7911 123456": ('GB', '+447911123456', '+44 7911 123456'),
+            "+33 1 23 45 67 89": ('FR', '+33123456789', '+33 1 23 45 67 89'),
+            "+380.44.123.45.67": ('UA', '+380441234567', '+380 44 123 45 67'),
+            "+49 30 123456": ('DE', '+4930123456', '+49 30123456'),
+        }
+        for phone, (region, e164, formatted) in cases.items():
+            with self.subTest(phone=phone):
+                parsed = PhoneValidator.parse_international(phone)
+                self.assertTrue(parsed.valid)
+                self.assertEqual((parsed.region, parsed.e164, parsed.formatted), (region, e164, formatted))
+    
+    def test_invalid(self):
+        """Тест: неизвестный код, неверная длина, посторонние символы, нет + или 00"""
+        self.assertEqual(PhoneValidator.parse_international("+999 123 4567").region, None)
+        short = PhoneValidator.parse_international("+7 999 12")
+        self.assertEqual((short.valid, short.region, short.national, short.e164), (False, 'RU', '99912', None))
+        self.assertFalse(PhoneValidator.parse_international("+7 999 123 45 67 8").valid)
+        self.assertFalse(PhoneValidator.parse_international("+7 999 abc 45 67").valid)
+        self.assertFalse(PhoneValidator.parse_international("8 999 123 45 67").valid)
+        self.assertFalse(PhoneValidator.parse_international("").valid)
+    
+    def test_russian_numbers_match_normalize_phone(self):
+        """Тест: номера +7 нормализуются так же, как normalize_phone"""
+        for phone in ["+7 999 123 45 67", "+7(999)123-45-67", "+79161234567", "+7 495 123-45-67"]:
+            with self.subTest(phone=phone):
+                self.assertEqual(PhoneValidator.parse_international(phone).e164,
+                                 PhoneValidator.normalize_phone(phone))
+    
+    def test_every_rule_is_reachable(self):
+        """Тест: номер допустимой длины каждого правила распознаётся этим правилом"""
+        for rule in COUNTRY_RULES:
+            for length in rule.lengths:
+                national = (rule.prefixes[-1] + "5" * length)[:length]
+                with self.subTest(region=rule.region, length=length):
+                    parsed = PhoneValidator.parse_international(f"+{rule.code} {national}")
+                    self.assertTrue(parsed.valid)
+                    self.assertEqual((parsed.region, parsed.national), (rule.region, national))
+    
+    def test_trie(self):
+        """Тест: самый длинный ключ побеждает, занятый ключ не перезаписывается"""
+        trie = CountryCodeTrie()
+        self.assertEqual(trie.match("77011234567").region, 'KZ')
+        self.assertEqual(trie.match("79991234567").region, 'RU')
+        self.assertIsNone(trie.match("999"))
+        with self.assertRaises(ValueError):
+            trie.add("44", COUNTRY_RULES[0])
+    
+    def test_find_international_phones(self):
+        """Тест: поиск по шаблону international"""
+        text = "Москва +7 495 123-45-67, Лондон +44 20 7946 0958, неизвестный +999 1234 5678"
+        found = PhoneValidator.find_international_phones(text)
+        self.assertEqual([(phone.region, phone.e164) for phone in found],
+                         [('RU', '+74951234567'), ('GB', '+442079460958')])
+
+
 def run_tests():
     """Запуск всех тестов с красивым выводом"""
     print("\n" + "="*70)
@@ -181,6 +756,15 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestFindPhonesInText))
     suite.addTests(loader.loadTestsFromTestCase(TestExtractParts))
     suite.addTests(loader.loadTestsFromTestCase(TestFindPhonesInFile))
+    suite.addTests(loader.loadTestsFromTestCase(TestParse))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingFileScan))
+    suite.addTests(loader.loadTestsFromTestCase(TestScanDirectory))
+    suite.addTests(loader.loadTestsFromTestCase(TestStateMachine))
+    suite.addTests(loader.loadTestsFromTestCase(TestCrawler))
+    suite.addTests(loader.loadTestsFromTestCase(TestPhoneSet))
+    suite.addTests(loader.loadTestsFromTestCase(TestNormalizeArray))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchNormalize))
+    suite.addTests(loader.loadTestsFromTestCase(TestParseInternational))
     
     # Запускаем тесты
     runner = unittest.TextTestRunner(verbosity=2)